@@ -0,0 +1,57 @@
+"""Create stamp_job
+
+Revision ID: 3c5e8a1f2b47
+Revises: 7ab730966e00
+Create Date: 2026-10-17 10:12:03.418220
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import os
+SCHEMA = os.getenv("DB_SCHEMA", "iso")
+
+# revision identifiers, used by Alembic.
+revision: str = '3c5e8a1f2b47'
+down_revision: Union[str, Sequence[str], None] = '7ab730966e00'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'stamp_job',
+        sa.Column('job_id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('version_id', sa.BigInteger(), nullable=False),
+        sa.Column('archivo_url', sa.Text(), nullable=False),
+        sa.Column('status_item_id', sa.BigInteger(), nullable=False),
+        sa.Column('signer_name', sa.Text(), nullable=True),
+        sa.Column('fecha', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('nombre_documento', sa.Text(), nullable=True),
+        sa.Column('dedup_key', sa.Text(), nullable=False),
+        sa.Column('state', sa.String(length=16), server_default='pending', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('max_attempts', sa.Integer(), server_default='5', nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('source_generation', sa.BigInteger(), nullable=True),
+        sa.Column('run_after', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['version_id'], [f'{SCHEMA}.documento_version.version_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('job_id'),
+        sa.UniqueConstraint('dedup_key'),
+        schema=SCHEMA
+    )
+    op.create_index('ix_stamp_job_claim', 'stamp_job', ['state', 'run_after'], unique=False, schema=SCHEMA)
+    op.create_index('ix_stamp_job_version', 'stamp_job', ['version_id', 'job_id'], unique=False, schema=SCHEMA)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stamp_job_version', table_name='stamp_job', schema=SCHEMA)
+    op.drop_index('ix_stamp_job_claim', table_name='stamp_job', schema=SCHEMA)
+    op.drop_table('stamp_job', schema=SCHEMA)
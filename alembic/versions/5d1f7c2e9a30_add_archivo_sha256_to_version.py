@@ -0,0 +1,37 @@
+"""Add archivo_sha256 and archivo_bytes to documento_version
+
+Revision ID: 5d1f7c2e9a30
+Revises: 3c5e8a1f2b47
+Create Date: 2026-10-17 11:02:47.105318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import os
+SCHEMA = os.getenv("DB_SCHEMA", "iso")
+
+# revision identifiers, used by Alembic.
+revision: str = '5d1f7c2e9a30'
+down_revision: Union[str, Sequence[str], None] = '3c5e8a1f2b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "documento_version",
+        sa.Column("archivo_sha256", sa.String(length=64), nullable=True),
+        schema=SCHEMA,
+    )
+    op.add_column(
+        "documento_version",
+        sa.Column("archivo_bytes", sa.BigInteger(), nullable=True),
+        schema=SCHEMA,
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("documento_version", "archivo_bytes", schema=SCHEMA)
+    op.drop_column("documento_version", "archivo_sha256", schema=SCHEMA)
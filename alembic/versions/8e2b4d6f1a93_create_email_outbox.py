@@ -0,0 +1,53 @@
+"""Create email_outbox
+
+Revision ID: 8e2b4d6f1a93
+Revises: 5d1f7c2e9a30
+Create Date: 2026-10-17 12:24:51.730142
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import os
+SCHEMA = os.getenv("DB_SCHEMA", "iso")
+
+# revision identifiers, used by Alembic.
+revision: str = '8e2b4d6f1a93'
+down_revision: Union[str, Sequence[str], None] = '5d1f7c2e9a30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'email_outbox',
+        sa.Column('email_id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('version_id', sa.BigInteger(), nullable=True),
+        sa.Column('to_email', sa.Text(), nullable=False),
+        sa.Column('subject', sa.Text(), nullable=False),
+        sa.Column('body_text', sa.Text(), nullable=False),
+        sa.Column('body_html', sa.Text(), nullable=True),
+        sa.Column('dedup_key', sa.Text(), nullable=True),
+        sa.Column('state', sa.String(length=16), server_default='pending', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('max_attempts', sa.Integer(), server_default='6', nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('run_after', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['version_id'], [f'{SCHEMA}.documento_version.version_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('email_id'),
+        sa.UniqueConstraint('dedup_key'),
+        schema=SCHEMA
+    )
+    op.create_index('ix_email_outbox_claim', 'email_outbox', ['state', 'run_after'], unique=False, schema=SCHEMA)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_email_outbox_claim', table_name='email_outbox', schema=SCHEMA)
+    op.drop_table('email_outbox', schema=SCHEMA)
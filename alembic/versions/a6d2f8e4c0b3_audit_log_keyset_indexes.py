@@ -0,0 +1,34 @@
+"""Audit log keyset indexes
+
+Revision ID: a6d2f8e4c0b3
+Revises: e1a7c3b9d5f2
+Create Date: 2026-10-17 21:30:52.118734
+
+Índices btree en el orden (created_at, id) que usa la paginación de /audit.
+El BRIN sirve para recortar rangos de tiempo pero no entrega filas ordenadas.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import os
+SCHEMA = os.getenv("DB_SCHEMA", "iso")
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d2f8e4c0b3'
+down_revision: Union[str, Sequence[str], None] = 'e1a7c3b9d5f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_audit_log_created_id', 'audit_log', ['created_at', 'id'], unique=False, schema=SCHEMA)
+    op.create_index('ix_audit_log_table_created_id', 'audit_log', ['table_name', 'created_at', 'id'],
+                    unique=False, schema=SCHEMA)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audit_log_table_created_id', table_name='audit_log', schema=SCHEMA)
+    op.drop_index('ix_audit_log_created_id', table_name='audit_log', schema=SCHEMA)
@@ -0,0 +1,38 @@
+"""Create audit_outbox
+
+Revision ID: b7d3e9f2c4a1
+Revises: 8e2b4d6f1a93
+Create Date: 2026-10-17 16:02:18.514207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import os
+SCHEMA = os.getenv("DB_SCHEMA", "iso")
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d3e9f2c4a1'
+down_revision: Union[str, Sequence[str], None] = '8e2b4d6f1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'audit_outbox',
+        sa.Column('outbox_id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('records', sa.JSON(), nullable=False),
+        sa.PrimaryKeyConstraint('outbox_id'),
+        schema=SCHEMA
+    )
+    op.create_index('ix_audit_outbox_created', 'audit_outbox', ['created_at'], unique=False, schema=SCHEMA)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audit_outbox_created', table_name='audit_outbox', schema=SCHEMA)
+    op.drop_table('audit_outbox', schema=SCHEMA)
@@ -0,0 +1,125 @@
+"""Partition audit_log by month
+
+Revision ID: c4f8a2d6e1b5
+Revises: b7d3e9f2c4a1
+Create Date: 2026-10-17 18:41:07.332190
+
+Reconstruye iso.audit_log como tabla particionada por RANGE (created_at) con
+una partición por mes, más audit_log_default para lo que quede fuera. Las
+columnas JSON pasan a jsonb, id y target_pk_id a bigint, y los índices a:
+    BRIN (created_at)                               rangos de tiempo, casi sin tamaño
+    btree (table_name, target_pk_id, created_at)    historial de un registro
+    btree (actor, created_at)                       actividad de un usuario
+Los datos existentes se copian con su id y la identidad sigue desde el máximo.
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import os
+SCHEMA = os.getenv("DB_SCHEMA", "iso")
+MONTHS_AHEAD = int(os.getenv("AUDIT_PARTITION_MONTHS_AHEAD", "3"))
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f8a2d6e1b5'
+down_revision: Union[str, Sequence[str], None] = 'b7d3e9f2c4a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COLUMNS = "id, created_at, table_name, operation, target_pk_id, target_pk, actor, before, after"
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(f'ALTER TABLE "{SCHEMA}".audit_log RENAME TO audit_log_legacy')
+    op.execute(f'ALTER TABLE "{SCHEMA}".audit_log_legacy RENAME CONSTRAINT audit_log_pkey TO audit_log_legacy_pkey')
+    op.drop_index('ix_iso_audit_log_id', table_name='audit_log_legacy', schema=SCHEMA)
+    op.drop_index('ix_iso_audit_log_target_pk_id', table_name='audit_log_legacy', schema=SCHEMA)
+
+    op.execute(f"""
+        CREATE TABLE "{SCHEMA}".audit_log (
+            id bigint GENERATED BY DEFAULT AS IDENTITY,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            table_name varchar(128) NOT NULL,
+            operation varchar(16) NOT NULL,
+            target_pk_id bigint,
+            target_pk jsonb NOT NULL,
+            actor varchar(128),
+            before jsonb,
+            after jsonb,
+            CONSTRAINT audit_log_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+
+    # Un mes por partición desde el registro más viejo hasta MONTHS_AHEAD meses adelante
+    oldest = op.get_bind().execute(sa.text(f'SELECT min(created_at) FROM "{SCHEMA}".audit_log_legacy')).scalar()
+    now = datetime.now(timezone.utc)
+    month = date((oldest or now).year, (oldest or now).month, 1)
+    last = _add_months(date(now.year, now.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        op.execute(
+            f'CREATE TABLE "{SCHEMA}".audit_log_p{month.year:04d}_{month.month:02d} '
+            f'PARTITION OF "{SCHEMA}".audit_log '
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+            f"TO ('{_add_months(month, 1).isoformat()} 00:00:00+00')"
+        )
+        month = _add_months(month, 1)
+    op.execute(f'CREATE TABLE "{SCHEMA}".audit_log_default PARTITION OF "{SCHEMA}".audit_log DEFAULT')
+
+    op.create_index('ix_audit_log_created_brin', 'audit_log', ['created_at'], unique=False, schema=SCHEMA,
+                    postgresql_using='brin')
+    op.create_index('ix_audit_log_table_pk_created', 'audit_log', ['table_name', 'target_pk_id', 'created_at'],
+                    unique=False, schema=SCHEMA)
+    op.create_index('ix_audit_log_actor_created', 'audit_log', ['actor', 'created_at'], unique=False, schema=SCHEMA)
+
+    op.execute(f"""
+        INSERT INTO "{SCHEMA}".audit_log ({_COLUMNS})
+        SELECT id, created_at, table_name, operation, target_pk_id,
+               target_pk::jsonb, actor, before::jsonb, after::jsonb
+        FROM "{SCHEMA}".audit_log_legacy
+    """)
+    op.execute(f"""
+        SELECT setval(pg_get_serial_sequence('"{SCHEMA}".audit_log', 'id'),
+                      COALESCE((SELECT max(id) FROM "{SCHEMA}".audit_log), 0) + 1, false)
+    """)
+    op.drop_table('audit_log_legacy', schema=SCHEMA)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(f'ALTER TABLE "{SCHEMA}".audit_log RENAME TO audit_log_partitioned')
+    op.execute(f'ALTER TABLE "{SCHEMA}".audit_log_partitioned RENAME CONSTRAINT audit_log_pkey TO audit_log_partitioned_pkey')
+    op.create_table(
+        'audit_log',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('table_name', sa.String(length=128), nullable=False),
+        sa.Column('operation', sa.String(length=16), nullable=False),
+        sa.Column('target_pk_id', sa.Integer(), nullable=True),
+        sa.Column('target_pk', sa.JSON(), nullable=False),
+        sa.Column('actor', sa.String(length=128), nullable=True),
+        sa.Column('before', sa.JSON(), nullable=True),
+        sa.Column('after', sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        schema=SCHEMA
+    )
+    op.execute(f"""
+        INSERT INTO "{SCHEMA}".audit_log ({_COLUMNS})
+        SELECT id, created_at, table_name, operation, target_pk_id,
+               target_pk::json, actor, before::json, after::json
+        FROM "{SCHEMA}".audit_log_partitioned
+    """)
+    op.execute(f"""
+        SELECT setval(pg_get_serial_sequence('"{SCHEMA}".audit_log', 'id'),
+                      COALESCE((SELECT max(id) FROM "{SCHEMA}".audit_log), 0) + 1, false)
+    """)
+    op.create_index(op.f('ix_iso_audit_log_id'), 'audit_log', ['id'], unique=False, schema=SCHEMA)
+    op.create_index(op.f('ix_iso_audit_log_target_pk_id'), 'audit_log', ['target_pk_id'], unique=False, schema=SCHEMA)
+    # Borra también todas las particiones
+    op.drop_table('audit_log_partitioned', schema=SCHEMA)
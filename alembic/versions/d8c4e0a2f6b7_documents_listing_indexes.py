@@ -0,0 +1,50 @@
+"""Documents listing indexes
+
+Revision ID: d8c4e0a2f6b7
+Revises: a6d2f8e4c0b3
+Create Date: 2026-10-17 22:48:31.604472
+
+Índices del listado paginado de documentos:
+    documento (empresa_id, documento_id)                 keyset por empresa
+    documento_version (documento_id, numero_version)     última versión por documento
+Si la extensión pg_trgm está disponible, además índices GIN de trigramas en
+nombre y código para el filtro de texto (ILIKE '%...%').
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import os
+SCHEMA = os.getenv("DB_SCHEMA", "iso")
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8c4e0a2f6b7'
+down_revision: Union[str, Sequence[str], None] = 'a6d2f8e4c0b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TRGM_INDEXES = (('ix_documento_nombre_trgm', 'nombre'), ('ix_documento_codigo_trgm', 'codigo'))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_documento_empresa_documento', 'documento', ['empresa_id', 'documento_id'],
+                    unique=False, schema=SCHEMA)
+    op.create_index('ix_documento_version_documento_numero', 'documento_version', ['documento_id', 'numero_version'],
+                    unique=False, schema=SCHEMA)
+
+    bind = op.get_bind()
+    if bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).scalar():
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, column in _TRGM_INDEXES:
+            op.execute(f'CREATE INDEX IF NOT EXISTS {name} ON "{SCHEMA}".documento USING gin ({column} gin_trgm_ops)')
+    else:
+        print("[Alembic] pg_trgm no disponible: el filtro de texto del listado no tendrá índice")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, _ in _TRGM_INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS "{SCHEMA}".{name}')
+    op.drop_index('ix_documento_version_documento_numero', table_name='documento_version', schema=SCHEMA)
+    op.drop_index('ix_documento_empresa_documento', table_name='documento', schema=SCHEMA)
@@ -1,95 +1,187 @@
-from sqlalchemy import inspect, event
-from sqlalchemy.orm import Session
-from app.infrastructure.models import AuditLog
+#Archivo Infraestructura/ Auditoría de cambios ORM
+"""
+Registra en iso.audit_log cada alta, cambio y baja que pasa por un flush.
+
+- before_flush arma los registros de cambios y bajas (el historial de los
+  atributos y las filas a borrar todavía están disponibles) y guarda las altas
+  pendientes en session.info.
+- after_flush completa las altas, que ya tienen su PK asignada, y escribe todos
+  los registros del flush con un solo INSERT multi-fila en la misma conexión y
+  transacción (psycopg2 agrupa el executemany en INSERT ... VALUES (...), (...)).
+
+Los valores se guardan compactos (sin NULLs en altas y bajas, textos grandes
+como referencia a iso.audit_blob), ver audit_blobs.py.
+
+Con AUDIT_SINK=async el flush escribe en cambio una sola fila en
+iso.audit_outbox y el worker de auditoría la pasa a audit_log después del
+commit (ver audit_sink.py).
+
+Los metadatos por mapper (tabla, columnas, PK) se calculan una sola vez.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Mapper, Session
+from sqlalchemy.orm.attributes import instance_state
+
+from app.infrastructure.audit_blobs import compact_values, write_blobs
+from app.infrastructure.audit_sink import AUDIT_SINK, audit_sink, write_outbox
 from app.infrastructure.audit_vars import current_actor  # <- usa la ContextVar compartida
-from app.utils.decimal_utils import convert_decimal
-from datetime import datetime
+from app.infrastructure.models import AuditBlob, AuditLog, AuditOutbox
 
-@event.listens_for(Session, "before_flush")
-def audit_before_flush(session: Session, flush_context, instances):
+_PENDING_KEY = "_audit_pending"
+_OUTBOX_KEY = "_audit_outbox_ids"
+_AUDIT_MODELS = (AuditLog, AuditOutbox, AuditBlob)
+_audit_insert = insert(AuditLog.__table__)
+
+
+@dataclass(frozen=True)
+class _MapperAudit:
+    table_name: str
+    column_keys: tuple
+    pk_keys: tuple
+    # Sólo con PK de una columna se llena target_pk_id
+    single_pk_key: str | None
+
+
+_mapper_cache: dict = {}
+
+
+def _mapper_audit(mapper: Mapper) -> _MapperAudit:
+    meta = _mapper_cache.get(mapper)
+    if meta is None:
+        pk_keys = tuple(mapper.get_property_by_column(col).key for col in mapper.primary_key)
+        meta = _MapperAudit(
+            table_name=mapper.local_table.name,
+            column_keys=tuple(attr.key for attr in mapper.column_attrs),
+            pk_keys=pk_keys,
+            single_pk_key=pk_keys[0] if len(pk_keys) == 1 else None,
+        )
+        _mapper_cache[mapper] = meta
+    return meta
+
+
+def _json_value(value):
+    """Valor apto para las columnas JSON (antes convert_decimal + serialize_for_json)."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, dict):
+        return {k: _json_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_value(v) for v in value]
+    return value
+
+
+def _pk_values(state, meta: _MapperAudit) -> dict:
+    # La identidad tiene la PK aunque los atributos estén expirados
+    if state.identity is not None:
+        return dict(zip(meta.pk_keys, state.identity))
+    return {key: state.dict.get(key) for key in meta.pk_keys}
+
+
+def _record(meta: _MapperAudit, operation: str, pk: dict, actor, before, after) -> dict:
+    pk_value = pk.get(meta.single_pk_key) if meta.single_pk_key else None
+    return {
+        "table_name": meta.table_name,
+        "operation": operation,
+        "target_pk_id": pk_value if isinstance(pk_value, int) else None,
+        "target_pk": {key: _json_value(value) for key, value in pk.items()},
+        "actor": actor,
+        "before": before,
+        "after": after,
+    }
+
+
+def _actor(session: Session):
     # Lee primero de session.info, luego de ContextVar
     actor = session.info.get("actor") or current_actor.get()
+    return str(actor) if actor is not None else None
+
+
+@event.listens_for(Session, "before_flush")
+def audit_before_flush(session: Session, flush_context, instances):
+    actor = _actor(session)
+    records = []
+    new_states = []
+    blobs = {}
+
+    with session.no_autoflush:
+        for obj in session.new:
+            if isinstance(obj, _AUDIT_MODELS):
+                continue
+            new_states.append(instance_state(obj))
 
-    def _pk_dict(obj):
-        mapper = inspect(obj).mapper
-        return {col.key: getattr(obj, col.key, None) for col in mapper.primary_key}
-
-    def _pk_value(obj):
-        mapper = inspect(obj).mapper
-        pks = mapper.primary_key
-        if len(pks) != 1:
-            return None
-        val = getattr(obj, pks[0].key, None)
-        return val if isinstance(val, int) else None
-
-    def _serialize_instance(obj):
-        state = inspect(obj)
-        return {attr.key: getattr(obj, attr.key) for attr in state.mapper.column_attrs}
-
-    def _serialize_changes(obj):
-        state = inspect(obj)
-        before, after = {}, {}
-        for attr in state.mapper.column_attrs:
-            key = attr.key
-            hist = state.attrs[key].history
-            if not hist.has_changes():
+        for obj in session.dirty:
+            if isinstance(obj, _AUDIT_MODELS):
+                continue
+            state = instance_state(obj)
+            if not state.modified:
+                continue
+            meta = _mapper_audit(state.mapper)
+            before, after = {}, {}
+            attrs = state.attrs
+            for key in meta.column_keys:
+                hist = attrs[key].history
+                if not hist.has_changes():
+                    continue
+                before[key] = _json_value(hist.deleted[0] if hist.deleted else None)
+                after[key] = _json_value(hist.added[0] if hist.added else getattr(obj, key))
+            if not before and not after:
                 continue
-            before[key] = hist.deleted[0] if hist.deleted else None
-            after[key] = hist.added[0] if hist.added else getattr(obj, key)
-        return before, after
-
-    def serialize_for_json(data):
-        if isinstance(data, dict):
-            return {k: serialize_for_json(v) for k, v in data.items()}
-        elif isinstance(data, list):
-            return [serialize_for_json(i) for i in data]
-        elif isinstance(data, datetime):
-            return data.isoformat()
-        else:
-            return data
-
-    for obj in list(session.new):
-        if isinstance(obj, AuditLog):
-            continue
-        session.add(AuditLog(
-            table_name=inspect(obj).mapper.local_table.name,
-            operation="CREATE",
-            target_pk_id=_pk_value(obj),
-            target_pk=serialize_for_json(convert_decimal(_pk_dict(obj))),
-            actor=str(actor) if actor is not None else None,
-            before=None,
-            after=serialize_for_json(convert_decimal(_serialize_instance(obj))),
-        ))
-
-    for obj in list(session.dirty):
-        if isinstance(obj, AuditLog):
-            continue
-        state = inspect(obj)
-        if not state.modified:
-            continue
-        before, after = _serialize_changes(obj)
-        if not before and not after:
-            continue
-        session.add(AuditLog(
-            table_name=inspect(obj).mapper.local_table.name,
-            operation="UPDATE",
-            target_pk_id=_pk_value(obj),
-            target_pk=serialize_for_json(convert_decimal(_pk_dict(obj))),
-            actor=str(actor) if actor is not None else None,
-            before=serialize_for_json(convert_decimal(before)),
-            after=serialize_for_json(convert_decimal(after)),
-        ))
-
-    for obj in list(session.deleted):
-        if isinstance(obj, AuditLog):
-            continue
-        state = inspect(obj)
-        session.add(AuditLog(
-            table_name=state.mapper.local_table.name,
-            operation="DELETE",
-            target_pk_id=_pk_value(obj),
-            target_pk=serialize_for_json(_pk_dict(obj)),
-            actor=str(actor) if actor is not None else None,
-            before=serialize_for_json(_serialize_instance(obj)),
-            after=None,
-        ))
\ No newline at end of file
+            records.append(_record(meta, "UPDATE", _pk_values(state, meta), actor,
+                                   compact_values(before, blobs, drop_nulls=False),
+                                   compact_values(after, blobs, drop_nulls=False)))
+
+        for obj in session.deleted:
+            if isinstance(obj, _AUDIT_MODELS):
+                continue
+            state = instance_state(obj)
+            meta = _mapper_audit(state.mapper)
+            # getattr carga lo que esté expirado mientras la fila todavía existe
+            snapshot = {key: _json_value(getattr(obj, key)) for key in meta.column_keys}
+            records.append(_record(meta, "DELETE", _pk_values(state, meta), actor,
+                                   compact_values(snapshot, blobs, drop_nulls=True), None))
+
+    session.info[_PENDING_KEY] = (actor, new_states, records, blobs)
+
+
+@event.listens_for(Session, "after_flush")
+def audit_after_flush(session: Session, flush_context):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending is None:
+        return
+    actor, new_states, records, blobs = pending
+    for state in new_states:
+        meta = _mapper_audit(state.mapper)
+        # Sólo lo que ya está en memoria: leer los defaults del servidor costaría un SELECT por fila
+        values = state.dict
+        after = {key: _json_value(values.get(key)) for key in meta.column_keys}
+        records.append(_record(meta, "CREATE", _pk_values(state, meta), actor, None,
+                               compact_values(after, blobs, drop_nulls=True)))
+    if not records:
+        return
+    write_blobs(session.connection(), blobs)
+    if AUDIT_SINK == "async":
+        outbox_id = write_outbox(session.connection(), records)
+        session.info.setdefault(_OUTBOX_KEY, []).append(outbox_id)
+    else:
+        session.connection().execute(_audit_insert, records)
+
+
+@event.listens_for(Session, "after_commit")
+def audit_after_commit(session: Session):
+    outbox_ids = session.info.pop(_OUTBOX_KEY, None)
+    if outbox_ids:
+        audit_sink.offer(outbox_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def audit_after_rollback(session: Session):
+    # Las filas de outbox se fueron con la transacción
+    session.info.pop(_OUTBOX_KEY, None)
@@ -0,0 +1,126 @@
+#Archivo Infraestructura/ Compactación de la auditoría
+"""
+Codificación compacta de los valores que audit.py guarda en before/after.
+
+Con AUDIT_COMPACT=1 (valor por defecto):
+- Las altas y bajas omiten las columnas en NULL; al leer, una columna ausente
+  vale NULL (los cambios ya guardaban sólo las columnas modificadas).
+- Un texto de AUDIT_BLOB_MIN_BYTES o más se reemplaza por {"$blob": "<sha256>"}
+  y el texto va una sola vez a iso.audit_blob. Un mismo texto repetido en el
+  alta, en el before/after de cada cambio y en la baja ocupa un solo blob.
+- AUDIT_BLOB_COMPRESSION=zlib|zstd comprime el contenido del blob (zstd
+  requiere el paquete zstandard; si falta se usa zlib). El resto de before y
+  after sigue siendo jsonb sin comprimir, para poder filtrarlo en SQL.
+
+app/services/audit_service.py expande las referencias y reconstruye estados.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import zlib
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.infrastructure.models import AuditBlob
+
+logger = logging.getLogger(__name__)
+
+AUDIT_COMPACT = os.getenv("AUDIT_COMPACT", "1").lower() in ("1", "true", "yes")
+AUDIT_BLOB_MIN_BYTES = int(os.getenv("AUDIT_BLOB_MIN_BYTES", "512"))
+AUDIT_BLOB_COMPRESSION = os.getenv("AUDIT_BLOB_COMPRESSION", "none").lower()
+
+BLOB_KEY = "$blob"
+
+_blob_table = AuditBlob.__table__
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+if AUDIT_BLOB_COMPRESSION == "zstd" and _zstd() is None:
+    logger.warning("AUDIT_BLOB_COMPRESSION=zstd pero zstandard no está instalado; se usa zlib")
+    AUDIT_BLOB_COMPRESSION = "zlib"
+
+
+def encode_blob(raw: bytes, compression: str | None = None) -> tuple[str, bytes]:
+    compression = compression or AUDIT_BLOB_COMPRESSION
+    if compression == "zstd":
+        return "zstd", _zstd().ZstdCompressor(level=3).compress(raw)
+    if compression == "zlib":
+        return "zlib", zlib.compress(raw, 6)
+    return "raw", raw
+
+
+def decode_blob(encoding: str, content: bytes) -> str:
+    if encoding == "zstd":
+        content = _zstd().ZstdDecompressor().decompress(content)
+    elif encoding == "zlib":
+        content = zlib.decompress(content)
+    return bytes(content).decode("utf-8")
+
+
+def is_blob_ref(value) -> bool:
+    return isinstance(value, dict) and len(value) == 1 and BLOB_KEY in value
+
+
+def compact_values(values: dict, blobs: dict[str, bytes], drop_nulls: bool) -> dict:
+    """Valores de before/after con los textos grandes ya como referencias; junta los blobs en `blobs`."""
+    if not AUDIT_COMPACT:
+        return values
+    compact = {}
+    for key, value in values.items():
+        if value is None and drop_nulls:
+            continue
+        # Un carácter ocupa a lo más 4 bytes en UTF-8: los textos cortos ni se codifican
+        if isinstance(value, str) and len(value) >= AUDIT_BLOB_MIN_BYTES // 4:
+            raw = value.encode("utf-8")
+            if len(raw) >= AUDIT_BLOB_MIN_BYTES:
+                digest = hashlib.sha256(raw).hexdigest()
+                blobs[digest] = raw
+                value = {BLOB_KEY: digest}
+        compact[key] = value
+    return compact
+
+
+_insert_ignoring_duplicates = pg_insert(_blob_table).on_conflict_do_nothing(index_elements=["hash"])
+
+
+def write_blobs(connection, blobs: dict[str, bytes]) -> None:
+    """Un solo INSERT multi-fila; los hashes que ya existen se ignoran."""
+    if not blobs:
+        return
+    rows = []
+    for digest, raw in blobs.items():
+        encoding, content = encode_blob(raw)
+        rows.append({"hash": digest, "encoding": encoding, "size": len(raw), "content": content})
+    connection.execute(_insert_ignoring_duplicates, rows)
+
+
+def load_blobs(db: Session, hashes) -> dict[str, str]:
+    hashes = list(set(hashes))
+    if not hashes:
+        return {}
+    rows = db.execute(select(_blob_table.c.hash, _blob_table.c.encoding, _blob_table.c.content)
+                      .where(_blob_table.c.hash.in_(hashes)))
+    return {digest: decode_blob(encoding, content) for digest, encoding, content in rows}
+
+
+def blob_refs(values: dict | None):
+    for value in (values or {}).values():
+        if is_blob_ref(value):
+            yield value[BLOB_KEY]
+
+
+def expand_values(values: dict | None, blobs: dict[str, str]) -> dict | None:
+    if values is None:
+        return None
+    return {key: blobs.get(value[BLOB_KEY]) if is_blob_ref(value) else value for key, value in values.items()}
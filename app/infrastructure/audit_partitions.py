@@ -0,0 +1,238 @@
+#Archivo Infraestructura/ Particiones de audit_log
+"""
+Mantenimiento de las particiones mensuales de iso.audit_log.
+
+- ensure_partitions crea las particiones del mes en curso y de los
+  AUDIT_PARTITION_MONTHS_AHEAD siguientes. Lo que caiga fuera va a
+  iso.audit_log_default; si al crear la partición de un mes la default ya
+  tiene filas de ese mes, create_partition las mueve a la nueva partición en
+  la misma transacción (Postgres no deja crearla mientras estén ahí).
+- detach_expired desprende las particiones cuyos datos son todos anteriores a
+  AUDIT_RETENTION_MONTHS meses (0 = conservar todo). Quedan como tablas sueltas
+  para archivarlas; con AUDIT_RETENTION_DROP=1 se borran.
+
+Con AUDIT_PARTITION_MAINTENANCE=1 la API lo corre al arrancar y luego cada
+AUDIT_PARTITION_INTERVAL_SECONDS (app/workers/audit_partition_worker.py). Un
+advisory lock (tomado y soltado en la misma conexión) evita que varios
+procesos lo hagan a la vez. También se puede correr una vez, por ejemplo con
+cron diario:
+    python -m app.infrastructure.audit_partitions
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+from dotenv import load_dotenv
+from sqlalchemy import Connection, text
+from sqlalchemy.orm import Session
+
+from app.infrastructure.base import SCHEMA_NAME
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+AUDIT_PARTITION_MAINTENANCE = os.getenv("AUDIT_PARTITION_MAINTENANCE", "1").lower() in ("1", "true", "yes")
+AUDIT_PARTITION_MONTHS_AHEAD = int(os.getenv("AUDIT_PARTITION_MONTHS_AHEAD", "3"))
+AUDIT_RETENTION_MONTHS = int(os.getenv("AUDIT_RETENTION_MONTHS", "0"))
+AUDIT_RETENTION_DROP = os.getenv("AUDIT_RETENTION_DROP", "0").lower() in ("1", "true", "yes")
+AUDIT_PARTITION_INTERVAL_SECONDS = float(os.getenv("AUDIT_PARTITION_INTERVAL_SECONDS", str(6 * 3600)))
+
+# Clave del advisory lock del mantenimiento (arbitraria, fija)
+_MAINTENANCE_LOCK_KEY = 0x6175646974  # "audit"
+_AUDIT_COLUMNS = ("id", "created_at", "table_name", "operation", "target_pk_id", "target_pk",
+                  "actor", "before", "after")
+
+_PARTITION_RE = re.compile(r"^audit_log_p(\d{4})_(\d{2})$")
+
+_list_partitions = text("""
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    JOIN pg_class p ON p.oid = i.inhparent
+    JOIN pg_namespace n ON n.oid = p.relnamespace
+    WHERE n.nspname = :schema AND p.relname = 'audit_log'
+""")
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"audit_log_p{month.year:04d}_{month.month:02d}"
+
+
+def _month_bounds(month: date) -> tuple[str, str]:
+    # Límites en UTC explícito: no dependen del timezone de la sesión
+    return f"{month.isoformat()} 00:00:00+00", f"{add_months(month, 1).isoformat()} 00:00:00+00"
+
+
+def create_partition_sql(month: date, schema: str = SCHEMA_NAME) -> str:
+    start, end = _month_bounds(month)
+    return (f'CREATE TABLE IF NOT EXISTS "{schema}".{partition_name(month)} '
+            f'PARTITION OF "{schema}".audit_log '
+            f"FOR VALUES FROM ('{start}') TO ('{end}')")
+
+
+def move_from_default_sql(month: date, schema: str = SCHEMA_NAME) -> list[str]:
+    """
+    Sentencias para crear la partición de `month` cuando audit_log_default ya tiene
+    filas de ese mes: desprender la default, crear la partición, mover las filas y
+    volver a adjuntar la default. Deben ir en una sola transacción.
+    """
+    start, end = _month_bounds(month)
+    columns = ", ".join(_AUDIT_COLUMNS)
+    in_month = f"created_at >= '{start}' AND created_at < '{end}'"
+    return [
+        f'ALTER TABLE "{schema}".audit_log DETACH PARTITION "{schema}".audit_log_default',
+        create_partition_sql(month, schema),
+        f'INSERT INTO "{schema}".{partition_name(month)} ({columns}) '
+        f'SELECT {columns} FROM "{schema}".audit_log_default WHERE {in_month}',
+        f'DELETE FROM "{schema}".audit_log_default WHERE {in_month}',
+        f'ALTER TABLE "{schema}".audit_log ATTACH PARTITION "{schema}".audit_log_default DEFAULT',
+    ]
+
+
+def _current_month(now: datetime | None) -> date:
+    now = now or datetime.now(timezone.utc)
+    return date(now.year, now.month, 1)
+
+
+def existing_partitions(db: Session) -> dict[date, str]:
+    """Particiones mensuales existentes por mes (sin la default)."""
+    months = {}
+    for (name,) in db.execute(_list_partitions, {"schema": SCHEMA_NAME}):
+        match = _PARTITION_RE.match(name)
+        if match:
+            months[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return months
+
+
+def _default_has_rows(db: Session, month: date) -> bool:
+    start, end = _month_bounds(month)
+    return bool(db.execute(
+        text(f'SELECT EXISTS (SELECT 1 FROM "{SCHEMA_NAME}".audit_log_default '
+             f'WHERE created_at >= CAST(:start AS timestamptz) AND created_at < CAST(:end AS timestamptz))'),
+        {"start": start, "end": end},
+    ).scalar())
+
+
+def create_partition(db: Session, month: date) -> int:
+    """Crea la partición de `month` y hace commit. Devuelve cuántas filas sacó de la default."""
+    # Frena las altas mientras se revisa la default y se crea la partición (cosa de una vez al mes)
+    db.execute(text(f'LOCK TABLE "{SCHEMA_NAME}".audit_log IN SHARE ROW EXCLUSIVE MODE'))
+    if not _default_has_rows(db, month):
+        db.execute(text(create_partition_sql(month)))
+        db.commit()
+        return 0
+    statements = move_from_default_sql(month)
+    moved = 0
+    for sql in statements:
+        result = db.execute(text(sql))
+        if sql.startswith("INSERT"):
+            moved = result.rowcount
+    db.commit()
+    logger.warning("audit_log_default tenía %s filas de %s; se movieron a %s", moved, month, partition_name(month))
+    return moved
+
+
+def ensure_partitions(db: Session, months_ahead: int = AUDIT_PARTITION_MONTHS_AHEAD,
+                      now: datetime | None = None) -> list[str]:
+    """Crea las particiones que falten del mes actual en adelante. Devuelve las creadas."""
+    start = _current_month(now)
+    existing = existing_partitions(db)
+    db.commit()
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(start, offset)
+        if month in existing:
+            continue
+        create_partition(db, month)
+        created.append(partition_name(month))
+    return created
+
+
+@dataclass(frozen=True)
+class ExpiredPartition:
+    name: str
+    month: date
+
+
+def expired_partitions(db: Session, retention_months: int = AUDIT_RETENTION_MONTHS,
+                       now: datetime | None = None) -> list[ExpiredPartition]:
+    if retention_months <= 0:
+        return []
+    cutoff = add_months(_current_month(now), -retention_months)
+    # Un mes vence cuando su fin (inicio del mes siguiente) ya quedó antes del corte
+    return [ExpiredPartition(name, month) for month, name in sorted(existing_partitions(db).items())
+            if add_months(month, 1) <= cutoff]
+
+
+def detach_expired(db: Session, retention_months: int = AUDIT_RETENTION_MONTHS,
+                   drop: bool = AUDIT_RETENTION_DROP, now: datetime | None = None) -> list[str]:
+    """Desprende (y opcionalmente borra) las particiones vencidas. Devuelve sus nombres."""
+    detached = []
+    for partition in expired_partitions(db, retention_months, now):
+        db.execute(text(f'ALTER TABLE "{SCHEMA_NAME}".audit_log DETACH PARTITION "{SCHEMA_NAME}".{partition.name}'))
+        if drop:
+            db.execute(text(f'DROP TABLE "{SCHEMA_NAME}".{partition.name}'))
+        db.commit()
+        detached.append(partition.name)
+    return detached
+
+
+def run_maintenance(db: Session) -> dict:
+    """
+    Una pasada de mantenimiento; si otro proceso la está haciendo no hace nada.
+
+    pg_try_advisory_lock es de sesión: queda en la conexión que lo tomó. Cada paso
+    hace commit y una Session del pool devolvería ahí la conexión, así que el
+    unlock podría ir a otra y el lock quedaría tomado para siempre. Por eso todo
+    corre sobre una sola conexión fijada, sacada del mismo engine que `db`.
+    """
+    with db.get_bind().connect() as connection:
+        return _run_pinned(connection)
+
+
+def _run_pinned(connection: Connection) -> dict:
+    lock = {"key": _MAINTENANCE_LOCK_KEY}
+    acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), lock).scalar()
+    connection.commit()
+    if not acquired:
+        return {"created": [], "detached": [], "skipped": True}
+    # Ligada a la conexión: sus commit confirman los pasos sin soltar la conexión
+    pinned = Session(bind=connection, autoflush=False)
+    try:
+        created = ensure_partitions(pinned)
+        detached = detach_expired(pinned)
+    except Exception:
+        pinned.rollback()
+        raise
+    finally:
+        pinned.close()
+        connection.execute(text("SELECT pg_advisory_unlock(:key)"), lock)
+        connection.commit()
+    if created or detached:
+        logger.info("Particiones de audit_log creadas: %s, desprendidas: %s", created, detached)
+    return {"created": created, "detached": detached}
+
+
+def maintain() -> dict:
+    from app.infrastructure.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return run_maintenance(db)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(maintain())
@@ -0,0 +1,150 @@
+#Archivo Infraestructura/ Envío diferido de auditoría
+"""
+Modo AUDIT_SINK=async de la auditoría (audit.py).
+
+En lugar de insertar una fila por cambio en iso.audit_log dentro de la
+transacción de negocio, cada flush inserta una sola fila en iso.audit_outbox
+con todos sus registros (outbox transaccional: si la transacción se revierte,
+la auditoría también). Al hacer commit, el id de esa fila entra a un buffer
+circular en memoria y el worker de auditoría (app/workers/audit_worker.py) la
+pasa a audit_log en lotes.
+
+Pasar un lote es una sola transacción: DELETE ... RETURNING sobre la outbox
+(el borrado es lo que "reclama" la fila, así dos workers nunca copian la misma)
+e INSERT multi-fila en audit_log. Si el proceso cae, o el buffer se llena y
+descarta ids, las filas siguen en la outbox y el barrido las toma cuando pasan
+AUDIT_OUTBOX_GRACE_SECONDS: ningún registro confirmado se pierde.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.infrastructure.models import AuditLog, AuditOutbox
+
+logger = logging.getLogger(__name__)
+
+AUDIT_SINK = os.getenv("AUDIT_SINK", "inline").lower()
+AUDIT_BUFFER_SIZE = int(os.getenv("AUDIT_BUFFER_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "1"))
+AUDIT_OUTBOX_GRACE_SECONDS = float(os.getenv("AUDIT_OUTBOX_GRACE_SECONDS", "30"))
+
+_outbox = AuditOutbox.__table__
+_audit_log = AuditLog.__table__
+
+
+class AuditSink:
+
+    def __init__(self, buffer_size: int = AUDIT_BUFFER_SIZE, batch_size: int = AUDIT_BATCH_SIZE):
+        self.batch_size = batch_size
+        # Sólo ids de la outbox: los registros ya están en la base
+        self._buffer: deque[int] = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        # El worker despierta antes del intervalo si el buffer junta un lote
+        self.batch_ready = threading.Event()
+        self.enqueued = 0
+        self.dropped = 0
+        self.shipped = 0
+        self.swept = 0
+
+    def offer(self, outbox_ids: list[int]) -> None:
+        """Ids de outbox de una transacción ya confirmada."""
+        with self._lock:
+            overflow = len(self._buffer) + len(outbox_ids) - self._buffer.maxlen
+            if overflow > 0:
+                # deque descarta los más viejos; quedan en la outbox para el barrido
+                self.dropped += overflow
+            self._buffer.extend(outbox_ids)
+            self.enqueued += len(outbox_ids)
+            if len(self._buffer) >= self.batch_size:
+                self.batch_ready.set()
+
+    def _take(self, limit: int) -> list[int]:
+        with self._lock:
+            taken = [self._buffer.popleft() for _ in range(min(limit, len(self._buffer)))]
+            if len(self._buffer) < self.batch_size:
+                self.batch_ready.clear()
+            return taken
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def ship(self, db: Session, limit: int | None = None) -> int:
+        """Pasa a audit_log las filas de outbox que están en el buffer. Devuelve cuántos registros escribió."""
+        ids = self._take(limit or self.batch_size)
+        if not ids:
+            return 0
+        try:
+            rows = db.execute(
+                delete(_outbox).where(_outbox.c.outbox_id.in_(ids))
+                .returning(_outbox.c.created_at, _outbox.c.records)
+            ).all()
+            written = _write_records(db, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Se quedan en la outbox; el barrido los reintenta
+            raise
+        with self._lock:
+            self.shipped += written
+        return written
+
+    def sweep(self, db: Session, grace_seconds: float = AUDIT_OUTBOX_GRACE_SECONDS,
+              limit: int | None = None) -> int:
+        """Pasa a audit_log las filas de outbox huérfanas (proceso caído o buffer desbordado)."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+        claim = (select(_outbox.c.outbox_id)
+                 .where(_outbox.c.created_at < cutoff)
+                 .order_by(_outbox.c.outbox_id)
+                 .limit(limit or self.batch_size)
+                 .with_for_update(skip_locked=True))
+        try:
+            rows = db.execute(
+                delete(_outbox).where(_outbox.c.outbox_id.in_(claim.scalar_subquery()))
+                .returning(_outbox.c.created_at, _outbox.c.records)
+            ).all()
+            written = _write_records(db, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        with self._lock:
+            self.swept += written
+        return written
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "mode": AUDIT_SINK,
+                "buffered": len(self._buffer),
+                "buffer_size": self._buffer.maxlen,
+                "enqueued": self.enqueued,
+                "dropped": self.dropped,
+                "shipped": self.shipped,
+                "swept": self.swept,
+            }
+
+
+def _write_records(db: Session, rows) -> int:
+    # created_at es el de la transacción original, no el del envío
+    records = [{**record, "created_at": created_at} for created_at, batch in rows for record in batch]
+    if records:
+        db.execute(insert(_audit_log), records)
+    return len(records)
+
+
+def write_outbox(connection, records: list[dict]) -> int:
+    """Inserta los registros de un flush como una sola fila de outbox y devuelve su id."""
+    return connection.execute(
+        insert(_outbox).values(records=records).returning(_outbox.c.outbox_id)
+    ).scalar_one()
+
+
+audit_sink = AuditSink()
@@ -3,8 +3,16 @@ from __future__ import annotations
 import os
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, MetaData
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import  sessionmaker
 from app.infrastructure.base import Base
+from app.infrastructure.db_pool import (
+    DB_SYNC_POOL_SIZE, DB_SYNC_MAX_OVERFLOW, DB_ASYNC_POOL_SIZE, DB_ASYNC_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT_SECONDS, DB_POOL_RECYCLE_SECONDS,
+    TimedQueuePool, TimedAsyncAdaptedQueuePool, psycopg2_connect_args, asyncpg_connect_args,
+)
+from app.infrastructure.query_stats import install_query_hooks
 
 load_dotenv()
 
@@ -15,13 +23,28 @@ DATABASE_URL = os.getenv(
 
 SCHEMA = os.getenv("DB_SCHEMA", "iso")
 
+
+def _async_database_url(url: str) -> str:
+    """Misma base de datos que DATABASE_URL pero con el driver asyncpg."""
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_database_url(DATABASE_URL)
+
 # IMPORTANT: ensure we look first into schema 'iso' and then 'public'
+# Único engine sync del proceso (comparte con el async el presupuesto de db_pool.py)
 engine = create_engine(
     DATABASE_URL,
+    poolclass=TimedQueuePool,
+    pool_size=DB_SYNC_POOL_SIZE,
+    max_overflow=DB_SYNC_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=DB_POOL_RECYCLE_SECONDS,
     pool_pre_ping=True,
     future=True,
-    connect_args={"options": f"-csearch_path={SCHEMA},public"},
+    connect_args=psycopg2_connect_args(SCHEMA),
 )
+install_query_hooks(engine)
 
 # All tables live in schema iso
 metadata = MetaData(schema=SCHEMA)
@@ -37,3 +60,28 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ---------- Capa async (asyncpg) ----------
+# Para endpoints de lectura muy concurridos: la consulta no ocupa un hilo del
+# threadpool mientras espera a Postgres. Las escrituras siguen en la sesión
+# sync, que es donde se registran los listeners de auditoría.
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=TimedAsyncAdaptedQueuePool,
+    pool_size=DB_ASYNC_POOL_SIZE,
+    max_overflow=DB_ASYNC_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=True,
+    connect_args=asyncpg_connect_args(SCHEMA),
+)
+install_query_hooks(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,180 @@
+#Archivo Infraestructura/ Pool de conexiones de BD
+"""
+Configuración y métricas del pool de conexiones a Postgres.
+
+Todo el proceso comparte un solo engine sync (y su par async), configurados
+desde el entorno:
+
+    DB_POOL_SIZE / DB_MAX_OVERFLOW              presupuesto de conexiones por worker,
+                                                repartido entre el pool sync y el async
+    DB_ASYNC_POOL_SHARE                         fracción del presupuesto para el pool async
+    DB_ASYNC_POOL_SIZE / DB_ASYNC_MAX_OVERFLOW  parte async explícita (se descuenta del presupuesto)
+    DB_POOL_TIMEOUT_SECONDS                     espera máxima por una conexión
+    DB_POOL_RECYCLE_SECONDS                     reabre conexiones más viejas que esto
+    DB_STATEMENT_TIMEOUT_MS                     statement_timeout de Postgres (0 = sin límite)
+    DB_APPLICATION_NAME                         application_name visible en pg_stat_activity
+
+Los dos pools salen del mismo presupuesto: conexiones máximas por worker =
+DB_POOL_SIZE + DB_MAX_OVERFLOW (cada pool conserva al menos una conexión fija).
+/health/resources reporta la suma como connection_budget junto con las métricas
+de checkout y espera.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+def split_pool_budget(total: int, async_share: float, minimum: int = 0,
+                      async_part: int | None = None) -> tuple[int, int]:
+    """(sync, async) que suman `total`; cada parte recibe al menos `minimum`."""
+    if async_part is None:
+        async_part = round(total * async_share)
+    async_part = max(minimum, async_part)
+    return max(minimum, total - async_part), async_part
+
+
+def _env_int(name: str) -> int | None:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_ASYNC_POOL_SHARE = float(os.getenv("DB_ASYNC_POOL_SHARE", "0.3"))
+# pool_size=0 en QueuePool significa "sin límite": cada pool se queda con al menos 1
+DB_SYNC_POOL_SIZE, DB_ASYNC_POOL_SIZE = split_pool_budget(
+    DB_POOL_SIZE, DB_ASYNC_POOL_SHARE, minimum=1, async_part=_env_int("DB_ASYNC_POOL_SIZE"))
+DB_SYNC_MAX_OVERFLOW, DB_ASYNC_MAX_OVERFLOW = split_pool_budget(
+    DB_MAX_OVERFLOW, DB_ASYNC_POOL_SHARE, async_part=_env_int("DB_ASYNC_MAX_OVERFLOW"))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+DB_APPLICATION_NAME = os.getenv("DB_APPLICATION_NAME", "iso-backend")
+
+# Un checkout que tarda más que esto cuenta como "esperó" (el pool estaba agotado o hubo connect)
+DB_POOL_WAIT_THRESHOLD_MS = float(os.getenv("DB_POOL_WAIT_THRESHOLD_MS", "1"))
+
+
+def server_settings(schema: str) -> dict[str, str]:
+    """Parámetros de sesión que se fijan al abrir cada conexión."""
+    settings = {"search_path": f"{schema},public", "application_name": DB_APPLICATION_NAME}
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        settings["statement_timeout"] = str(DB_STATEMENT_TIMEOUT_MS)
+    return settings
+
+
+def psycopg2_connect_args(schema: str) -> dict:
+    settings = server_settings(schema)
+    application_name = settings.pop("application_name")
+    options = " ".join(f"-c{name}={value}" for name, value in settings.items())
+    return {"options": options, "application_name": application_name}
+
+
+def asyncpg_connect_args(schema: str) -> dict:
+    return {"server_settings": server_settings(schema)}
+
+
+class PoolMetrics:
+
+    def __init__(self, wait_threshold_ms: float = DB_POOL_WAIT_THRESHOLD_MS):
+        self.wait_threshold_ms = wait_threshold_ms
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.waited = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    def record_checkout(self, wait_ms: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_ms_total += wait_ms
+            if wait_ms > self.wait_ms_max:
+                self.wait_ms_max = wait_ms
+            if wait_ms >= self.wait_threshold_ms:
+                self.waited += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def _incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def attach(self, pool) -> None:
+        event.listen(pool, "connect", lambda *_: self._incr("connects"))
+        event.listen(pool, "checkin", lambda *_: self._incr("checkins"))
+        event.listen(pool, "invalidate", lambda *_: self._incr("invalidations"))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "waited": self.waited,
+                "wait_ms_avg": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_ms_max, 3),
+            }
+
+
+class _TimedCheckout:
+    """Mide cuánto tarda cada checkout del pool (espera por una conexión libre + connect)."""
+
+    def __init__(self, *args, **kwargs):
+        # recreate() (engine.dispose) pasa _dispatch con los listeners ya registrados
+        recreated = "_dispatch" in kwargs
+        super().__init__(*args, **kwargs)
+        if not recreated:
+            self.metrics = PoolMetrics()
+            self.metrics.attach(self)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except PoolTimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout((time.perf_counter() - start) * 1000)
+        return conn
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(pool) -> dict:
+    stats = {"class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    max_overflow = getattr(pool, "_max_overflow", None)
+    if max_overflow is not None and "size" in stats:
+        stats["max_connections"] = stats["size"] + max(0, max_overflow)
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        stats.update(metrics.stats())
+    return stats
@@ -0,0 +1,86 @@
+#Archivo Infraestructura/ Bandeja de salida de correos
+"""
+Bandeja de salida (outbox) de notificaciones por correo.
+
+- PostgresEmailOutbox: tabla iso.email_outbox; el correo se encola en la misma
+  transacción que la versión y el worker lo envía después en lotes.
+- LocalEmailOutbox: sustituto en memoria con la misma interfaz (pruebas / local).
+
+Se elige con EMAIL_OUTBOX_BACKEND=postgres|local (por defecto postgres). Las
+notificaciones de una versión se deduplican por (versión, destinatario).
+Reclamo, reintentos y leases vienen de lease_queue.py.
+"""
+from __future__ import annotations
+
+import os
+
+from sqlalchemy.orm import Session
+
+from app.infrastructure.lease_queue import LeaseQueueSpec, LocalLeaseQueue, PostgresLeaseQueue, dedup_key
+
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "6"))
+EMAIL_BACKOFF_SECONDS = float(os.getenv("EMAIL_BACKOFF_SECONDS", "30"))
+EMAIL_LEASE_SECONDS = int(os.getenv("EMAIL_LEASE_SECONDS", "300"))
+
+EMAIL_OUTBOX_SPEC = LeaseQueueSpec(
+    table="email_outbox",
+    id_column="email_id",
+    active_state="sending",
+    done_state="sent",
+    done_at_column="sent_at",
+    max_attempts=EMAIL_MAX_ATTEMPTS,
+    lease_seconds=EMAIL_LEASE_SECONDS,
+    backoff_seconds=EMAIL_BACKOFF_SECONDS,
+    backoff_cap_seconds=6 * 3600,
+)
+
+
+def build_dedup_key(version_id: int | None, to_email: str) -> str | None:
+    if version_id is None:
+        return None
+    return dedup_key(version_id, to_email.strip().lower())
+
+
+class _EmailOutbox:
+
+    def enqueue(self, db: Session | None, *, to_email: str, subject: str, body_text: str,
+                body_html: str | None = None, version_id: int | None = None) -> None:
+        """
+        Encola el correo en la sesión actual (no hace commit). Si ya hay uno para la
+        misma versión y destinatario se ignora, salvo que haya fallado definitivamente.
+        """
+        self._insert(
+            db,
+            {
+                "version_id": version_id,
+                "to_email": to_email,
+                "subject": subject,
+                "body_text": body_text,
+                "body_html": body_html,
+                "dedup_key": build_dedup_key(version_id, to_email),
+            },
+            refresh_columns=("subject", "body_text", "body_html"),
+        )
+
+
+class PostgresEmailOutbox(_EmailOutbox, PostgresLeaseQueue):
+    spec = EMAIL_OUTBOX_SPEC
+
+
+class LocalEmailOutbox(_EmailOutbox, LocalLeaseQueue):
+    """Sustituto en memoria de PostgresEmailOutbox."""
+    spec = EMAIL_OUTBOX_SPEC
+
+    def emails(self) -> list[dict]:
+        return self.items()
+
+
+_outbox = None
+
+
+def get_email_outbox():
+    global _outbox
+    if _outbox is None:
+        backend = os.getenv("EMAIL_OUTBOX_BACKEND", "postgres").lower()
+        _outbox = LocalEmailOutbox() if backend == "local" else PostgresEmailOutbox()
+    return _outbox
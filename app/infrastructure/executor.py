@@ -0,0 +1,85 @@
+#Archivo Infraestructura/ Pool de hilos para trabajo bloqueante
+"""
+Pool acotado de hilos para el trabajo síncrono (SQLAlchemy, GCS) que
+llaman los endpoints async, de modo que no bloquee el event loop.
+
+run_blocking copia el contexto (contextvars) al hilo, así el actor de auditoría
+y demás variables de la petición siguen visibles dentro del servicio. El lifespan
+instala el mismo pool como executor por defecto del loop, con lo que
+asyncio.to_thread (p. ej. las operaciones a* del almacenamiento) queda acotado igual.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+BLOCKING_POOL_SIZE = int(os.getenv("BLOCKING_POOL_SIZE", "16"))
+
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+# Trabajos enviados que no han terminado (en cola + en curso)
+_pending = 0
+_active = 0
+_completed = 0
+
+
+def get_blocking_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=BLOCKING_POOL_SIZE, thread_name_prefix="blocking")
+    return _executor
+
+
+async def run_blocking(func: Callable[..., T], /, *args, **kwargs) -> T:
+    """Ejecuta func en el pool acotado y espera su resultado sin bloquear el loop."""
+    global _pending
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kwargs)
+
+    def tracked():
+        global _active, _completed
+        with _lock:
+            _active += 1
+        try:
+            return call()
+        finally:
+            with _lock:
+                _active -= 1
+                _completed += 1
+
+    def released(_future: Future) -> None:
+        # También corre si el apagado cancela el trabajo antes de que empiece
+        global _pending
+        with _lock:
+            _pending -= 1
+
+    with _lock:
+        _pending += 1
+    try:
+        future = get_blocking_executor().submit(tracked)
+    except RuntimeError:
+        with _lock:
+            _pending -= 1
+        raise
+    future.add_done_callback(released)
+    return await asyncio.wrap_future(future)
+
+
+def blocking_pool_stats() -> dict:
+    with _lock:
+        return {"max_workers": BLOCKING_POOL_SIZE, "active": _active, "queued": _pending - _active, "completed": _completed}
+
+
+def shutdown_blocking_executor() -> None:
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
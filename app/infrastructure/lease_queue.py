@@ -0,0 +1,250 @@
+#Archivo Infraestructura/ Colas con lease
+"""
+Base común de las colas durables de trabajos (iso.stamp_job, iso.email_outbox).
+
+Ciclo de estados de cada elemento:
+
+    pending -> <activo> -> <terminado>
+                        -> pending (reintento con backoff) | failed (intentos agotados)
+
+Un elemento <activo> cuyo lease expiró (worker caído) vuelve a ser reclamable.
+Cada cola describe su tabla, estados y columnas con un LeaseQueueSpec y agrega
+sus propios métodos de encolado; aquí viven el SQL de reclamo y cierre
+(PostgresLeaseQueue) y el sustituto en memoria con el mismo comportamiento
+(LocalLeaseQueue, pruebas / local).
+"""
+from __future__ import annotations
+
+import itertools
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.infrastructure.base import SCHEMA_NAME
+
+
+def retry_delay(attempts: int, base_seconds: float, cap_seconds: float) -> timedelta:
+    """Backoff exponencial: base, 2·base, 4·base... con tope de `cap_seconds`."""
+    seconds = base_seconds * (2 ** max(0, attempts - 1))
+    return timedelta(seconds=min(seconds, cap_seconds))
+
+
+def dedup_key(*parts) -> str:
+    return ":".join("" if part is None else str(part) for part in parts)
+
+
+@dataclass(frozen=True)
+class LeaseQueueSpec:
+    table: str
+    id_column: str
+    active_state: str
+    done_state: str
+    # Marca de tiempo que se llena al terminar (y al fallar definitivamente si finish_on_final_failure)
+    done_at_column: str
+    max_attempts: int
+    lease_seconds: int
+    backoff_seconds: float
+    backoff_cap_seconds: float
+    finish_on_final_failure: bool = False
+    # Estados en los que volver a encolar la misma clave reactiva el elemento
+    reactivate_states: tuple[str, ...] = ("failed",)
+
+    def retry_delay(self, attempts: int) -> timedelta:
+        return retry_delay(attempts, self.backoff_seconds, self.backoff_cap_seconds)
+
+    @property
+    def open_states(self) -> tuple[str, str]:
+        return "pending", self.active_state
+
+
+class PostgresLeaseQueue:
+    spec: LeaseQueueSpec
+    # Condición adicional sobre el candidato `c` al reclamar (p. ej. orden por versión)
+    claim_condition: str = ""
+
+    @property
+    def _table(self) -> str:
+        return f"{SCHEMA_NAME}.{self.spec.table}"
+
+    def _insert(self, db: Session, values: dict, refresh_columns: tuple[str, ...] = ()) -> None:
+        """
+        Inserta en la sesión actual (no hace commit). Si ya existe un elemento con la
+        misma dedup_key se ignora, salvo que esté en spec.reactivate_states: entonces
+        vuelve a 'pending' con las columnas de `refresh_columns` actualizadas.
+        """
+        spec = self.spec
+        values = {**values, "max_attempts": spec.max_attempts}
+        columns = ", ".join(values)
+        params = ", ".join(f":{c}" for c in values)
+        updates = "".join(f", {c} = EXCLUDED.{c}" for c in refresh_columns)
+        updates += f", {spec.done_at_column} = NULL"
+        states = ", ".join(f"'{s}'" for s in spec.reactivate_states)
+        db.execute(
+            text(f"""
+                INSERT INTO {self._table} ({columns})
+                VALUES ({params})
+                ON CONFLICT (dedup_key) DO UPDATE
+                   SET state = 'pending', attempts = 0, last_error = NULL, run_after = now(),
+                       locked_until = NULL, updated_at = now(){updates}
+                 WHERE {self._table}.state IN ({states})
+            """),
+            values,
+        )
+
+    def claim_batch(self, db: Session, limit: int) -> list[dict]:
+        """Reclama hasta `limit` elementos listos, en orden de id, y hace commit."""
+        spec = self.spec
+        rows = db.execute(
+            text(f"""
+                UPDATE {self._table} AS q
+                   SET state = :active, attempts = q.attempts + 1, updated_at = now(),
+                       locked_until = now() + make_interval(secs => :lease)
+                 WHERE q.{spec.id_column} IN (
+                       SELECT c.{spec.id_column}
+                         FROM {self._table} AS c
+                        WHERE ((c.state = 'pending' AND c.run_after <= now())
+                               OR (c.state = :active AND c.locked_until < now())){self.claim_condition}
+                        ORDER BY c.{spec.id_column}
+                        LIMIT :limit
+                          FOR UPDATE SKIP LOCKED)
+                RETURNING q.*
+            """),
+            {"active": spec.active_state, "lease": spec.lease_seconds, "limit": limit},
+        ).mappings().all()
+        db.commit()
+        return sorted((dict(r) for r in rows), key=lambda r: r[spec.id_column])
+
+    def mark_done(self, db: Session, item_id: int) -> None:
+        spec = self.spec
+        db.execute(
+            text(f"""
+                UPDATE {self._table}
+                   SET state = :done, last_error = NULL, locked_until = NULL,
+                       updated_at = now(), {spec.done_at_column} = now()
+                 WHERE {spec.id_column} = :id
+            """),
+            {"done": spec.done_state, "id": item_id},
+        )
+        db.commit()
+
+    def mark_failed(self, db: Session, item: dict, error: str) -> None:
+        """Reprograma con backoff o marca 'failed' si se agotaron los intentos."""
+        spec = self.spec
+        final = item["attempts"] >= item["max_attempts"]
+        finished = f", {spec.done_at_column} = CASE WHEN :final THEN now() END" if spec.finish_on_final_failure else ""
+        db.execute(
+            text(f"""
+                UPDATE {self._table}
+                   SET state = :state, last_error = :error, locked_until = NULL,
+                       run_after = now() + make_interval(secs => :delay), updated_at = now(){finished}
+                 WHERE {spec.id_column} = :id
+            """),
+            {
+                "state": "failed" if final else "pending",
+                "error": error[:2000],
+                "delay": spec.retry_delay(item["attempts"]).total_seconds(),
+                "final": final,
+                "id": item[spec.id_column],
+            },
+        )
+        db.commit()
+
+    def depth(self, db: Session) -> int:
+        return db.execute(
+            text(f"SELECT count(*) FROM {self._table} WHERE state IN (:pending, :active)"),
+            {"pending": "pending", "active": self.spec.active_state},
+        ).scalar() or 0
+
+
+class LocalLeaseQueue:
+    """
+    Sustituto en memoria de PostgresLeaseQueue (misma interfaz, mismo ciclo de estados).
+    El parámetro db se acepta por compatibilidad y no se usa.
+    """
+    spec: LeaseQueueSpec
+
+    def __init__(self):
+        self._items: dict[int, dict] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _insert(self, db: Session | None, values: dict, refresh_columns: tuple[str, ...] = ()) -> None:
+        spec = self.spec
+        key = values["dedup_key"]
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            existing = key is not None and next((i for i in self._items.values() if i["dedup_key"] == key), None)
+            if existing:
+                if existing["state"] in spec.reactivate_states:
+                    existing.update(state="pending", attempts=0, last_error=None, run_after=now,
+                                    locked_until=None, updated_at=now,
+                                    **{c: values[c] for c in refresh_columns}, **{spec.done_at_column: None})
+                return
+            item_id = next(self._ids)
+            self._items[item_id] = {
+                spec.id_column: item_id,
+                **values,
+                "state": "pending",
+                "attempts": 0,
+                "max_attempts": spec.max_attempts,
+                "last_error": None,
+                "run_after": now,
+                "locked_until": None,
+                "created_at": now,
+                "updated_at": now,
+                spec.done_at_column: None,
+            }
+
+    def _blocked(self, item: dict) -> bool:
+        """Equivalente de claim_condition; se llama con el lock tomado."""
+        return False
+
+    def claim_batch(self, db: Session | None, limit: int) -> list[dict]:
+        spec = self.spec
+        now = datetime.now(timezone.utc)
+        claimed = []
+        with self._lock:
+            for item in sorted(self._items.values(), key=lambda i: i[spec.id_column]):
+                if len(claimed) >= limit:
+                    break
+                ready = ((item["state"] == "pending" and item["run_after"] <= now)
+                         or (item["state"] == spec.active_state and item["locked_until"] < now))
+                if not ready or self._blocked(item):
+                    continue
+                item.update(state=spec.active_state, attempts=item["attempts"] + 1, updated_at=now,
+                            locked_until=now + timedelta(seconds=spec.lease_seconds))
+                claimed.append(dict(item))
+        return claimed
+
+    def mark_done(self, db: Session | None, item_id: int) -> None:
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            self._items[item_id].update({"state": self.spec.done_state, "last_error": None, "locked_until": None,
+                                         "updated_at": now, self.spec.done_at_column: now})
+
+    def mark_failed(self, db: Session | None, item: dict, error: str) -> None:
+        spec = self.spec
+        now = datetime.now(timezone.utc)
+        final = item["attempts"] >= item["max_attempts"]
+        changes = {
+            "state": "failed" if final else "pending",
+            "last_error": error[:2000],
+            "locked_until": None,
+            "run_after": now + spec.retry_delay(item["attempts"]),
+            "updated_at": now,
+        }
+        if spec.finish_on_final_failure:
+            changes[spec.done_at_column] = now if final else None
+        with self._lock:
+            self._items[item[spec.id_column]].update(changes)
+
+    def items(self) -> list[dict]:
+        with self._lock:
+            return [dict(i) for i in sorted(self._items.values(), key=lambda i: i[self.spec.id_column])]
+
+    def depth(self, db: Session | None) -> int:
+        with self._lock:
+            return sum(1 for i in self._items.values() if i["state"] in self.spec.open_states)
@@ -0,0 +1,138 @@
+#Archivo Infraestructura/ Monitor de bloqueo del event loop
+"""
+Mide cuánto se retrasa el event loop: una tarea duerme LOOP_LAG_INTERVAL_SECONDS
+y compara contra lo que realmente tardó en despertar. El retraso se atribuye a
+las rutas que estaban en curso durante esa ventana (la culpable está entre
+ellas), acumulando por ruta el tiempo bloqueado, el máximo y los eventos.
+
+LoopLagMiddleware registra las peticiones en curso; el reporte se consulta en
+/health/loop y los bloqueos de más de LOOP_LAG_WARN_MS se registran en el log.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_MONITOR = os.getenv("LOOP_LAG_MONITOR", "1").lower() in ("1", "true", "yes")
+LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("LOOP_LAG_INTERVAL_SECONDS", "0.1"))
+LOOP_LAG_THRESHOLD_MS = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "20"))
+LOOP_LAG_WARN_MS = float(os.getenv("LOOP_LAG_WARN_MS", "200"))
+
+_IDLE_ROUTE = "<sin petición>"
+
+
+def route_template(scope: dict) -> str | None:
+    """Plantilla de la ruta resuelta (/risks/generales/{riesgo_id}) o None si no hubo match."""
+    path = getattr(scope.get("route"), "path", None)
+    if path is None:
+        return None
+    # Los routers incluidos conservan su path sin prefijo; el prefijo viaja en el include
+    included = (scope.get("fastapi") or {}).get("included_router")
+    prefix = getattr(getattr(included, "include_context", None), "prefix", "") or ""
+    return prefix + path
+
+
+def route_key(scope: dict) -> str:
+    path = route_template(scope) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}".strip()
+
+
+class LoopLagMonitor:
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL_SECONDS, threshold_ms: float = LOOP_LAG_THRESHOLD_MS,
+                 warn_ms: float = LOOP_LAG_WARN_MS):
+        self.interval = interval
+        self.threshold_ms = threshold_ms
+        self.warn_ms = warn_ms
+        self._in_flight: dict[int, dict] = {}
+        # (instante de fin, ruta) de peticiones recientes: una petición que bloqueó y
+        # terminó antes de que el monitor despertara también debe recibir la culpa
+        self._recent: deque[tuple[float, str]] = deque(maxlen=1024)
+        self._routes: dict[str, dict] = {}
+        self._task: asyncio.Task | None = None
+        self.samples = 0
+        self.max_lag_ms = 0.0
+        self.blocked_ms = 0.0
+
+    # ---------- Peticiones en curso ----------
+    def request_started(self, scope: dict) -> None:
+        self._in_flight[id(scope)] = scope
+
+    def request_finished(self, scope: dict) -> None:
+        self._in_flight.pop(id(scope), None)
+        self._recent.append((time.perf_counter(), route_key(scope)))
+
+    # ---------- Medición ----------
+    def record(self, lag_ms: float, window_start: float) -> None:
+        self.samples += 1
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        if lag_ms < self.threshold_ms:
+            return
+        self.blocked_ms += lag_ms
+        routes = {route_key(scope) for scope in self._in_flight.values()}
+        routes.update(route for finished_at, route in self._recent if finished_at >= window_start)
+        for route in routes or {_IDLE_ROUTE}:
+            entry = self._routes.setdefault(route, {"events": 0, "blocked_ms": 0.0, "max_ms": 0.0})
+            entry["events"] += 1
+            entry["blocked_ms"] += lag_ms
+            entry["max_ms"] = max(entry["max_ms"], lag_ms)
+        if lag_ms >= self.warn_ms:
+            logger.warning("Event loop bloqueado %.1f ms; rutas en curso: %s", lag_ms, ", ".join(sorted(routes)) or _IDLE_ROUTE)
+
+    async def run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag_ms = (time.perf_counter() - start - self.interval) * 1000
+            self.record(max(lag_ms, 0.0), start)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run(), name="loop-lag-monitor")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        routes = sorted(self._routes.items(), key=lambda item: item[1]["blocked_ms"], reverse=True)
+        return {
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold_ms,
+            "samples": self.samples,
+            "max_lag_ms": round(self.max_lag_ms, 2),
+            "blocked_ms": round(self.blocked_ms, 2),
+            "in_flight": len(self._in_flight),
+            "routes": {
+                route: {"events": e["events"], "blocked_ms": round(e["blocked_ms"], 2), "max_ms": round(e["max_ms"], 2)}
+                for route, e in routes
+            },
+        }
+
+
+loop_monitor = LoopLagMonitor()
+
+
+class LoopLagMiddleware:
+    """Middleware ASGI que informa al monitor qué peticiones están en curso."""
+
+    def __init__(self, app, monitor: LoopLagMonitor = loop_monitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        self.monitor.request_started(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.request_finished(scope)
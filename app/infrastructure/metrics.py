@@ -0,0 +1,263 @@
+#Archivo Infraestructura/ Métricas (formato Prometheus)
+"""
+Métricas del proceso en formato de texto de Prometheus (prometheus_client), servidas en /metrics.
+
+MetricsMiddleware registra por petición:
+- iso_http_requests_total{module,method,route,status}
+- iso_http_request_duration_seconds{module,method,route} (histograma)
+- iso_http_requests_in_progress{module,method}
+- iso_http_request_size_bytes / iso_http_response_size_bytes{module} (histogramas)
+- iso_http_request_db_seconds / iso_http_request_db_queries{module} (de query_stats)
+
+`route` es la plantilla de la ruta (/documents/{document_id}), no el path, y
+`module` agrupa las rutas por módulo ISO (documents, risks, treatments,
+assets, ...) para ver cuál arrastra la latencia de cola. Al momento del
+scrape ResourceCollector agrega el estado de los pools de BD, el threadpool
+de bloqueo, el pool de bcrypt y la profundidad de las colas de estampado y
+correo (ésta se consulta con statement_timeout y se cachea unos segundos).
+
+Si el tracing está activo (tracing.py) cada petición abre también un span.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Iterable
+
+from dotenv import load_dotenv
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from sqlalchemy import text
+
+from app.infrastructure import tracing
+from app.infrastructure.loop_monitor import route_template
+from app.infrastructure.query_stats import current_query_stats
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+# Cuánto se reutiliza la profundidad de las colas entre scrapes y cuánto puede tardar la consulta
+METRICS_QUEUE_DEPTH_CACHE_SECONDS = float(os.getenv("METRICS_QUEUE_DEPTH_CACHE_SECONDS", "15"))
+METRICS_QUEUE_DEPTH_TIMEOUT_MS = int(os.getenv("METRICS_QUEUE_DEPTH_TIMEOUT_MS", "500"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+# Primer segmento del path -> módulo
+MODULES = {
+    "documents": "documents", "documentos": "documents",
+    "risks": "risks", "riesgos": "risks",
+    "treatments": "treatments", "tratamientos": "treatments",
+    "assets": "assets",
+    "catalogo": "catalogs",
+    "auth": "auth", "users": "auth",
+    "admin": "admin",
+    "reports": "reports",
+    "health": "health", "metrics": "health",
+}
+
+
+def module_of(path: str) -> str:
+    segment = path.lstrip("/").split("/", 1)[0]
+    return MODULES.get(segment, "other")
+
+
+registry = CollectorRegistry()
+
+REQUESTS = Counter("iso_http_requests_total", "Peticiones HTTP atendidas",
+                   ("module", "method", "route", "status"), registry=registry)
+LATENCY = Histogram("iso_http_request_duration_seconds", "Latencia de las peticiones HTTP",
+                    ("module", "method", "route"), buckets=LATENCY_BUCKETS, registry=registry)
+IN_PROGRESS = Gauge("iso_http_requests_in_progress", "Peticiones HTTP en curso", ("module", "method"),
+                    registry=registry)
+REQUEST_SIZE = Histogram("iso_http_request_size_bytes", "Tamaño del cuerpo de las peticiones",
+                         ("module",), buckets=SIZE_BUCKETS, registry=registry)
+RESPONSE_SIZE = Histogram("iso_http_response_size_bytes", "Tamaño del cuerpo de las respuestas",
+                          ("module",), buckets=SIZE_BUCKETS, registry=registry)
+DB_TIME = Histogram("iso_http_request_db_seconds", "Tiempo en BD por petición", ("module",),
+                    buckets=LATENCY_BUCKETS, registry=registry)
+DB_QUERIES = Histogram("iso_http_request_db_queries", "Consultas SQL por petición", ("module",),
+                       buckets=QUERY_BUCKETS, registry=registry)
+
+
+def render() -> bytes:
+    return generate_latest(registry)
+
+
+def _route_label(scope: dict) -> str:
+    # Sin ruta (404) no se usa el path para no disparar la cardinalidad
+    return route_template(scope) or "<sin ruta>"
+
+
+def _content_length(scope: dict) -> int:
+    for name, value in scope.get("headers") or ():
+        if name == b"content-length" and value.isdigit():
+            return int(value)
+    return 0
+
+
+class MetricsMiddleware:
+    """Middleware ASGI de métricas (y span de tracing, si está activo)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope.get("method", "")
+        module = module_of(scope.get("path", ""))
+        status = 500
+        response_bytes = 0
+
+        async def send_with_metrics(message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = IN_PROGRESS.labels(module, method)
+        in_progress.inc()
+        start = time.perf_counter()
+        span = tracing.start_request_span(scope)
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            route = _route_label(scope)
+            REQUESTS.labels(module, method, route, str(status)).inc()
+            LATENCY.labels(module, method, route).observe(elapsed)
+            REQUEST_SIZE.labels(module).observe(_content_length(scope))
+            RESPONSE_SIZE.labels(module).observe(response_bytes)
+            stats = current_query_stats()
+            if stats is not None:
+                DB_TIME.labels(module).observe(stats.total_ms / 1000)
+                DB_QUERIES.labels(module).observe(stats.count)
+            tracing.end_request_span(span, scope, module=module, route=route, status=status, db_stats=stats)
+
+
+# ---------- Collectors (al momento del scrape) ----------
+def _db_pool_families() -> list[Metric]:
+    from app.infrastructure.resources import db_pool_stats
+
+    pools = db_pool_stats()
+    gauges = {
+        key: GaugeMetricFamily(f"iso_db_pool_{name}", help_text, labels=("pool",))
+        for key, name, help_text in (
+            ("size", "size", "Tamaño configurado del pool"),
+            ("max_connections", "max_connections", "Conexiones máximas (size + overflow)"),
+            ("checkedout", "checked_out", "Conexiones prestadas"),
+            ("checkedin", "checked_in", "Conexiones libres en el pool"),
+            ("wait_ms_max", "wait_ms_max", "Mayor espera por una conexión (ms)"),
+        )
+    }
+    counters = {
+        key: CounterMetricFamily(f"iso_db_pool_{key}", help_text, labels=("pool",))
+        for key, help_text in (
+            ("checkouts", "Checkouts del pool"),
+            ("connects", "Conexiones físicas abiertas"),
+            ("timeouts", "Checkouts que agotaron pool_timeout"),
+            ("waited", "Checkouts que tuvieron que esperar"),
+        )
+    }
+    for pool_name in ("sync", "async"):
+        stats = pools[pool_name]
+        for key, family in (*gauges.items(), *counters.items()):
+            if key in stats:
+                family.add_metric((pool_name,), stats[key])
+    return [*gauges.values(), *counters.values()]
+
+
+def _stat_gauge(name: str, help_text: str, stats: dict) -> GaugeMetricFamily:
+    family = GaugeMetricFamily(name, help_text, labels=("stat",))
+    for key, value in stats.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            family.add_metric((key,), value)
+    return family
+
+
+def _blocking_pool_families() -> list[Metric]:
+    from app.infrastructure.executor import blocking_pool_stats
+
+    return [_stat_gauge("iso_blocking_pool", "Estado del threadpool de trabajo bloqueante", blocking_pool_stats())]
+
+
+def _password_pool_families() -> list[Metric]:
+    from app.infrastructure.password_hasher import password_hasher
+
+    return [_stat_gauge("iso_password_pool", "Estado del pool de bcrypt (login y cambios de contraseña)",
+                        password_hasher.stats())]
+
+
+def _audit_sink_families() -> list[Metric]:
+    from app.infrastructure.audit_sink import audit_sink
+
+    return [_stat_gauge("iso_audit_sink", "Buffer de auditoría diferida (AUDIT_SINK=async)", audit_sink.stats())]
+
+
+_queue_depth_lock = threading.Lock()
+_queue_depth_cache: tuple[float, dict[str, int]] | None = None
+
+
+def _read_queue_depths() -> dict[str, int]:
+    from app.infrastructure.db import SessionLocal
+    from app.infrastructure.email_outbox import get_email_outbox
+    from app.infrastructure.stamp_queue import get_stamp_queue
+
+    db = SessionLocal()
+    try:
+        # Un scrape no debe quedarse esperando a una BD lenta ni bloquear la tabla de la cola
+        db.execute(text(f"SET LOCAL statement_timeout = {int(METRICS_QUEUE_DEPTH_TIMEOUT_MS)}"))
+        return {"stamp": get_stamp_queue().depth(db), "email": get_email_outbox().depth(db)}
+    finally:
+        db.rollback()
+        db.close()
+
+
+def queue_depths() -> dict[str, int]:
+    """Profundidad de las colas, cacheada METRICS_QUEUE_DEPTH_CACHE_SECONDS entre scrapes."""
+    global _queue_depth_cache
+    with _queue_depth_lock:
+        now = time.monotonic()
+        if _queue_depth_cache is not None and now - _queue_depth_cache[0] < METRICS_QUEUE_DEPTH_CACHE_SECONDS:
+            return _queue_depth_cache[1]
+        depths = _read_queue_depths()
+        _queue_depth_cache = (now, depths)
+        return depths
+
+
+def _queue_depth_families() -> list[Metric]:
+    family = GaugeMetricFamily("iso_queue_depth", "Trabajos pendientes o en curso por cola", labels=("queue",))
+    for queue, depth in queue_depths().items():
+        family.add_metric((queue,), depth)
+    return [family]
+
+
+class ResourceCollector:
+    """Collector de prometheus_client; un fallo en una fuente no tumba el resto del scrape."""
+
+    sources = (_db_pool_families, _blocking_pool_families, _password_pool_families,
+               _audit_sink_families, _queue_depth_families)
+
+    def describe(self) -> Iterable[Metric]:
+        # Sin describe() el registro llamaría a collect() (y a la BD) al registrarse
+        return []
+
+    def collect(self) -> Iterable[Metric]:
+        for source in self.sources:
+            try:
+                yield from source()
+            except Exception:
+                logger.exception("Error en collector de métricas %s", source.__name__)
+
+
+registry.register(ResourceCollector())
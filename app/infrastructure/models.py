@@ -3,8 +3,10 @@ from __future__ import annotations
 from datetime import datetime, date
 from sqlalchemy import (
     BigInteger, Boolean, Column, Date, ForeignKey,
-    Numeric, Text,DateTime,Integer,Index, text, String, JSON, Table
+    Numeric, Text,DateTime,Integer,Index, text, String, JSON, Table, Identity,
+    LargeBinary
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .base import Base, SCHEMA_NAME
@@ -86,7 +88,11 @@ class ComentarioRevision(Base):
 
 class Documento(Base):
     __tablename__ = "documento"
-    __table_args__ = {"schema": SCHEMA_NAME}
+    __table_args__ = (
+        # Listado paginado por empresa en orden de documento_id (keyset de GET /documents/page)
+        Index("ix_documento_empresa_documento", "empresa_id", "documento_id"),
+        {"schema": SCHEMA_NAME},
+    )
     documento_id = Column(BigInteger, primary_key=True, autoincrement=True)
     empresa_id = Column(BigInteger, ForeignKey(f"{SCHEMA_NAME}.empresa.empresa_id"), nullable=False)
     nombre = Column(Text, nullable=False)
@@ -114,7 +120,11 @@ class DocumentoACL(Base):
 
 class DocumentoVersion(Base):
     __tablename__ = "documento_version"
-    __table_args__ = {"schema": SCHEMA_NAME}
+    __table_args__ = (
+        # Última versión de cada documento (LATERAL ... ORDER BY numero_version DESC LIMIT 1)
+        Index("ix_documento_version_documento_numero", "documento_id", "numero_version"),
+        {"schema": SCHEMA_NAME},
+    )
     version_id = Column(BigInteger, primary_key=True, autoincrement=True)
     documento_id = Column(BigInteger, ForeignKey(f"{SCHEMA_NAME}.documento.documento_id", ondelete="CASCADE"), nullable=False)
     numero_version = Column(Integer, nullable=False)
@@ -122,6 +132,8 @@ class DocumentoVersion(Base):
     justificacion = Column(Text)
     estado_item_id = Column(BigInteger, ForeignKey(f"{SCHEMA_NAME}.catalog_item.item_id"), nullable=False)
     archivo_url = Column(Text)
+    archivo_sha256 = Column(String(64))
+    archivo_bytes = Column(BigInteger)
     creado_por_id = Column(BigInteger, ForeignKey(f"{SCHEMA_NAME}.usuario.usuario_id"), nullable=True)
     creado_en = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     aprobado_por_id = Column(BigInteger, ForeignKey(f"{SCHEMA_NAME}.usuario.usuario_id"), nullable=True)
@@ -237,16 +249,117 @@ class Areas(Base):
     deleted_at = Column(DateTime(timezone=True))
     usuarios = relationship("Usuario", back_populates="area")
 
+# jsonb en PostgreSQL; JSON simple en otros motores (pruebas con sqlite)
+_AuditJSON = JSON().with_variant(JSONB(), "postgresql")
+
+
 class AuditLog(Base):
+    """
+    Particionada por mes sobre created_at (RANGE), ver la migración
+    c4f8a2d6e1b5 y app/infrastructure/audit_partitions.py. En PostgreSQL la PK
+    real es (id, created_at), porque toda PK de una tabla particionada incluye
+    la clave de partición; para el ORM basta id, que sale de una identidad única.
+    """
     __tablename__ = "audit_log"
-    __table_args__ = {"schema": SCHEMA_NAME}
+    __table_args__ = (
+        Index("ix_audit_log_created_brin", "created_at", postgresql_using="brin"),
+        # Orden (created_at, id) de la paginación keyset de /audit, general y por tabla
+        Index("ix_audit_log_created_id", "created_at", "id"),
+        Index("ix_audit_log_table_created_id", "table_name", "created_at", "id"),
+        Index("ix_audit_log_table_pk_created", "table_name", "target_pk_id", "created_at"),
+        Index("ix_audit_log_actor_created", "actor", "created_at"),
+        {"schema": SCHEMA_NAME, "postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), Identity(), primary_key=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     table_name = Column(String(128), nullable=False)
     operation = Column(String(16), nullable=False)
-    target_pk_id = Column(Integer, nullable=True, index=True)
-    target_pk = Column(JSON, nullable=False)
+    target_pk_id = Column(BigInteger, nullable=True)
+    target_pk = Column(_AuditJSON, nullable=False)
     actor = Column(String(128), nullable=True)
-    before = Column(JSON, nullable=True)
-    after = Column(JSON, nullable=True)
+    before = Column(_AuditJSON, nullable=True)
+    after = Column(_AuditJSON, nullable=True)
+
+
+class AuditBlob(Base):
+    """Textos grandes de la auditoría, guardados una sola vez por hash (ver audit_blobs.py)."""
+    __tablename__ = "audit_blob"
+    __table_args__ = {"schema": SCHEMA_NAME}
+
+    hash = Column(String(64), primary_key=True)  # sha256 hex del texto original
+    encoding = Column(String(8), nullable=False)  # raw | zlib | zstd
+    size = Column(Integer, nullable=False)  # bytes del texto sin comprimir
+    content = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class AuditOutbox(Base):
+    """Registros de auditoría de un flush pendientes de pasar a audit_log (AUDIT_SINK=async)."""
+    __tablename__ = "audit_outbox"
+    __table_args__ = (
+        Index("ix_audit_outbox_created", "created_at"),
+        {"schema": SCHEMA_NAME},
+    )
+
+    outbox_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    records = Column(JSON, nullable=False)
+
+
+class StampJob(Base):
+    """Trabajo pendiente de estampado (firma/estado) sobre el PDF de una versión."""
+    __tablename__ = "stamp_job"
+    __table_args__ = (
+        Index("ix_stamp_job_claim", "state", "run_after"),
+        Index("ix_stamp_job_version", "version_id", "job_id"),
+        {"schema": SCHEMA_NAME},
+    )
+
+    job_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    version_id = Column(BigInteger, ForeignKey(f"{SCHEMA_NAME}.documento_version.version_id", ondelete="CASCADE"), nullable=False)
+    archivo_url = Column(Text, nullable=False)
+    status_item_id = Column(BigInteger, nullable=False)
+    signer_name = Column(Text)
+    fecha = Column(DateTime(timezone=True))
+    nombre_documento = Column(Text)
+    # Evita encolar dos veces el mismo estampado (version:estado:firmante[:cambio])
+    dedup_key = Column(Text, nullable=False, unique=True)
+    state = Column(String(16), nullable=False, server_default="pending")  # pending | running | done | failed
+    attempts = Column(Integer, nullable=False, server_default="0")
+    max_attempts = Column(Integer, nullable=False, server_default="5")
+    last_error = Column(Text)
+    # Generación del blob antes de estampar: permite detectar un intento previo que ya subió el PDF
+    source_generation = Column(BigInteger)
+    run_after = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_until = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    finished_at = Column(DateTime(timezone=True))
+
+
+class EmailOutbox(Base):
+    """Correo pendiente de envío; lo despacha el worker de correo en lotes."""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_claim", "state", "run_after"),
+        {"schema": SCHEMA_NAME},
+    )
+
+    email_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    version_id = Column(BigInteger, ForeignKey(f"{SCHEMA_NAME}.documento_version.version_id", ondelete="CASCADE"))
+    to_email = Column(Text, nullable=False)
+    subject = Column(Text, nullable=False)
+    body_text = Column(Text, nullable=False)
+    body_html = Column(Text)
+    # Una notificación por (versión, destinatario); NULL para correos sin versión
+    dedup_key = Column(Text, unique=True)
+    state = Column(String(16), nullable=False, server_default="pending")  # pending | sending | sent | failed
+    attempts = Column(Integer, nullable=False, server_default="0")
+    max_attempts = Column(Integer, nullable=False, server_default="6")
+    last_error = Column(Text)
+    run_after = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_until = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    sent_at = Column(DateTime(timezone=True))
@@ -0,0 +1,149 @@
+#Archivo Infraestructura/ Pool de hash de contraseñas
+"""
+Pool dedicado y acotado para bcrypt (hash y verificación de contraseñas).
+
+Cada hash cuesta cientos de ms de CPU. Antes corría en el pool general de
+run_blocking, así que una ráfaga de logins al inicio de turno ocupaba los hilos
+que usan los endpoints de BD. Aquí bcrypt tiene sus propios PASSWORD_POOL_SIZE
+hilos (la librería suelta el GIL mientras calcula, no hace falta un pool de
+procesos) y a lo más PASSWORD_POOL_MAX_QUEUE trabajos esperando. Si la cola se
+llena, se lanza PasswordPoolSaturated y el servicio responde 429 con Retry-After
+en lugar de encolar sin límite.
+
+El costo se fija con BCRYPT_ROUNDS. Un hash guardado con otro costo sigue
+validando, y verify_and_update devuelve el hash nuevo para que el login lo
+guarde (rehash transparente).
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from passlib.context import CryptContext
+
+T = TypeVar("T")
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_POOL_SIZE = int(os.getenv("PASSWORD_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+PASSWORD_POOL_MAX_QUEUE = int(os.getenv("PASSWORD_POOL_MAX_QUEUE", "32"))
+PASSWORD_POOL_RETRY_AFTER_SECONDS = int(os.getenv("PASSWORD_POOL_RETRY_AFTER_SECONDS", "2"))
+
+
+def build_context(rounds: int = BCRYPT_ROUNDS) -> CryptContext:
+    # min = max = default: cualquier hash con otro costo queda marcado para rehash
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__default_rounds=rounds,
+                        bcrypt__min_rounds=rounds, bcrypt__max_rounds=rounds)
+
+
+class PasswordPoolSaturated(Exception):
+
+    def __init__(self, retry_after: int = PASSWORD_POOL_RETRY_AFTER_SECONDS):
+        super().__init__("Pool de contraseñas saturado")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+
+    def __init__(self, rounds: int = BCRYPT_ROUNDS, pool_size: int = PASSWORD_POOL_SIZE,
+                 max_queue: int = PASSWORD_POOL_MAX_QUEUE):
+        self.rounds = rounds
+        self.context = build_context(rounds)
+        self.pool_size = pool_size
+        self.max_queue = max_queue
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        # Trabajos enviados que no han terminado (en cola + en curso)
+        self._pending = 0
+        self._active = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self._busy_ms_total = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="bcrypt")
+            return self._executor
+
+    def _submit(self, func: Callable[..., T], *args) -> Future:
+        with self._lock:
+            if self._pending >= self.pool_size + self.max_queue:
+                self.rejected += 1
+                raise PasswordPoolSaturated()
+            self._pending += 1
+
+        def tracked():
+            with self._lock:
+                self._active += 1
+            start = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self.completed += 1
+                    self._busy_ms_total += (time.perf_counter() - start) * 1000
+
+        def released(_future: Future) -> None:
+            # También corre si shutdown cancela el trabajo antes de que empiece
+            with self._lock:
+                self._pending -= 1
+
+        try:
+            future = self._get_executor().submit(tracked)
+        except RuntimeError:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(released)
+        return future
+
+    def _verify_and_update(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        valid, new_hash = self.context.verify_and_update(password, hashed)
+        if new_hash:
+            with self._lock:
+                self.rehashed += 1
+        return valid, new_hash
+
+    # ---------- Desde código síncrono (ya corre fuera del event loop) ----------
+    def hash(self, password: str) -> str:
+        return self._submit(self.context.hash, password).result()
+
+    def verify_and_update(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        """(válida, hash nuevo si el guardado usa otro costo; None si no hay que actualizarlo)."""
+        return self._submit(self._verify_and_update, password, hashed).result()
+
+    # ---------- Desde endpoints async ----------
+    async def ahash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(self.context.hash, password))
+
+    async def averify_and_update(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        return await asyncio.wrap_future(self._submit(self._verify_and_update, password, hashed))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rounds": self.rounds,
+                "max_workers": self.pool_size,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queued": self._pending - self._active,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+                "busy_ms_avg": round(self._busy_ms_total / self.completed, 1) if self.completed else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,203 @@
+#Archivo Infraestructura/ Tiempos de BD por petición
+"""
+Cuenta y cronometra las consultas SQL de cada petición (o trabajo de un worker)
+con los hooks before/after_cursor_execute de los engines de db.py.
+
+- DbTimingMiddleware abre las estadísticas de la petición y las devuelve en el
+  header Server-Timing:  db;dur=12.4;desc="7 queries", db-slowest;dur=5.1
+- Toda consulta de más de DB_SLOW_QUERY_MS se registra en el logger
+  "app.db.slow" como una línea JSON con ruta y empresa_id.
+- Una petición con DB_REQUEST_QUERY_WARN consultas o más (o DB_REQUEST_DB_WARN_MS
+  de BD) se registra en "app.db.requests" con la sentencia más repetida, que
+  es donde asoma un N+1.
+
+Los workers usan track_queries(nombre) para obtener lo mismo por trabajo.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from app.infrastructure.loop_monitor import route_key
+
+slow_logger = logging.getLogger("app.db.slow")
+request_logger = logging.getLogger("app.db.requests")
+
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+DB_REQUEST_QUERY_WARN = int(os.getenv("DB_REQUEST_QUERY_WARN", "50"))
+DB_REQUEST_DB_WARN_MS = float(os.getenv("DB_REQUEST_DB_WARN_MS", "1000"))
+DB_SERVER_TIMING = os.getenv("DB_SERVER_TIMING", "1").lower() in ("1", "true", "yes")
+
+_MAX_STATEMENT_CHARS = 1000
+_MAX_DISTINCT_STATEMENTS = 200
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _compact(statement: str) -> str:
+    return _WHITESPACE.sub(" ", statement).strip()[:_MAX_STATEMENT_CHARS]
+
+
+class QueryStats:
+    """Consultas de una petición o de un trabajo de worker."""
+
+    def __init__(self, route: str | None = None, empresa_id: int | None = None, scope: dict | None = None):
+        self._route = route
+        # En una petición la ruta se resuelve al leerla: el router la fija después del middleware
+        self._scope = scope
+        self.empresa_id = empresa_id
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement: str | None = None
+        self._statements: dict[str, int] = {}
+        # Las dependencias sync corren en el threadpool con la misma instancia
+        self._lock = threading.Lock()
+
+    @property
+    def route(self) -> str | None:
+        return route_key(self._scope) if self._scope is not None else self._route
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            if elapsed_ms > self.slowest_ms:
+                self.slowest_ms = elapsed_ms
+                self.slowest_statement = statement
+            if statement in self._statements or len(self._statements) < _MAX_DISTINCT_STATEMENTS:
+                self._statements[statement] = self._statements.get(statement, 0) + 1
+
+    def most_repeated(self) -> tuple[int, str | None]:
+        with self._lock:
+            if not self._statements:
+                return 0, None
+            statement, count = max(self._statements.items(), key=lambda item: item[1])
+            return count, statement
+
+    def server_timing(self) -> str:
+        return (f'db;dur={self.total_ms:.1f};desc="{self.count} queries", '
+                f"db-slowest;dur={self.slowest_ms:.1f}")
+
+    def as_dict(self) -> dict:
+        repeated, repeated_statement = self.most_repeated()
+        return {
+            "route": self.route,
+            "empresa_id": self.empresa_id,
+            "queries": self.count,
+            "db_ms": round(self.total_ms, 2),
+            "slowest_ms": round(self.slowest_ms, 2),
+            "slowest_statement": self.slowest_statement and _compact(self.slowest_statement),
+            "most_repeated": repeated,
+            "most_repeated_statement": repeated_statement and _compact(repeated_statement),
+        }
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> QueryStats | None:
+    return _current.get()
+
+
+def annotate_request(*, empresa_id: int | None = None) -> None:
+    """Asocia la empresa del usuario autenticado a las estadísticas en curso."""
+    stats = _current.get()
+    if stats is not None and empresa_id is not None:
+        stats.empresa_id = empresa_id
+
+
+# ---------- Hooks del engine ----------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+    if elapsed_ms >= DB_SLOW_QUERY_MS:
+        slow_logger.warning(json.dumps({
+            "event": "slow_query",
+            "route": stats.route if stats else None,
+            "empresa_id": stats.empresa_id if stats else None,
+            "duration_ms": round(elapsed_ms, 2),
+            "statement": _compact(statement),
+        }, ensure_ascii=False))
+
+
+def _handle_error(exception_context):
+    # Una sentencia que falla no pasa por after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def install_query_hooks(engine) -> None:
+    """Registra los hooks en un engine sync (para el async, en async_engine.sync_engine)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+# ---------- Reporte ----------
+def report(stats: QueryStats) -> None:
+    if stats.count >= DB_REQUEST_QUERY_WARN or stats.total_ms >= DB_REQUEST_DB_WARN_MS:
+        request_logger.warning(json.dumps({"event": "db_heavy_request", **stats.as_dict()}, ensure_ascii=False))
+
+
+@contextmanager
+def track_queries(name: str, empresa_id: int | None = None):
+    """Estadísticas de consultas para un bloque fuera de una petición (p. ej. un trabajo de worker)."""
+    stats = QueryStats(route=name, empresa_id=empresa_id)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+        report(stats)
+
+
+def _header_empresa_id(scope) -> int | None:
+    for name, value in scope.get("headers") or ():
+        if name == b"x-company-id" and value.isdigit():
+            return int(value)
+    return None
+
+
+class DbTimingMiddleware:
+    """Middleware ASGI: estadísticas de BD por petición y header Server-Timing."""
+
+    def __init__(self, app, server_timing: bool = DB_SERVER_TIMING):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats(empresa_id=_header_empresa_id(scope), scope=scope)
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            report(stats)
@@ -0,0 +1,87 @@
+#Archivo Infraestructura/ Recursos compartidos del proceso
+"""
+Arranque y cierre de los recursos compartidos (cliente HTTP, cliente de
+almacenamiento, pool SMTP, pool de BD y pool de bcrypt) desde el lifespan de la API, más el
+reporte de ocupación que expone /health/resources (incluye el buffer de auditoría). Las
+particiones de audit_log las mantiene app/workers/audit_partition_worker.py.
+"""
+import asyncio
+import logging
+import os
+
+from sqlalchemy import text
+
+from app.infrastructure.audit_sink import audit_sink
+from app.infrastructure.db import engine, async_engine
+from app.infrastructure.db_pool import pool_stats
+from app.infrastructure.executor import blocking_pool_stats
+from app.infrastructure.password_hasher import password_hasher
+from app.infrastructure.http_client import get_http_client, close_http_client, http_client_stats
+from app.infrastructure.smtp_pool import get_smtp_pool, close_smtp_pool
+from app.services.storage_service import get_storage
+
+logger = logging.getLogger(__name__)
+
+# Conexiones de BD que se abren al arrancar para que las primeras peticiones no paguen el connect
+DB_WARMUP_CONNECTIONS = int(os.getenv("DB_WARMUP_CONNECTIONS", "2"))
+
+
+def _warm_up_db(connections: int) -> None:
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            conn.close()
+
+
+def _warm_up_storage() -> None:
+    storage = get_storage()
+    # En GCS crea el cliente (credenciales y sesión) una sola vez
+    getattr(storage, "client", None)
+
+
+async def startup_resources() -> None:
+    get_http_client()
+    get_smtp_pool()
+    for name, warm_up, args in (("bd", _warm_up_db, (DB_WARMUP_CONNECTIONS,)),
+                                ("almacenamiento", _warm_up_storage, ())):
+        try:
+            await asyncio.to_thread(warm_up, *args)
+        except Exception as e:
+            # No impide arrancar: el recurso se crea en su primer uso
+            logger.warning("No se pudo precalentar %s: %s", name, e)
+
+
+async def shutdown_resources() -> None:
+    await close_http_client()
+    await asyncio.to_thread(close_smtp_pool)
+    await async_engine.dispose()
+    password_hasher.shutdown()
+
+
+def db_pool_stats() -> dict:
+    sync_pool = pool_stats(engine.pool)
+    async_pool = pool_stats(async_engine.pool)
+    return {
+        "sync": sync_pool,
+        "async": async_pool,
+        # Conexiones que este worker puede llegar a abrir contra Postgres (sync + async)
+        "connection_budget": sync_pool.get("max_connections", 0) + async_pool.get("max_connections", 0),
+    }
+
+
+def resources_status() -> dict:
+    storage = get_storage()
+    return {
+        "db_pool": db_pool_stats(),
+        "blocking_pool": blocking_pool_stats(),
+        "password_pool": password_hasher.stats(),
+        "http_client": http_client_stats(),
+        "smtp_pool": get_smtp_pool().stats(),
+        "audit_sink": audit_sink.stats(),
+        "storage": {"backend": storage.name},
+    }
@@ -0,0 +1,210 @@
+#Archivo Infraestructura/ Pool de conexiones SMTP
+"""
+Conexiones SMTP reutilizables: cada correo deja de pagar conexión, STARTTLS y
+login. Una conexión ociosa más de SMTP_POOL_IDLE_SECONDS se comprueba con NOOP
+antes de reutilizarla; si el servidor la cerró se abre otra.
+
+EMAIL_BACKEND=local sustituye el servidor por LocalMailbox, que guarda los
+mensajes en memoria (y en EMAIL_LOCAL_DIR como .eml si se configura).
+"""
+from __future__ import annotations
+
+import os
+import smtplib
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))
+SMTP_POOL_IDLE_SECONDS = float(os.getenv("SMTP_POOL_IDLE_SECONDS", "30"))
+SMTP_POOL_MAX_IDLE_SECONDS = float(os.getenv("SMTP_POOL_MAX_IDLE_SECONDS", "240"))
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+
+
+@dataclass(frozen=True)
+class SmtpSettings:
+    server: str | None
+    port: int
+    user: str | None
+    password: str | None
+    tls: bool
+    ssl: bool
+
+    @classmethod
+    def from_env(cls) -> "SmtpSettings":
+        return cls(
+            server=os.getenv("SMTP_SERVER"),
+            port=int(os.getenv("SMTP_PORT", 587)),
+            user=os.getenv("SMTP_USER"),
+            password=os.getenv("SMTP_PASSWORD"),
+            tls=os.getenv("SMTP_TLS", "1").lower() in ("1", "true", "yes"),
+            ssl=os.getenv("SMTP_SSL", "0").lower() in ("1", "true", "yes"),
+        )
+
+
+class SmtpPool:
+
+    def __init__(self, settings: SmtpSettings | None = None, max_size: int = SMTP_POOL_SIZE,
+                 idle_check_seconds: float = SMTP_POOL_IDLE_SECONDS,
+                 max_idle_seconds: float = SMTP_POOL_MAX_IDLE_SECONDS):
+        self.settings = settings or SmtpSettings.from_env()
+        self.max_size = max_size
+        self.idle_check_seconds = idle_check_seconds
+        self.max_idle_seconds = max_idle_seconds
+        self._idle: list[tuple[smtplib.SMTP, float]] = []
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        s = self.settings
+        if s.ssl:
+            server = smtplib.SMTP_SSL(s.server, s.port, timeout=SMTP_TIMEOUT_SECONDS)
+        else:
+            server = smtplib.SMTP(s.server, s.port, timeout=SMTP_TIMEOUT_SECONDS)
+            if s.tls:
+                server.starttls()
+        if s.user:
+            server.login(s.user, s.password)
+        with self._lock:
+            self.created += 1
+        return server
+
+    @staticmethod
+    def _quit(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _take_idle(self) -> smtplib.SMTP | None:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                server, released_at = self._idle.pop()
+            idle_for = time.monotonic() - released_at
+            if idle_for > self.max_idle_seconds:
+                self._quit(server)
+                continue
+            if idle_for > self.idle_check_seconds:
+                try:
+                    if server.noop()[0] != 250:
+                        raise smtplib.SMTPServerDisconnected()
+                except Exception:
+                    server.close()
+                    with self._lock:
+                        self.discarded += 1
+                    continue
+            with self._lock:
+                self.reused += 1
+            return server
+
+    @contextmanager
+    def connection(self):
+        """Presta una conexión autenticada; si falla durante su uso se descarta."""
+        self._slots.acquire()
+        with self._lock:
+            self.in_use += 1
+        server = None
+        try:
+            server = self._take_idle() or self._connect()
+            yield server
+        except Exception:
+            if server is not None:
+                server.close()
+                with self._lock:
+                    self.discarded += 1
+                server = None
+            raise
+        finally:
+            with self._lock:
+                self.in_use -= 1
+                if server is not None:
+                    self._idle.append((server, time.monotonic()))
+            self._slots.release()
+
+    def send_message(self, msg) -> None:
+        with self.connection() as server:
+            server.send_message(msg)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._quit(server)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "in_use": self.in_use,
+                "idle": len(self._idle),
+                "created": self.created,
+                "reused": self.reused,
+                "discarded": self.discarded,
+            }
+
+
+class LocalMailbox:
+    """Sustituto del servidor SMTP con la misma interfaz que SmtpPool."""
+
+    def __init__(self, directory: str | None = None):
+        self.directory = Path(directory) if directory else None
+        self.messages = []
+        self._lock = threading.Lock()
+        self.sessions = 0
+
+    @contextmanager
+    def connection(self):
+        with self._lock:
+            self.sessions += 1
+        yield self
+
+    def send_message(self, msg) -> None:
+        with self._lock:
+            self.messages.append(msg)
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            (self.directory / f"{int(time.time())}-{uuid.uuid4().hex}.eml").write_bytes(bytes(msg))
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"backend": "local", "sessions": self.sessions, "sent": len(self.messages)}
+
+
+_pool: SmtpPool | LocalMailbox | None = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool() -> SmtpPool | LocalMailbox:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if os.getenv("EMAIL_BACKEND", "smtp").lower() == "local":
+                    _pool = LocalMailbox(os.getenv("EMAIL_LOCAL_DIR"))
+                else:
+                    _pool = SmtpPool()
+    return _pool
+
+
+def close_smtp_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
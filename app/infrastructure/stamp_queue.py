@@ -0,0 +1,146 @@
+#Archivo Infraestructura/ Cola de estampado
+"""
+Cola durable de trabajos de estampado de PDFs.
+
+- PostgresStampQueue: tabla iso.stamp_job, el encolado viaja en la misma
+  transacción que la versión y los workers reclaman con FOR UPDATE SKIP LOCKED.
+- LocalStampQueue: sustituto en memoria con la misma interfaz (pruebas / local).
+
+Reclamo, reintentos y leases vienen de lease_queue.py.
+
+Se elige con STAMP_QUEUE_BACKEND=postgres|local (por defecto postgres).
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.infrastructure.base import SCHEMA_NAME
+from app.infrastructure.lease_queue import LeaseQueueSpec, LocalLeaseQueue, PostgresLeaseQueue, dedup_key
+
+STAMP_JOB_MAX_ATTEMPTS = int(os.getenv("STAMP_JOB_MAX_ATTEMPTS", "5"))
+STAMP_JOB_BACKOFF_SECONDS = float(os.getenv("STAMP_JOB_BACKOFF_SECONDS", "5"))
+STAMP_JOB_LEASE_SECONDS = int(os.getenv("STAMP_JOB_LEASE_SECONDS", "300"))
+
+_JOB_STATUS_COLUMNS = ("job_id", "version_id", "state", "attempts", "max_attempts", "last_error",
+                       "created_at", "updated_at", "finished_at")
+
+STAMP_JOB_SPEC = LeaseQueueSpec(
+    table="stamp_job",
+    id_column="job_id",
+    active_state="running",
+    done_state="done",
+    done_at_column="finished_at",
+    max_attempts=STAMP_JOB_MAX_ATTEMPTS,
+    lease_seconds=STAMP_JOB_LEASE_SECONDS,
+    backoff_seconds=STAMP_JOB_BACKOFF_SECONDS,
+    backoff_cap_seconds=3600,
+    finish_on_final_failure=True,
+)
+
+
+def build_dedup_key(version_id: int, status_item_id: int, signer_name: str | None,
+                    change_id: int | None = None) -> str:
+    """
+    version:estado:firmante, más el id del cambio de estado (comentario de revisión)
+    cuando lo hay: el mismo estado aplicado de nuevo es otro trabajo, mientras que
+    reintentar el encolado de un mismo cambio no lo duplica.
+    """
+    if change_id is None:
+        return dedup_key(version_id, status_item_id, signer_name)
+    return dedup_key(version_id, status_item_id, signer_name, change_id)
+
+
+def _job_values(version_id: int, archivo_url: str, status_item_id: int, signer_name: str | None,
+                fecha: datetime | None, nombre_documento: str | None, change_id: int | None) -> dict:
+    return {
+        "version_id": version_id,
+        "archivo_url": archivo_url,
+        "status_item_id": status_item_id,
+        "signer_name": signer_name,
+        "fecha": fecha,
+        "nombre_documento": nombre_documento,
+        "dedup_key": build_dedup_key(version_id, status_item_id, signer_name, change_id),
+        "source_generation": None,
+    }
+
+
+class _StampQueue:
+
+    def enqueue(self, db: Session | None, *, version_id: int, archivo_url: str, status_item_id: int,
+                signer_name: str | None = None, fecha: datetime | None = None,
+                nombre_documento: str | None = None, change_id: int | None = None) -> None:
+        """
+        Encola el trabajo en la sesión actual (no hace commit). Si ya existe uno con la
+        misma clave se ignora, salvo que haya fallado definitivamente: en ese caso se reactiva.
+        `change_id` identifica el cambio de estado que pide el estampado (ver build_dedup_key).
+        """
+        self._insert(db, _job_values(version_id, archivo_url, status_item_id, signer_name, fecha,
+                                     nombre_documento, change_id))
+
+    def claim(self, db: Session | None) -> Optional[dict]:
+        """
+        Reclama el siguiente trabajo disponible. Los trabajos de una misma versión se
+        procesan en orden: no se toma uno si hay otro anterior sin terminar.
+        """
+        jobs = self.claim_batch(db, 1)
+        return jobs[0] if jobs else None
+
+
+class PostgresStampQueue(_StampQueue, PostgresLeaseQueue):
+    spec = STAMP_JOB_SPEC
+    claim_condition = f"""
+                          AND NOT EXISTS (
+                              SELECT 1 FROM {SCHEMA_NAME}.stamp_job AS p
+                               WHERE p.version_id = c.version_id
+                                 AND p.job_id < c.job_id
+                                 AND p.state IN ('pending', 'running'))"""
+
+    def set_source_generation(self, db: Session, job_id: int, generation: int | None) -> None:
+        db.execute(
+            text(f"UPDATE {SCHEMA_NAME}.stamp_job SET source_generation = :g, updated_at = now() WHERE job_id = :id"),
+            {"g": generation, "id": job_id},
+        )
+        db.commit()
+
+    def jobs_for_version(self, db: Session, version_id: int) -> list[dict]:
+        rows = db.execute(
+            text(f"SELECT {', '.join(_JOB_STATUS_COLUMNS)} FROM {SCHEMA_NAME}.stamp_job "
+                 f"WHERE version_id = :v ORDER BY job_id"),
+            {"v": version_id},
+        ).mappings().all()
+        return [dict(r) for r in rows]
+
+
+class LocalStampQueue(_StampQueue, LocalLeaseQueue):
+    """Sustituto en memoria de PostgresStampQueue."""
+    spec = STAMP_JOB_SPEC
+
+    def _blocked(self, job: dict) -> bool:
+        return any(
+            p["version_id"] == job["version_id"] and p["job_id"] < job["job_id"]
+            and p["state"] in STAMP_JOB_SPEC.open_states
+            for p in self._items.values()
+        )
+
+    def set_source_generation(self, db: Session | None, job_id: int, generation: int | None) -> None:
+        with self._lock:
+            self._items[job_id]["source_generation"] = generation
+
+    def jobs_for_version(self, db: Session | None, version_id: int) -> list[dict]:
+        return [{c: j[c] for c in _JOB_STATUS_COLUMNS} for j in self.items() if j["version_id"] == version_id]
+
+
+_queue = None
+
+
+def get_stamp_queue():
+    global _queue
+    if _queue is None:
+        backend = os.getenv("STAMP_QUEUE_BACKEND", "postgres").lower()
+        _queue = LocalStampQueue() if backend == "local" else PostgresStampQueue()
+    return _queue
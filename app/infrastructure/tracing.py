@@ -0,0 +1,85 @@
+#Archivo Infraestructura/ Tracing (OpenTelemetry opcional)
+"""
+Exportación opcional de spans por petición a un collector OTLP/HTTP.
+
+Se activa con OTEL_TRACING=1 (o definiendo OTEL_EXPORTER_OTLP_ENDPOINT) y
+requiere paquetes que no están en requirements.txt:
+
+    pip install opentelemetry-sdk opentelemetry-exporter-otlp-proto-http
+
+Si no están instalados se registra un aviso y la API sigue sin tracing. Cada
+span lleva la plantilla de la ruta, el módulo ISO, el status y las consultas y
+tiempo de BD de la petición (query_stats).
+"""
+from __future__ import annotations
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+OTEL_EXPORTER_OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+OTEL_TRACING = os.getenv("OTEL_TRACING", "1" if OTEL_EXPORTER_OTLP_ENDPOINT else "0").lower() in ("1", "true", "yes")
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "iso-backend")
+
+_tracer = None
+_provider = None
+
+
+def setup_tracing() -> bool:
+    """Configura el TracerProvider con exportador OTLP. Devuelve si quedó activo."""
+    global _tracer, _provider
+    if not OTEL_TRACING or _tracer is not None:
+        return _tracer is not None
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        logger.warning("OTEL_TRACING activo pero faltan opentelemetry-sdk / opentelemetry-exporter-otlp-proto-http")
+        return False
+
+    endpoint = OTEL_EXPORTER_OTLP_ENDPOINT or "http://localhost:4318"
+    _provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+    _provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=f"{endpoint.rstrip('/')}/v1/traces")))
+    trace.set_tracer_provider(_provider)
+    _tracer = trace.get_tracer("app.http")
+    logger.info("Tracing OTLP activo hacia %s", endpoint)
+    return True
+
+
+def shutdown_tracing() -> None:
+    global _tracer, _provider
+    provider, _provider, _tracer = _provider, None, None
+    if provider is not None:
+        provider.shutdown()
+
+
+def start_request_span(scope: dict):
+    if _tracer is None:
+        return None
+    from opentelemetry.trace import SpanKind
+
+    return _tracer.start_span(
+        f"{scope.get('method', '')} {scope.get('path', '')}",
+        kind=SpanKind.SERVER,
+        attributes={"http.method": scope.get("method", ""), "http.target": scope.get("path", "")},
+    )
+
+
+def end_request_span(span, scope: dict, *, module: str, route: str, status: int, db_stats=None) -> None:
+    if span is None:
+        return
+    span.update_name(f"{scope.get('method', '')} {route}")
+    span.set_attribute("http.route", route)
+    span.set_attribute("http.status_code", status)
+    span.set_attribute("iso.module", module)
+    if db_stats is not None:
+        span.set_attribute("db.queries", db_stats.count)
+        span.set_attribute("db.duration_ms", round(db_stats.total_ms, 2))
+    if status >= 500:
+        from opentelemetry.trace import Status, StatusCode
+        span.set_status(Status(StatusCode.ERROR))
+    span.end()
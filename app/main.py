@@ -13,15 +13,45 @@ from app.infrastructure.db import engine
 from app.routers.catalogs import router as catalogs_router
 from app.routers.assets import router as assets_router
 from app.routers.admin import router as admin_router
+from app.routers.audit import router as audit_router
 from app.users.users_router import router as users_router
 from contextlib import asynccontextmanager
+import asyncio
+from app.infrastructure.loop_monitor import LoopLagMiddleware
+from app.infrastructure.query_stats import DbTimingMiddleware
+from app.infrastructure.metrics import MetricsMiddleware
+from app.infrastructure import tracing
+from fastapi.responses import Response
 from app.routers.risk_router import router as risk_router
 from app.routers.treatment_router import router as treatment_router
 
 @asynccontextmanager
 async def lifespan(app):
     import app.infrastructure.audit
+    from app.infrastructure.resources import startup_resources, shutdown_resources
+    from app.workers import audit_partition_worker, audit_worker, email_worker, stamp_worker
+    from app.infrastructure.executor import get_blocking_executor, shutdown_blocking_executor
+    from app.infrastructure.loop_monitor import loop_monitor, LOOP_LAG_MONITOR
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(get_blocking_executor())
+    if LOOP_LAG_MONITOR:
+        loop_monitor.start()
+    await startup_resources()
+    tracing.setup_tracing()
+    workers = [w for w in (stamp_worker.start_embedded_worker(), email_worker.start_embedded_worker(),
+                            audit_worker.start_embedded_worker(), audit_partition_worker.start_embedded_worker()) if w]
     yield
+    for _, stop_event in workers:
+        stop_event.set()
+    for thread, _ in workers:
+        thread.join(timeout=10)
+    await loop_monitor.stop()
+    await shutdown_resources()
+    tracing.shutdown_tracing()
+    # Cancela lo encolado y cierra el pool también como executor por defecto del loop,
+    # para que el loop no siga apuntando a un pool ya cerrado
+    shutdown_blocking_executor()
+    await loop.shutdown_default_executor()
 app = FastAPI(title="Gestión Documental ISO27001", lifespan=lifespan)
 
 
@@ -49,12 +79,18 @@ app.add_middleware(
     max_age=600,
 )
 
+app.add_middleware(LoopLagMiddleware)
+# MetricsMiddleware queda dentro de DbTimingMiddleware para leer las consultas de la petición
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(DbTimingMiddleware)
+
 app.include_router(auth_router, prefix="/auth", tags=["Autenticación"])
 # app.include_router(users_router, prefix="/users", tags=["Usuarios"])
 app.include_router(users_router, prefix="/users", tags=["Usuarios"])
 app.include_router(documents_router, prefix="/documents", tags=["Documentos"])
 app.include_router(reports_router, prefix="/reports", tags=["Reportes"])
 app.include_router(admin_router, prefix="/admin", tags=["Admin"])
+app.include_router(audit_router, prefix="/audit", tags=["Auditoría"])
 app.include_router(risk_router, prefix="/risks", tags=["Riesgos"])
 app.include_router(risk_router, prefix="/riesgos", tags=["Riesgos"])
 
@@ -84,6 +120,37 @@ def health_db():
     return {"db": "ok"}
 
 
+@app.get("/health/resources", tags=["Health"])
+def health_resources():
+    from app.infrastructure.resources import resources_status
+    return resources_status()
+
+
+@app.get("/health/loop", tags=["Health"])
+def health_loop():
+    from app.infrastructure.executor import blocking_pool_stats
+    from app.infrastructure.loop_monitor import loop_monitor
+    return {"event_loop": loop_monitor.stats(), "blocking_pool": blocking_pool_stats()}
+
+
+@app.get("/health/caches", tags=["Health"])
+def health_caches():
+    from app.services.signature_cache import signature_cache
+    from app.services.signed_url_cache import signed_url_cache
+    from app.services.token_cache import token_cache
+    from app.services.permission_cache import permission_cache
+    from app.services.permission_registry import permission_registry
+    return {"signed_urls": signed_url_cache.stats(), "signatures": signature_cache.stats(),
+            "tokens": token_cache.stats(), "permissions": permission_cache.stats(),
+            "permission_registry": permission_registry.stats()}
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+def metrics():
+    from app.infrastructure.metrics import render, CONTENT_TYPE
+    return Response(render(), media_type=CONTENT_TYPE)
+
+
 @app.get("/health/dbinfo", tags=["Health"])
 def health_dbinfo():
     url = engine.url
@@ -2,23 +2,25 @@
 from __future__ import annotations
 from typing import List, Optional, Annotated
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 
-from app.infrastructure.db import get_db
+from app.infrastructure.db import get_db, get_async_db
 from app.infrastructure.models import Activo, Catalog, CatalogItem, Usuario
 from app.schemas.assets import (
     ActivoCreate, ActivoUpdate, ActivoDetailOut, ActivoListItemOut,ActivoListPage,
     UsuarioMinOut, # <-- importa el DTO para el combo
 )
 from app.services.assets_service import (
-    create_asset, list_assets, search_assets, update_asset, delete_asset,list_assets_paged
+    create_asset, list_assets, search_assets, update_asset, delete_asset,list_assets_paged,
+    alist_assets_paged, alist_asset_owners,
 )
 from app.services.auth_service import get_current_user
 
 from fastapi import Query
 
 db_dependency = Annotated[Session, Depends(get_db)]
+async_db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 user_dependency = Annotated[dict, Depends(get_current_user)]
 
 # <<< MANTÉN prefijo /assets >>>
@@ -31,30 +33,13 @@ router = APIRouter(prefix="/assets", tags=["Activos"])
     tags=["Usuarios/propietarios"],
     summary="Listar usuarios para activos",
 )
-def listar_usuarios_para_activos(
-    db: db_dependency,
+async def listar_usuarios_para_activos(
+    db: async_db_dependency,
     user: user_dependency,
     area_id: Optional[int] = Query(None, description="Filtrar por área (opcional)"),
     q: Optional[str] = Query(None, description="Búsqueda por nombre/apellido/email"),
 ):
-    empresa_id = user["empresa_id"]
-
-    query = db.query(Usuario).filter(Usuario.empresa_id == empresa_id)
-
-    if area_id is not None:
-        query = query.filter(Usuario.area_id == area_id)
-
-    if q:
-        like = f"%{q}%"
-        query = query.filter(
-            or_(
-                Usuario.first_name.ilike(like),
-                Usuario.last_name.ilike(like),
-                Usuario.email.ilike(like),
-            )
-        )
-
-    rows = query.order_by(Usuario.first_name, Usuario.last_name).all()
+    rows = await alist_asset_owners(db, user["empresa_id"], area_id, q)
 
     return [
         UsuarioMinOut(
@@ -70,15 +55,15 @@ def listar_usuarios_para_activos(
 
 # --- Rutas de activos (deja estas igual; están bajo /assets) ---
 @router.get("", response_model=ActivoListPage)
-def listar_activos(
-    db: db_dependency,
+async def listar_activos(
+    db: async_db_dependency,
     user: user_dependency,
     q: Optional[str] = Query(None, description="Texto de búsqueda"),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=200),
 ):
     offset = (page - 1) * page_size
-    items, total = list_assets_paged(db, user, q, page_size, offset)
+    items, total = await alist_assets_paged(db, user, q, page_size, offset)
     # FastAPI serializa ORM->DTO gracias a from_attributes
     return {"items": items, "total": total}
 
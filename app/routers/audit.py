@@ -0,0 +1,40 @@
+from datetime import datetime
+from typing import Annotated
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from starlette import status
+from app.infrastructure.db import get_db
+from app.infrastructure.executor import run_blocking
+from app.schemas.audit import AuditLogFilters, AuditPage, AuditEntityState
+from app.services.audit_service import list_audit_service, entity_state_service, aiter_audit_ndjson, \
+    AUDIT_READ_ROLES
+from app.services.auth_service import get_current_user, check_auth_and_roles
+
+
+db_dependency = Annotated[Session, Depends(get_db)]
+user_dependency = Annotated[dict, Depends(get_current_user)]
+filters_dependency = Annotated[AuditLogFilters, Depends()]
+router = APIRouter()
+
+
+@router.get("", status_code=status.HTTP_200_OK, response_model=AuditPage)
+async def list_audit(db: db_dependency, user: user_dependency, filters: filters_dependency,
+                     cursor: str | None = None, limit: int = Query(50, ge=1, le=500)):
+    return await run_blocking(list_audit_service, db, user, filters, cursor, limit)
+
+
+@router.get("/export", response_class=StreamingResponse, summary="Exporta los registros filtrados como NDJSON")
+async def export_audit(user: user_dependency, filters: filters_dependency):
+    check_auth_and_roles(user, AUDIT_READ_ROLES)
+    return StreamingResponse(
+        aiter_audit_ndjson(filters),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="audit_log.ndjson"'},
+    )
+
+
+@router.get("/{table_name}/{target_pk_id}/state", status_code=status.HTTP_200_OK, response_model=AuditEntityState)
+async def get_entity_state(table_name: str, target_pk_id: int, db: db_dependency, user: user_dependency,
+                           at: datetime | None = None):
+    return await run_blocking(entity_state_service, db, user, table_name, target_pk_id, at)
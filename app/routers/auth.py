@@ -7,19 +7,18 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from starlette import status
 from app.infrastructure.db import get_db
+from app.infrastructure.executor import run_blocking
 from app.schemas.Dtos.UsuarioResponseDto import UsuarioResponseDto, ActivateUserRequest
 from dotenv import load_dotenv
 import os
 from app.schemas.Dtos.CreateUserRequest import CreateUserRequest, Token
 from typing import Annotated
 from pydantic import BaseModel
-from passlib.context import CryptContext
 from app.utils.audit_context import audit_context
-from app.services.auth_service import create_user, authenticate_user, create_access_token, get_current_user, \
+from app.services.auth_service import create_user, aauthenticate_user, create_access_token, get_current_user, \
     buscar_usuarios, obtener_permisos_usuario, obtener_roles_usuario, activate_user, reset_password_service, \
-    forgot_password_service, upload_firma_service
+    forgot_password_service, upload_firma_service, access_token_claims
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 load_dotenv()
 
 URL = os.getenv("URL_SITE")
@@ -36,13 +35,13 @@ class ResetPasswordRequest(BaseModel):
 @router.post("/user", status_code=status.HTTP_201_CREATED)
 # Mostrar o secret key e o algoritmo
 async def create_user_endpoint(db: db_dependency, cr_user: CreateUserRequest):
-    created_user = create_user(db, cr_user)
+    created_user = await run_blocking(create_user, db, cr_user)
     return created_user
 
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: db_dependency):
-    user = authenticate_user(form_data.username, form_data.password, db)
+    user = await aauthenticate_user(form_data.username, form_data.password, db)
 
     if not user:
         raise HTTPException(
@@ -50,8 +49,7 @@ async def login_for_access_token(form_data: Annotated[OAuth2PasswordRequestForm,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    permisos = obtener_permisos_usuario(db, user.usuario_id)
-    roles = obtener_roles_usuario(db, user.usuario_id)
+    access_claims = await run_blocking(access_token_claims, db, user)
     payload = {
         "sub": str(user.usuario_id),
         "email": user.email,
@@ -60,8 +58,7 @@ async def login_for_access_token(form_data: Annotated[OAuth2PasswordRequestForm,
         "empresa_id": user.empresa_id,
         "area_id": user.area_id,
         "activo": user.activo,
-        "roles": roles,
-        "permisos": permisos
+        **access_claims,
     }
     token = create_access_token(payload=payload, expires_delta=datetime.timedelta(minutes=60))
     return {"access_token": token, "token_type": "bearer"}
@@ -71,10 +68,12 @@ async def login_for_access_token(form_data: Annotated[OAuth2PasswordRequestForm,
 async def read_users_me(user: user_dependency, db: db_dependency):
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
-    usuario = buscar_usuarios(db, user["user_id"])
+    usuario, roles, permisos = await run_blocking(lambda: (
+        buscar_usuarios(db, user["user_id"]),
+        obtener_roles_usuario(db, user["user_id"]),
+        obtener_permisos_usuario(db, user["user_id"]),
+    ))
     usuarios_dto = [UsuarioResponseDto(**u).dict() for u in usuario]
-    roles = obtener_roles_usuario(db, user["user_id"])
-    permisos = obtener_permisos_usuario(db, user["user_id"])
     return {
         "usuario": usuarios_dto,
         "roles": roles,
@@ -88,7 +87,7 @@ async def activate_user_account(
         user: user_dependency,
         request: ActivateUserRequest
 ):
-    activate_user(db, user, request.email)
+    await run_blocking(activate_user, db, user, request.email)
     return {"message": f"User account with email {request.email} has been activated."}
 
 
@@ -113,7 +112,7 @@ async def upload_firma_endpoint(
     Retorna: { "url_firma": "<public_url>" }
     """
     try:
-        public_url = upload_firma_service(db, user, file)
+        public_url = await run_blocking(upload_firma_service, db, user, file)
     except HTTPException as e:
         # re-lanzar HTTPException tal cual para que FastAPI maneje el status y detalle
         raise e
@@ -1,16 +1,17 @@
 from __future__ import annotations
 from typing import List, Optional, Annotated
 from fastapi import APIRouter, Depends, HTTPException, Request, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.infrastructure.db import get_db
-from app.infrastructure.models import Catalog, CatalogItem, Areas
+from app.infrastructure.db import get_async_db
+from app.infrastructure.models import Areas
 from app.schemas.assets import CatalogoItemSimple
 from app.services.auth_service import get_current_user
+from app.services.catalog_service import list_catalog_items
 
 
-db_dependency = Annotated[Session, Depends(get_db)]
+async_db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 user_dependency = Annotated[dict, Depends(get_current_user)]
 router = APIRouter(prefix="/catalogo", tags=["Catálogos de Activos"])
 
@@ -22,50 +23,40 @@ def _resolve_empresa_id(request: Request, q_empresa_id: Optional[int] = None) ->
         return int(hdr)
     return 1
 
-def _get_catalog_items(db: Session, catalog_key: str, empresa_id: int):
-    q = (
-        db.query(CatalogItem)
-        .join(Catalog, Catalog.catalog_id == CatalogItem.catalog_id)
-        .filter(Catalog.catalog_key == catalog_key)
-        .filter(CatalogItem.active.is_(True))
-        .filter(CatalogItem.deleted_at.is_(None))
-        .filter(or_(CatalogItem.empresa_id == None, CatalogItem.empresa_id == empresa_id))
-        .order_by(CatalogItem.sort_order, CatalogItem.name)
-    )
-    return q.all()
 @router.get("/catalogo_clasificacion_documentos", response_model=List[CatalogoItemSimple])
-def catalogo_clasificacion_documentos(request: Request, empresa_id: Optional[int] = Query(None), db: Session = Depends(get_db)):
+async def catalogo_clasificacion_documentos(request: Request, db: async_db_dependency, empresa_id: Optional[int] = Query(None)):
     emp = _resolve_empresa_id(request, empresa_id)
-    return _get_catalog_items(db, "clasificacion_documento", emp)
+    return await list_catalog_items(db, "clasificacion_documento", emp)
 
 
 @router.get("/tipos-documentos", response_model=List[CatalogoItemSimple])
-def catalogo_tipos_documentos(request: Request, empresa_id: Optional[int] = Query(None), db: Session = Depends(get_db)):
+async def catalogo_tipos_documentos(request: Request, db: async_db_dependency, empresa_id: Optional[int] = Query(None)):
     emp = _resolve_empresa_id(request, empresa_id)
-    return _get_catalog_items(db, "tipo_documento", emp)
+    return await list_catalog_items(db, "tipo_documento", emp)
 
 @router.get("/tipos-activo", response_model=List[CatalogoItemSimple])
-def catalogo_tipos_activo(request: Request, empresa_id: Optional[int] = Query(None), db: Session = Depends(get_db)):
+async def catalogo_tipos_activo(request: Request, db: async_db_dependency, empresa_id: Optional[int] = Query(None)):
     emp = _resolve_empresa_id(request, empresa_id)
-    return _get_catalog_items(db, "tipo_activo", emp)
+    return await list_catalog_items(db, "tipo_activo", emp)
 
 @router.get("/estatus", response_model=List[CatalogoItemSimple])
-def catalogo_estatus_activo(request: Request, empresa_id: Optional[int] = Query(None), db: Session = Depends(get_db)):
+async def catalogo_estatus_activo(request: Request, db: async_db_dependency, empresa_id: Optional[int] = Query(None)):
     emp = _resolve_empresa_id(request, empresa_id)
-    return _get_catalog_items(db, "estado_activo", emp)
+    return await list_catalog_items(db, "estado_activo", emp)
 
 @router.get("/clasificaciones", response_model=List[CatalogoItemSimple])
-def catalogo_clasificaciones_activo(request: Request, empresa_id: Optional[int] = Query(None), db: Session = Depends(get_db)):
+async def catalogo_clasificaciones_activo(request: Request, db: async_db_dependency, empresa_id: Optional[int] = Query(None)):
     emp = _resolve_empresa_id(request, empresa_id)
-    return _get_catalog_items(db, "clasificacion_activo", emp)
+    return await list_catalog_items(db, "clasificacion_activo", emp)
 
 @router.get("/areas", response_model=List[CatalogoItemSimple])
-def catalogo_areas(db:db_dependency,user: user_dependency):
+async def catalogo_areas(db: async_db_dependency, user: user_dependency):
     areas = (
-        db.query(Areas.area_id.label("id"), Areas.nombre.label("name"))
-        .filter(Areas.empresa_id == user["empresa_id"])
-        .filter(Areas.deleted_at.is_(None))
-        .order_by(Areas.nombre)
-        .all()
-    )
+        await db.execute(
+            select(Areas.area_id.label("id"), Areas.nombre.label("name"))
+            .where(Areas.empresa_id == user["empresa_id"])
+            .where(Areas.deleted_at.is_(None))
+            .order_by(Areas.nombre)
+        )
+    ).all()
     return [CatalogoItemSimple(id=a.id, name=a.name) for a in areas]
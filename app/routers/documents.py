@@ -4,15 +4,19 @@ from typing import List, Annotated
 from fastapi import Query
 from typing import Optional
 from fastapi import HTTPException
+from fastapi import Request, Response
 from fastapi.responses import StreamingResponse
-import httpx
+from starlette.background import BackgroundTask
 from app.services import document_service
 
 
 from sqlalchemy.orm import Session
 
-from app.infrastructure.db import get_db
-from app.schemas.Dtos.DocumentDtos import DocumentCreateDto, DocumentVersionDto, ComentarioRevisionDto
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.infrastructure.db import get_db, get_async_db
+from app.schemas.Dtos.DocumentDtos import DocumentCreateDto, DocumentVersionDto, ComentarioRevisionDto, \
+    DocumentListFiltersDto, DocumentPageDto
 from app.schemas.document import (
     DocumentCreate, Document,
     TypeOfDocument, Classification
@@ -23,7 +27,13 @@ from app.schemas.version import VersionCreate, VersionInfo
 from app.services.auth_service import get_current_user
 from app.services.document_google_service import create_documents_service, get_documents_service, view_document_service, \
     create_document_version_service, get_document_by_id_service, create_comentario_revision_service, \
-    get_comentarios_by_version_service
+    get_comentarios_by_version_service, get_stamp_jobs_by_version_service, get_version_blob_name, \
+    aget_documents_service, aget_documents_page_service, DOCUMENTS_PAGE_MAX
+from app.services.google_cloud_aservice import generate_signed_url
+from app.services.storage_service import get_storage
+from app.infrastructure.executor import run_blocking
+from app.infrastructure.http_client import get_http_client
+from app.utils.http_range import etag_matches, parse_byte_range
 from app.services.document_service import DocumentService
 from app.infrastructure.version_repository import VersionRepository
 from app.utils.audit_context import audit_context
@@ -31,6 +41,7 @@ from app.services.document_service import DocumentService
 
 router = APIRouter(tags=["Documentos"], dependencies=[Depends(audit_context)])
 db_dependency = Annotated[Session, Depends(get_db)]
+async_db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 user_dependency = Annotated[dict, Depends(get_current_user)]
 
 
@@ -56,12 +67,20 @@ async def create_document(
         aprobado_por_id=approver,
         clasificacion_item_id=classification
     )
-    return create_documents_service(db, user, document, file)
+    return await run_blocking(create_documents_service, db, user, document, file)
 
 
 @router.get("/")
-def get_documents(db: db_dependency, user: user_dependency):
-    return get_documents_service(db, user)
+async def get_documents(db: async_db_dependency, user: user_dependency):
+    return await aget_documents_service(db, user)
+
+
+@router.get("/page", response_model=DocumentPageDto)
+async def get_documents_page(db: async_db_dependency, user: user_dependency,
+                             filters: Annotated[DocumentListFiltersDto, Depends()],
+                             cursor: Optional[str] = None,
+                             limit: int = Query(50, ge=1, le=DOCUMENTS_PAGE_MAX)):
+    return await aget_documents_page_service(db, user, filters, cursor, limit)
 
 
 @router.get("/{document_id}")
@@ -99,7 +118,7 @@ async def create_document_version(
         justificacion=justificacion
 
     )
-    return create_document_version_service(db, user, code, document, file)
+    return await run_blocking(create_document_version_service, db, user, code, document, file)
 
 
 @router.post("/comentarios", response_model=str)
@@ -107,27 +126,80 @@ def create_comentario_revision(db: db_dependency, user: user_dependency, comenta
     return create_comentario_revision_service(db, user, comentario_data)
 
 
+@router.get("/versions/{version_id}/stamp-jobs", response_model=List[dict])
+def get_stamp_jobs_by_version(db: db_dependency, version_id: int):
+    return get_stamp_jobs_by_version_service(db, version_id)
+
+
 @router.get("/comentarios/{version_id}", response_model=List[dict])
 def get_comentarios_by_version(db: db_dependency, version_id: int):
     return get_comentarios_by_version_service(db, version_id)
 
 
 @router.get("/documents/preview/{version_id}")
-async def preview_document(version_id: int, db: Session = Depends(get_db)):
-    service = DocumentService()
-    signed_url = await service.get_signed_view_url(version_id, db)
-    if not signed_url:
+async def preview_document(version_id: int, request: Request, db: Session = Depends(get_db)):
+    storage = get_storage()
+    blob_name = await run_blocking(get_version_blob_name, db, version_id)
+    stat = await storage.astat(blob_name)
+    if not stat:
         raise HTTPException(status_code=404, detail="Documento no encontrado")
 
-    async def stream():
-        async with httpx.AsyncClient(timeout=30) as client:
-            async with client.stream("GET", signed_url, headers={"Accept": "application/pdf"}) as resp:
-                resp.raise_for_status()
-                async for chunk in resp.aiter_bytes(64 * 1024):
-                    yield chunk
+    # El ETag cambia con cada re-estampado (nueva generación del blob)
+    etag = f'"{version_id}-{stat.generation}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": "inline; filename=\"documento.pdf\"",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if_range = request.headers.get("if-range")
+    byte_range = None
+    if if_range is None or if_range.strip() == etag:
+        byte_range = parse_byte_range(request.headers.get("range"), stat.size)
+
+    path = storage.local_path(blob_name)
+    if path:
+        # FileResponse resuelve el rango y usa sendfile si el servidor lo soporta
+        return FileResponse(path, media_type="application/pdf", headers=headers)
+
+    if byte_range:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat.size}"
+        headers["Content-Length"] = str(end - start + 1)
+        status_code = 206
+    else:
+        start, end = 0, stat.size - 1
+        headers["Content-Length"] = str(stat.size)
+        status_code = 200
+
+    if not storage.supports_signed_urls:
+        return StreamingResponse(storage.aiter_chunks(blob_name, start, end), status_code=status_code,
+                                 media_type="application/pdf", headers=headers)
+
+    client = get_http_client()
+    upstream_headers = {"Accept": "application/pdf"}
+    if byte_range:
+        upstream_headers["Range"] = f"bytes={start}-{end}"
+    upstream = await client.send(
+        client.build_request("GET", await run_blocking(generate_signed_url, blob_name), headers=upstream_headers), stream=True)
+    if upstream.status_code not in (200, 206):
+        await upstream.aclose()
+        raise HTTPException(status_code=502, detail="No se pudo obtener el documento del almacenamiento")
+    # Longitud y rango los dicta lo que realmente devolvió el origen (pudo re-estamparse entre tanto)
+    status_code = upstream.status_code
+    headers.pop("Content-Range", None)
+    headers.pop("Content-Length", None)
+    for name in ("content-length", "content-range"):
+        if name in upstream.headers:
+            headers[name.title()] = upstream.headers[name]
 
     return StreamingResponse(
-        stream(),
+        upstream.aiter_raw(64 * 1024),
+        status_code=status_code,
         media_type="application/pdf",
-        headers={"Content-Disposition": "inline; filename=\"documento.pdf\""},
+        headers=headers,
+        background=BackgroundTask(upstream.aclose),
     )
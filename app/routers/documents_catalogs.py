@@ -4,15 +4,10 @@ from __future__ import annotations
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, Request, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-# Reutilizamos la infraestructura y helper de catálogos
-from app.infrastructure.assets import (
-    SessionLocal,
-    Catalog,
-    CatalogItem,
-    get_catalog_items,
-)
+from app.infrastructure.db import get_async_db
+from app.services.catalog_service import list_catalog_items
 
 # Reutilizamos un schema simple para ítems de catálogo
 from app.schemas.assets import CatalogoItemSimple
@@ -21,17 +16,6 @@ from app.schemas.assets import CatalogoItemSimple
 router = APIRouter(prefix="/documentos/catalogo", tags=["Catálogos de Documentos"])
 
 
-# ------------------------------
-# Dependencia de sesión
-# ------------------------------
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 # ------------------------------
 # Resolver empresa (header/query)
 # ------------------------------
@@ -59,65 +43,65 @@ def _resolve_empresa_id(
 # ============================================================
 
 @router.get("/tipos", response_model=List[CatalogoItemSimple])
-def listar_tipos(
+async def listar_tipos(
     request: Request,
     empresa_id: Optional[int] = Query(None, description="Empresa que solicita el catálogo"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Devuelve el catálogo 'tipo_documento' (global + específico de empresa).
     """
     emp = _resolve_empresa_id(request, empresa_id)
-    return get_catalog_items(db, "tipo_documento", emp)
+    return await list_catalog_items(db, "tipo_documento", emp)
 
 
 @router.get("/clasificaciones", response_model=List[CatalogoItemSimple])
-def listar_clasif_documento(
+async def listar_clasif_documento(
     request: Request,
     empresa_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Devuelve el catálogo 'clasificacion_documento' (Pública/Interna/Confidencial/Restringida…).
     """
     emp = _resolve_empresa_id(request, empresa_id)
-    return get_catalog_items(db, "clasificacion_documento", emp)
+    return await list_catalog_items(db, "clasificacion_documento", emp)
 
 
 @router.get("/estados", response_model=List[CatalogoItemSimple])
-def listar_estados_documento(
+async def listar_estados_documento(
     request: Request,
     empresa_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Devuelve el catálogo 'estado_documento' (Borrador/En revisión/Aprobado/Obsoleto…).
     """
     emp = _resolve_empresa_id(request, empresa_id)
-    return get_catalog_items(db, "estado_documento", emp)
+    return await list_catalog_items(db, "estado_documento", emp)
 
 
 @router.get("/permisos", response_model=List[CatalogoItemSimple])
-def listar_permisos_documento(
+async def listar_permisos_documento(
     request: Request,
     empresa_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Devuelve el catálogo 'permiso_documento' (Leer/Editar/Aprobar…).
     """
     emp = _resolve_empresa_id(request, empresa_id)
-    return get_catalog_items(db, "permiso_documento", emp)
+    return await list_catalog_items(db, "permiso_documento", emp)
 
 
 @router.get("/areas", response_model=List[CatalogoItemSimple])
-def listar_areas(
+async def listar_areas(
     request: Request,
     empresa_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Devuelve el catálogo 'area' para documentos (área responsable).
     """
     emp = _resolve_empresa_id(request, empresa_id)
-    return get_catalog_items(db, "area", emp)
+    return await list_catalog_items(db, "area", emp)
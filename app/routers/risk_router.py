@@ -2,9 +2,10 @@ from __future__ import annotations
 from typing import Optional, Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.infrastructure.db import get_db
+from app.infrastructure.db import get_db, get_async_db
 from app.schemas.risks_schema import (
     RiesgoGeneralCreate,
     RiesgoGeneralUpdate,
@@ -30,20 +31,21 @@ from app.services.auth_service import get_current_user
 
 router = APIRouter()
 db_dependency = Annotated[Session, Depends(get_db)]
+async_db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 user_dependency = Annotated[dict, Depends(get_current_user)]
 
 
 # ======== GENERALES ========
 @router.get("/generales", response_model=RiesgoGeneralListPage)
-def listar_riesgos_generales(
-    db: db_dependency,
+async def listar_riesgos_generales(
+    db: async_db_dependency,
     user: user_dependency,
     q: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=200),
 ):
     offset = (page - 1) * page_size
-    items, total = svc.list_riesgos_generales_paged(db, user, q, page_size, offset)
+    items, total = await svc.alist_riesgos_generales_paged(db, user, q, page_size, offset)
     return {"items": items, "total": total}
 
 
@@ -79,15 +81,15 @@ def eliminar_riesgo_general(riesgo_id: int, db: db_dependency, user: user_depend
 
 # ======== CON ACTIVO ========
 @router.get("/activos", response_model=RiesgoActivoListPage)
-def listar_riesgos_activos(
-    db: db_dependency,
+async def listar_riesgos_activos(
+    db: async_db_dependency,
     user: user_dependency,
     q: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=200),
 ):
     offset = (page - 1) * page_size
-    items, total = svc.list_riesgos_activo_paged(db, user, q, page_size, offset)
+    items, total = await svc.alist_riesgos_activo_paged(db, user, q, page_size, offset)
     return {"items": items, "total": total}
 
 
@@ -123,28 +125,28 @@ def eliminar_riesgo_activo(riesgo_id: int, db: db_dependency, user: user_depende
 
 # ======== LISTADOS (VISTAS) ========
 @router.get("/generales/view")
-def listar_generales_view_ep(
-    db: db_dependency,
+async def listar_generales_view_ep(
+    db: async_db_dependency,
     user: user_dependency,
     q: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=200),
 ):
     offset = (page - 1) * page_size
-    items, total = svc.list_generales_view(db, user, q, page_size, offset)
+    items, total = await svc.alist_generales_view(db, user, q, page_size, offset)
     return {"items": items, "total": total}
 
 
 @router.get("/activos/view")
-def listar_activos_view_ep(
-    db: db_dependency,
+async def listar_activos_view_ep(
+    db: async_db_dependency,
     user: user_dependency,
     q: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=200),
 ):
     offset = (page - 1) * page_size
-    items, total = svc.list_activos_view(db, user, q, page_size, offset)
+    items, total = await svc.alist_activos_view(db, user, q, page_size, offset)
     return {"items": items, "total": total}
 
 
@@ -164,8 +166,8 @@ def resolve_catalog(req: CatalogResolveRequest, db: Session = Depends(get_db)):
     response_model=list[CatalogoItemSimple],
     summary="Catálogo Probabilidad",
 )
-def catalogo_probabilidad(db: db_dependency, user: user_dependency):
-    return svc.list_probabilidad(db, user)
+async def catalogo_probabilidad(db: async_db_dependency, user: user_dependency):
+    return await svc.alist_catalog_by_key(db, user, "probabilidad")
 
 
 @router.get(
@@ -173,8 +175,8 @@ def catalogo_probabilidad(db: db_dependency, user: user_dependency):
     response_model=list[CatalogoItemSimple],
     summary="Catálogo Impacto",
 )
-def catalogo_impacto(db: db_dependency, user: user_dependency):
-    return svc.list_impacto(db, user)
+async def catalogo_impacto(db: async_db_dependency, user: user_dependency):
+    return await svc.alist_catalog_by_key(db, user, "impacto")
 
 
 @router.get(
@@ -182,8 +184,8 @@ def catalogo_impacto(db: db_dependency, user: user_dependency):
     response_model=list[CatalogoItemSimple],
     summary="Catálogo Nivel de Riesgo",
 )
-def catalogo_nivel_riesgo(db: db_dependency, user: user_dependency):
-    return svc.list_nivel_riesgo(db, user)
+async def catalogo_nivel_riesgo(db: async_db_dependency, user: user_dependency):
+    return await svc.alist_catalog_by_key(db, user, "nivel_riesgo")
 
 
 @router.get(
@@ -191,5 +193,5 @@ def catalogo_nivel_riesgo(db: db_dependency, user: user_dependency):
     response_model=list[CatalogoItemSimple],
     summary="Catálogo Amenaza",
 )
-def catalogo_amenaza(db: db_dependency, user: user_dependency):
-    return svc.list_amenaza(db, user)
+async def catalogo_amenaza(db: async_db_dependency, user: user_dependency):
+    return await svc.alist_catalog_by_key(db, user, "amenaza")
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 
 class DocumentCreateDto(BaseModel):
@@ -37,4 +38,32 @@ class NotificationEmailDto (BaseModel):
     nombre_empresa:str
     nombre_usuario:str
 
-    model_config = {'from_attributes': True}
\ No newline at end of file
+    model_config = {'from_attributes': True}
+
+
+class DocumentListFiltersDto(BaseModel):
+    tipo_item_id: Optional[int] = None
+    area_id: Optional[int] = None
+    estado_item_id: Optional[int] = None
+    clasificacion_item_id: Optional[int] = None
+    q: Optional[str] = Field(None, description="Texto en el nombre o el código")
+    latest: bool = Field(True, description="Sólo la última versión de cada documento")
+
+
+class DocumentListItemDto(BaseModel):
+    codigo: Optional[str] = None
+    nombre: str
+    documento_id: int
+    numero_version: int
+    tipo: Optional[str] = None
+    area: Optional[str] = None
+    estado: Optional[str] = None
+    clasificacion: Optional[str] = None
+    creado: Optional[str] = None
+    version_id: int
+    url: Optional[str] = None
+
+
+class DocumentPageDto(BaseModel):
+    items: List[DocumentListItemDto]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,46 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from enum import Enum
+from typing import Any, List, Optional
+
+
+class AuditOperation(str, Enum):
+    CREATE = "CREATE"
+    UPDATE = "UPDATE"
+    DELETE = "DELETE"
+
+
+class AuditLogFilters(BaseModel):
+    table_name: Optional[str] = Field(None, description="Tabla auditada, p. ej. documento")
+    operation: Optional[AuditOperation] = None
+    actor: Optional[str] = Field(None, description="Correo de quien hizo el cambio")
+    target_pk_id: Optional[int] = Field(None, description="PK del registro (tablas con PK de una columna)")
+    date_from: Optional[datetime] = Field(None, description="Desde (inclusive)")
+    date_to: Optional[datetime] = Field(None, description="Hasta (exclusivo)")
+
+
+class AuditEntry(BaseModel):
+    id: int
+    created_at: datetime
+    table_name: str
+    operation: str
+    target_pk_id: Optional[int] = None
+    target_pk: dict
+    actor: Optional[str] = None
+    before: Optional[dict] = None
+    after: Optional[dict] = None
+
+
+class AuditPage(BaseModel):
+    items: List[AuditEntry]
+    next_cursor: Optional[str] = Field(None, description="Pasar como cursor para la página siguiente")
+
+
+class AuditEntityState(BaseModel):
+    table_name: str
+    target_pk_id: int
+    at: Optional[datetime] = None
+    exists: bool
+    state: Optional[dict[str, Any]] = None
+    last_change: Optional[AuditEntry] = None
+    changes: int
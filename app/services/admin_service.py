@@ -5,12 +5,20 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from app.infrastructure.models import Rol, Empresa, Usuario, AuditLog, Permiso, UsuarioPermiso
 from app.services.auth_service import check_auth_and_roles
+from app.services.permission_cache import permission_cache
+from app.services.permission_registry import permission_registry
 from app.schemas.Dtos.AdminDtos import RoleDTO, CreateRoleDTO, UpdateRoleDTO, PermissionDTO, CreatePermissionDTO, UpdatePermissionDTO
 
 
 # endregion
 
 
+def _invalidate_access_catalog():
+    # Cambió un rol o permiso: afecta a todos sus usuarios y a las posiciones del registro de bits
+    permission_cache.invalidate_all()
+    permission_registry.invalidate()
+
+
 # region Empresas
 def read_all_empresas(db: Session, user: dict):
     check_auth_and_roles(user, ["Administrador"])
@@ -81,6 +89,7 @@ def create_role_service(db: Session, user: dict, role_data: CreateRoleDTO):
     new_role = Rol(**role_data.model_dump())
     db.add(new_role)
     db.commit()
+    _invalidate_access_catalog()
     db.refresh(new_role)
     return RoleDTO.model_validate(new_role)
 
@@ -102,6 +111,7 @@ def update_role_service(db: Session, user: dict, role_id: int, role_data: Create
         setattr(role, key, value)
 
     db.commit()
+    _invalidate_access_catalog()
     db.refresh(role)
     return RoleDTO.model_validate(role)
 
@@ -121,6 +131,7 @@ def delete_role_service(db: Session, user: dict, role_id: int):
 
     role.activo = False
     db.commit()
+    _invalidate_access_catalog()
     return {"message": "Rol eliminado exitosamente"}
 
 
@@ -142,6 +153,7 @@ def patch_role_service(db: Session, user: dict, role_id: int, role_data: UpdateR
         setattr(role, key, value)
 
     db.commit()
+    _invalidate_access_catalog()
     db.refresh(role)
     return RoleDTO.model_validate(role)
 
@@ -180,6 +192,7 @@ def add_roles_to_user_service(db: Session, user: dict, user_id: int, role_ids: l
     ))
 
     db.commit()
+    permission_cache.invalidate_user(user_id)
     db.refresh(usuario)
     return {"message": "Roles agregados exitosamente"}
 
@@ -223,6 +236,7 @@ def remove_roles_from_user_service(db: Session, user: dict, user_id: int, role_i
     ))
 
     db.commit()
+    permission_cache.invalidate_user(user_id)
     db.refresh(usuario)
     return {"message": "Roles eliminados exitosamente"}
 
@@ -290,6 +304,7 @@ def create_permission_service(db: Session, user: dict, permission_data: CreatePe
     new_permission = Permiso(**permission_data.model_dump())
     db.add(new_permission)
     db.commit()
+    _invalidate_access_catalog()
     db.refresh(new_permission)
     return PermissionDTO.model_validate(new_permission)
 
@@ -310,6 +325,7 @@ def update_permission_service(db: Session, user: dict, permission_id: int, permi
         setattr(permission, key, value)
 
     db.commit()
+    _invalidate_access_catalog()
     db.refresh(permission)
     return PermissionDTO.model_validate(permission)
 
@@ -331,6 +347,7 @@ def patch_permission_service(db: Session, user: dict, permission_id: int, permis
         setattr(permission, key, value)
 
     db.commit()
+    _invalidate_access_catalog()
     db.refresh(permission)
     return PermissionDTO.model_validate(permission)
 
@@ -349,6 +366,7 @@ def delete_permission_service(db: Session, user: dict, permission_id: int):
 
     permission.activo = False
     db.commit()
+    _invalidate_access_catalog()
     db.refresh(permission)
     return {"message": "Permiso eliminado exitosamente"}
 
@@ -393,6 +411,7 @@ def add_permissions_to_user_service(db: Session, user: dict, user_id: int, permi
     ))
 
     db.commit()
+    permission_cache.invalidate_user(user_id)
     db.refresh(usuario)
     return {"message": f"Permisos agregados exitosamente: {nuevos}"}
 
@@ -435,6 +454,7 @@ def remove_permissions_from_user_service(db: Session, user: dict, user_id: int,
     ))
 
     db.commit()
+    permission_cache.invalidate_user(user_id)
     db.refresh(usuario)
     return {"message": "Permisos eliminados exitosamente"}
 
@@ -479,6 +499,7 @@ def add_permissions_to_role_service(db: Session, user: dict, role_id: int, permi
         after={"permisos": permisos_despues},
     ))
     db.commit()
+    _invalidate_access_catalog()
     db.refresh(rol)
     return {"message": f"Permisos agregados exitosamente: {nuevos}"}
 
@@ -511,6 +532,7 @@ def remove_permissions_from_role_service(db: Session, user: dict, role_id: int,
         after={"permisos": permisos_despues},
     ))
     db.commit()
+    _invalidate_access_catalog()
     db.refresh(rol)
     return {"message": "Permisos eliminados exitosamente"}
 
@@ -3,7 +3,8 @@ from sqlalchemy.orm import Session
 from starlette import status
 
 from app.infrastructure.models import Activo, Catalog, CatalogItem, Areas,Usuario
-from sqlalchemy import or_, func
+from sqlalchemy import or_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 
 from app.schemas.assets import ActivoCreate, ActivoUpdate
@@ -204,4 +205,56 @@ def list_assets_paged(
         .offset(off)
         .all()
     )
-    return items, total
\ No newline at end of file
+    return items, total
+
+async def alist_assets_paged(
+    db: AsyncSession,
+    user: dict,
+    q: Optional[str] = None,
+    limit: int = 25,
+    offset: int = 0,
+) -> Tuple[list[Activo], int]:
+    """Versión async de list_assets_paged (misma consulta, misma paginación)."""
+    base = select(Activo).where(
+        Activo.empresa_id == user["empresa_id"],
+        Activo.deleted_at.is_(None),
+    )
+
+    if q:
+        like = f"%{q.strip()}%"
+        base = base.where(
+            or_(
+                Activo.nombre.ilike(like),
+                Activo.descripcion.ilike(like),
+                Activo.ubicacion.ilike(like),
+                Activo.marca.ilike(like),
+            )
+        )
+
+    total = await db.scalar(base.with_only_columns(func.count(), maintain_column_froms=True)) or 0
+
+    lim = max(1, min(200, int(limit)))
+    off = max(0, int(offset))
+    items = (await db.scalars(
+        base.order_by(Activo.activo_id.desc()).limit(lim).offset(off)
+    )).all()
+    return list(items), total
+
+
+async def alist_asset_owners(db: AsyncSession, empresa_id: int, area_id: Optional[int] = None,
+                             q: Optional[str] = None) -> list[Usuario]:
+    """Usuarios de la empresa que pueden ser propietarios de un activo."""
+    stmt = select(Usuario).where(Usuario.empresa_id == empresa_id)
+    if area_id is not None:
+        stmt = stmt.where(Usuario.area_id == area_id)
+    if q:
+        like = f"%{q}%"
+        stmt = stmt.where(
+            or_(
+                Usuario.first_name.ilike(like),
+                Usuario.last_name.ilike(like),
+                Usuario.email.ilike(like),
+            )
+        )
+    rows = await db.scalars(stmt.order_by(Usuario.first_name, Usuario.last_name))
+    return list(rows.all())
@@ -0,0 +1,208 @@
+# app/services/audit_service.py
+"""
+Lectura de iso.audit_log: expande las referencias a iso.audit_blob,
+reconstruye el estado completo de un registro a partir de su historial y
+sirve las consultas del router /audit.
+
+Las páginas usan keyset sobre (created_at, id): el cursor es la llave de la
+última fila entregada, así cada página cuesta lo mismo sin importar qué tan
+atrás esté y el filtro por fecha recorta las particiones mensuales.
+
+Los registros compactos omiten las columnas en NULL de altas y bajas; al
+reconstruir, una tabla mapeada por el ORM completa esas columnas con None. Si
+el historial empieza con un cambio (la fila es anterior a la auditoría), el
+estado sólo tiene las columnas que aparecen en los cambios.
+"""
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime
+from typing import AsyncIterator, Callable
+
+from fastapi import HTTPException, status
+from sqlalchemy import literal, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.infrastructure.audit_blobs import blob_refs, expand_values, load_blobs
+from app.infrastructure.base import Base
+from app.infrastructure.db import SessionLocal
+from app.infrastructure.executor import run_blocking
+from app.infrastructure.models import AuditLog
+from app.schemas.audit import AuditLogFilters
+from app.services.auth_service import check_auth_and_roles
+from app.utils.keyset import decode_cursor, encode_cursor
+
+AUDIT_READ_ROLES = ["Administrador"]
+AUDIT_EXPORT_CHUNK = int(os.getenv("AUDIT_EXPORT_CHUNK", "1000"))
+
+
+def _column_keys(table_name: str) -> tuple:
+    for mapper in Base.registry.mappers:
+        if mapper.local_table.name == table_name:
+            return tuple(attr.key for attr in mapper.column_attrs)
+    # Registros escritos a mano (p. ej. usuario_rol): sólo las llaves que traen
+    return ()
+
+
+def _entry(row: AuditLog) -> dict:
+    return {
+        "id": row.id,
+        "created_at": row.created_at,
+        "table_name": row.table_name,
+        "operation": row.operation,
+        "target_pk_id": row.target_pk_id,
+        "target_pk": row.target_pk,
+        "actor": row.actor,
+        "before": row.before,
+        "after": row.after,
+    }
+
+
+def expand_entries(db: Session, rows) -> list[dict]:
+    """Registros como dicts con before/after ya sin referencias (una sola consulta a audit_blob)."""
+    entries = [_entry(row) for row in rows]
+    blobs = load_blobs(db, (h for e in entries for values in (e["before"], e["after"]) for h in blob_refs(values)))
+    for entry in entries:
+        entry["before"] = expand_values(entry["before"], blobs)
+        entry["after"] = expand_values(entry["after"], blobs)
+    return entries
+
+
+def history_stmt(table_name: str, target_pk_id: int, until: datetime | None = None):
+    stmt = select(AuditLog).where(AuditLog.table_name == table_name, AuditLog.target_pk_id == target_pk_id)
+    if until is not None:
+        stmt = stmt.where(AuditLog.created_at <= until)
+    return stmt.order_by(AuditLog.created_at, AuditLog.id)
+
+
+def apply_entry(state: dict | None, entry: dict, columns: tuple) -> dict | None:
+    """Estado del registro después de `entry` (None si quedó borrado)."""
+    if entry["operation"] == "DELETE":
+        return None
+    if entry["operation"] == "CREATE":
+        return {**dict.fromkeys(columns), **(entry["after"] or {})}
+    if state is None:
+        state = dict(entry["before"] or {})
+    return {**state, **(entry["after"] or {})}
+
+
+def reconstruct_history(db: Session, table_name: str, target_pk_id: int,
+                        until: datetime | None = None) -> list[dict]:
+    """Historial expandido; cada registro lleva en "state" el estado completo después de aplicarlo."""
+    entries = expand_entries(db, db.execute(history_stmt(table_name, target_pk_id, until)).scalars())
+    columns = _column_keys(table_name)
+    state = None
+    for entry in entries:
+        if entry["operation"] == "DELETE" and entry["before"] is not None:
+            entry["before"] = {**dict.fromkeys(columns), **entry["before"]}
+        state = apply_entry(state, entry, columns)
+        entry["state"] = state
+    return entries
+
+
+def snapshot_at(db: Session, table_name: str, target_pk_id: int, at: datetime | None = None) -> dict | None:
+    """Estado del registro en `at` (el último si es None); None si no existía o estaba borrado."""
+    history = reconstruct_history(db, table_name, target_pk_id, at)
+    return history[-1]["state"] if history else None
+
+
+# region Consultas /audit
+def _decode_audit_cursor(cursor: str) -> tuple[datetime, int]:
+    created_at, audit_id = decode_cursor(cursor, 2)
+    try:
+        return datetime.fromisoformat(created_at), int(audit_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+
+
+def audit_page_stmt(filters: AuditLogFilters, after: tuple[datetime, int] | None = None,
+                    limit: int = 50, descending: bool = True):
+    stmt = select(AuditLog)
+    if filters.table_name:
+        stmt = stmt.where(AuditLog.table_name == filters.table_name)
+    if filters.operation:
+        stmt = stmt.where(AuditLog.operation == filters.operation.value)
+    if filters.actor:
+        stmt = stmt.where(AuditLog.actor == filters.actor)
+    if filters.target_pk_id is not None:
+        stmt = stmt.where(AuditLog.target_pk_id == filters.target_pk_id)
+    if filters.date_from:
+        stmt = stmt.where(AuditLog.created_at >= filters.date_from)
+    if filters.date_to:
+        stmt = stmt.where(AuditLog.created_at < filters.date_to)
+    key = tuple_(AuditLog.created_at, AuditLog.id)
+    if after is not None:
+        bound = tuple_(literal(after[0], AuditLog.created_at.type), literal(after[1]))
+        # La comparación de filas no recorta particiones; la condición sobre created_at sí
+        if descending:
+            stmt = stmt.where(key < bound, AuditLog.created_at <= after[0])
+        else:
+            stmt = stmt.where(key > bound, AuditLog.created_at >= after[0])
+    if descending:
+        stmt = stmt.order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+    else:
+        stmt = stmt.order_by(AuditLog.created_at, AuditLog.id)
+    return stmt.limit(limit)
+
+
+def list_audit_service(db: Session, user: dict, filters: AuditLogFilters,
+                       cursor: str | None = None, limit: int = 50) -> dict:
+    """Página de registros, del más reciente al más viejo."""
+    check_auth_and_roles(user, AUDIT_READ_ROLES)
+    after = _decode_audit_cursor(cursor) if cursor else None
+    rows = db.execute(audit_page_stmt(filters, after, limit + 1)).scalars().all()
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1].created_at.isoformat(), page[-1].id) if len(rows) > limit else None
+    return {"items": expand_entries(db, page), "next_cursor": next_cursor}
+
+
+def entity_state_service(db: Session, user: dict, table_name: str, target_pk_id: int,
+                         at: datetime | None = None) -> dict:
+    check_auth_and_roles(user, AUDIT_READ_ROLES)
+    history = reconstruct_history(db, table_name, target_pk_id, at)
+    if not history:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="No hay historial de auditoría para el registro")
+    last = history[-1]
+    state = last.pop("state")
+    return {
+        "table_name": table_name,
+        "target_pk_id": target_pk_id,
+        "at": at,
+        "exists": state is not None,
+        "state": state,
+        "last_change": last,
+        "changes": len(history),
+    }
+
+
+def export_chunk(filters: AuditLogFilters, after: tuple[datetime, int] | None, limit: int,
+                 session_factory: Callable[[], Session] = SessionLocal) -> list[dict]:
+    # Sesión propia por bloque: la exportación puede durar más que la petición que la abrió
+    db = session_factory()
+    try:
+        return expand_entries(db, db.execute(audit_page_stmt(filters, after, limit, descending=False)).scalars())
+    finally:
+        db.close()
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"No serializable: {type(value).__name__}")
+
+
+async def aiter_audit_ndjson(filters: AuditLogFilters, chunk: int = AUDIT_EXPORT_CHUNK,
+                             session_factory: Callable[[], Session] = SessionLocal) -> AsyncIterator[bytes]:
+    """Todos los registros que cumplen los filtros, del más viejo al más reciente, una línea JSON por registro."""
+    after = None
+    while True:
+        entries = await run_blocking(export_chunk, filters, after, chunk, session_factory)
+        if entries:
+            yield "".join(json.dumps(e, default=_json_default, ensure_ascii=False) + "\n"
+                          for e in entries).encode("utf-8")
+        if len(entries) < chunk:
+            return
+        after = (entries[-1]["created_at"], entries[-1]["id"])
+# endregion
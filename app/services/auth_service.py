@@ -4,8 +4,10 @@ from fastapi import Depends, HTTPException, BackgroundTasks, UploadFile
 import os
 from datetime import timedelta, timezone,datetime
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
 from app.infrastructure.db import get_db
+from app.infrastructure.executor import run_blocking
+from app.infrastructure.password_hasher import password_hasher, PasswordPoolSaturated
+from app.infrastructure.query_stats import annotate_request
 from typing import Annotated, List
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
@@ -14,9 +16,13 @@ from starlette import status
 from app.infrastructure.models import Usuario, Rol, Permiso, UsuarioPermiso, RolPermiso, Empresa, Areas, usuario_rol
 from app.schemas.Dtos.CreateUserRequest import CreateUserRequest
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func
+from sqlalchemy import func, select, union
 
-from app.services.google_cloud_aservice import upload_file_to_gcs
+from app.services.google_cloud_aservice import upload_file_to_gcs, extract_blob_name
+from app.services.permission_cache import permission_cache, UserAccess
+from app.services.permission_registry import permission_registry, StaleTokenRegistry, JWT_COMPACT_CLAIMS
+from app.services.signature_cache import signature_cache
+from app.services.token_cache import token_cache, decode_jwt, signing_key_id
 from app.utils.send_email import send_email_password
 
 load_dotenv()
@@ -26,7 +32,8 @@ db_dependency = Annotated[Session, Depends(get_db)]
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Contexto bcrypt con el costo de BCRYPT_ROUNDS; los hash y verificaciones pasan por password_hasher
+bcrypt_context = password_hasher.context
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 def _truncate_password(password: str) -> str:
@@ -35,13 +42,44 @@ def _truncate_password(password: str) -> str:
     return password_bytes.decode('utf-8', errors='ignore')
 
 
-def authenticate_user(email: str, password: str, db):
-    user = db.query(Usuario).filter(Usuario.email == email).first()
+def _password_pool_saturated(e: PasswordPoolSaturated) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Demasiadas solicitudes de autenticación, intenta de nuevo en unos segundos.",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def hash_password(password: str) -> str:
+    try:
+        return password_hasher.hash(_truncate_password(password))
+    except PasswordPoolSaturated as e:
+        raise _password_pool_saturated(e) from e
+
+
+def _save_rehashed_password(db: Session, user: Usuario, new_hash: str) -> None:
+    # El costo de BCRYPT_ROUNDS cambió: se guarda el hash recalculado con la contraseña ya validada
+    user.hashed_password = new_hash
+    db.commit()
+
+
+async def aauthenticate_user(email: str, password: str, db: Session):
+    """
+    Valida email y contraseña; devuelve el usuario o False. La consulta va al pool
+    de run_blocking y bcrypt al pool de password_hasher, sin ocupar un hilo mientras espera.
+    """
+    user = await run_blocking(lambda: db.query(Usuario).filter(Usuario.email == email).first())
     if not user:
         return False
-    password = _truncate_password(password)
-    if not bcrypt_context.verify(password, user.hashed_password):
+    try:
+        valid, new_hash = await password_hasher.averify_and_update(_truncate_password(password),
+                                                                  user.hashed_password)
+    except PasswordPoolSaturated as e:
+        raise _password_pool_saturated(e) from e
+    if not valid:
         return False
+    if new_hash:
+        await run_blocking(_save_rehashed_password, db, user, new_hash)
     return user
 
 
@@ -51,9 +89,17 @@ def create_access_token(*, payload: dict, expires_delta: timedelta | None = time
     to_encode.update({"exp": int(expires.timestamp())})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def get_current_user(token:Annotated[str, Depends(oauth2_scheme)]):
+def _decode_access_token(token: str) -> dict:
+    return decode_jwt(token, SECRET_KEY, ALGORITHM)
+
+
+# async para evitar un salto al threadpool por petición: verificar el token es CPU y casi
+# siempre sale de token_cache; la única E/S es permission_registry.adecode, que va a BD (async)
+# cuando el registro de la empresa no está en memoria o cambió de versión.
+# FastAPI ya resuelve la dependencia una sola vez por petición (user_dependency y audit_context).
+async def get_current_user(token:Annotated[str, Depends(oauth2_scheme)]):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = token_cache.get_or_decode(token, _decode_access_token, signing_key_id(SECRET_KEY, ALGORITHM))
         email: str = payload.get("email")
         user_id: int = payload.get("sub")
         first_name: str = payload.get("first_name")
@@ -61,12 +107,20 @@ def get_current_user(token:Annotated[str, Depends(oauth2_scheme)]):
         active: bool = payload.get("activo")
         empresa_id: int = payload.get("empresa_id")
         area_id: int = payload.get("area_id")
-        roles: List[str] = payload.get("roles", [])
-        permisos: List[str] = payload.get("permisos", [])
         if email is None or user_id is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail='Could not validate user.')
         if not active:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Inactive user.')
+        # Conjuntos para que ensure_user_roles verifique pertenencia en O(1)
+        if "pv" in payload:
+            try:
+                roles, permisos = await permission_registry.adecode(empresa_id, payload)
+            except StaleTokenRegistry:
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Could not validate user.')
+        else:
+            roles = frozenset(payload.get("roles", []))
+            permisos = frozenset(payload.get("permisos", []))
+        annotate_request(empresa_id=empresa_id)
         return {
             'user_id': user_id,
             'email': email,
@@ -99,7 +153,7 @@ def create_user(db: Session, cr_user: CreateUserRequest) -> Usuario:
             detail="El correo ya está registrado para esta empresa.",
         )
 
-    hashed_password = bcrypt_context.hash(_truncate_password(cr_user.password))
+    hashed_password = hash_password(cr_user.password)
     user = Usuario(
         empresa_id=cr_user.empresa_id,
         area_id=cr_user.area_id,
@@ -143,7 +197,7 @@ def buscar_usuarios(db: Session, usuario_id: int | None = None):
         query = query.filter(Usuario.usuario_id == usuario_id)
     return [dict(row._mapping) for row in query.all()]
 
-def obtener_roles_usuario(db: Session, usuario_id: int) -> list[str]:
+def _roles_usuario(db: Session, usuario_id: int) -> list[str]:
     roles = (
         db.query(Rol.nombre)
         .join(usuario_rol, Rol.rol_id == usuario_rol.c.rol_id)
@@ -155,20 +209,53 @@ def obtener_roles_usuario(db: Session, usuario_id: int) -> list[str]:
     )
     return [str(r[0]) for r in roles]
 
-def obtener_permisos_usuario(db: Session, usuario_id: int) -> list[str]:
-    permisos = (
-        db.query(Permiso.codigo)
+def permisos_efectivos_stmt(usuario_id: int):
+    """
+    Permisos de los roles activos del usuario más sus permisos directos concedidos,
+    menos los que tiene negados (usuario_permiso.concedido = false). Cada rama usa
+    la PK de su tabla (usuario_rol, rol_permiso, usuario_permiso empiezan por el id buscado).
+    """
+    por_rol = (
+        select(RolPermiso.permiso_id)
+        .join(usuario_rol, usuario_rol.c.rol_id == RolPermiso.rol_id)
+        .join(Rol, Rol.rol_id == RolPermiso.rol_id)
+        .where(usuario_rol.c.usuario_id == usuario_id, Rol.activo.is_(True))
+    )
+    directos = select(UsuarioPermiso.permiso_id).where(
+        UsuarioPermiso.usuario_id == usuario_id, UsuarioPermiso.concedido.is_(True))
+    negados = select(UsuarioPermiso.permiso_id).where(
+        UsuarioPermiso.usuario_id == usuario_id, UsuarioPermiso.concedido.is_(False))
+    return (
+        select(Permiso.codigo)
         .distinct()
-        .join(UsuarioPermiso, Permiso.permiso_id == UsuarioPermiso.permiso_id)
-        .join(usuario_rol, UsuarioPermiso.usuario_id == usuario_rol.c.usuario_id)
-        .join(RolPermiso, usuario_rol.c.rol_id == RolPermiso.rol_id)
-        .filter(
-            (UsuarioPermiso.usuario_id == usuario_id) & (UsuarioPermiso.concedido.is_(True)) |
-            (usuario_rol.c.usuario_id == usuario_id)
+        .where(
+            Permiso.permiso_id.in_(union(por_rol, directos)),
+            Permiso.permiso_id.not_in(negados),
+            Permiso.activo.is_(True),
         )
-        .all()
+        .order_by(Permiso.codigo)
     )
-    return [str(p[0]) for p in permisos]
+
+def get_user_access(db: Session, usuario_id: int) -> UserAccess:
+    """Roles y permisos efectivos del usuario, desde permission_cache."""
+    return permission_cache.get_or_load(usuario_id, lambda: UserAccess(
+        roles=tuple(_roles_usuario(db, usuario_id)),
+        permisos=tuple(str(p) for p in db.execute(permisos_efectivos_stmt(usuario_id)).scalars()),
+    ))
+
+def access_token_claims(db: Session, usuario: Usuario) -> dict:
+    """Roles y permisos para el JWT: bitsets del registro de la empresa, o listas si JWT_COMPACT_CLAIMS=0."""
+    access = get_user_access(db, usuario.usuario_id)
+    if not JWT_COMPACT_CLAIMS:
+        return {"roles": list(access.roles), "permisos": list(access.permisos)}
+    registry = permission_registry.for_encoding(db, usuario.empresa_id, access.roles, access.permisos)
+    return registry.encode(access.roles, access.permisos)
+
+def obtener_roles_usuario(db: Session, usuario_id: int) -> list[str]:
+    return list(get_user_access(db, usuario_id).roles)
+
+def obtener_permisos_usuario(db: Session, usuario_id: int) -> list[str]:
+    return list(get_user_access(db, usuario_id).permisos)
 
 def reset_password_service(token: str, new_password: str, confirm_password: str, db: Session):
     print(f"[DEBUG] Token recibido para reset: {token}")  # Log para depuración
@@ -184,7 +271,7 @@ def reset_password_service(token: str, new_password: str, confirm_password: str,
     user = db.query(Usuario).filter(Usuario.usuario_id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    user.hashed_password = bcrypt_context.hash(_truncate_password(new_password))
+    user.hashed_password = hash_password(new_password)
     db.commit()
     return {"mensaje": "Contraseña actualizada correctamente"}
 
@@ -210,7 +297,8 @@ def ensure_authenticated(user: dict):
             detail="Invalid authentication credentials"
         )
 def ensure_user_roles(user: dict, roles: List[str]):
-    if not any(role in roles for role in user.get("roles", [])):
+    user_roles = user.get("roles") or ()
+    if not any(role in user_roles for role in roles):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
@@ -258,6 +346,7 @@ def upload_firma_service(db: Session, user: dict, file: UploadFile) -> str:
     if not db_user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
+    firma_anterior = db_user.url_firma
     db_user.url_firma = public_url
     try:
         db.commit()
@@ -266,4 +355,7 @@ def upload_firma_service(db: Session, user: dict, file: UploadFile) -> str:
         db.rollback()
         raise HTTPException(status_code=500, detail="Error guardando URL en el usuario") from e
 
+    # la firma anterior ya no se usará para estampar
+    signature_cache.invalidate(extract_blob_name(firma_anterior))
+
     return public_url
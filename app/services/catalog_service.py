@@ -0,0 +1,28 @@
+from __future__ import annotations
+from typing import List
+
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.infrastructure.models import Catalog, CatalogItem
+
+
+def catalog_items_stmt(catalog_key: str, empresa_id: int):
+    """
+    Ítems activos de un catálogo: GLOBAL (empresa_id IS NULL) + específicos de la empresa,
+    ordenados por sort_order y name.
+    """
+    return (
+        select(CatalogItem)
+        .join(Catalog, Catalog.catalog_id == CatalogItem.catalog_id)
+        .where(Catalog.catalog_key == catalog_key)
+        .where(CatalogItem.active.is_(True))
+        .where(CatalogItem.deleted_at.is_(None))
+        .where(or_(CatalogItem.empresa_id.is_(None), CatalogItem.empresa_id == empresa_id))
+        .order_by(CatalogItem.sort_order, CatalogItem.name)
+    )
+
+
+async def list_catalog_items(db: AsyncSession, catalog_key: str, empresa_id: int) -> List[CatalogItem]:
+    result = await db.execute(catalog_items_stmt(catalog_key, empresa_id))
+    return list(result.scalars().all())
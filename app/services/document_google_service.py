@@ -1,32 +1,32 @@
 import re
 
 from fastapi import UploadFile, HTTPException
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from sqlalchemy import func
+from sqlalchemy import func, or_, select, true, tuple_
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, aliased
 from starlette import status
 from datetime import datetime
-from io import BytesIO
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
-from PyPDF2 import PdfReader, PdfWriter
 import os
-from google.cloud import storage
-from PIL import Image as PILImage
-import io
 
 from app.infrastructure.models import Documento, CatalogItem, DocumentoVersion, Areas, Usuario, ComentarioRevision, \
     Empresa
 from app.schemas.Dtos.DocumentDtos import DocumentCreateDto, DocumentVersionDto, ComentarioRevisionDto, \
-    NotificationEmailDto
+    NotificationEmailDto, DocumentListFiltersDto
+from app.infrastructure.email_outbox import get_email_outbox
+from app.infrastructure.stamp_queue import get_stamp_queue
 from app.services.auth_service import check_auth_and_roles
-from app.services.google_cloud_aservice import upload_file_to_gcs, generate_signed_url
+from app.services.google_cloud_aservice import upload_stream, generate_signed_url, extract_blob_name
+from app.services.storage_service import get_storage, ObjectNotFound
+from app.services.pdf_stamp_service import StampablePdf
+from app.services.signature_cache import signature_cache
+from app.services.signed_url_cache import signed_url_cache
+from app.services.stamp_template import StampTimer, get_overlay_template, render_status_overlay
 from app.utils.documents_utils import generar_codigo_documento
+from app.utils.keyset import decode_cursor, encode_cursor
 from urllib.parse import urlparse
 
-from app.utils.send_email import send_email_notification
+from app.utils.send_email import render_notification
 
 
 def serialize_for_json(data):
@@ -87,7 +87,7 @@ def create_documents_service(db: Session, user: dict, document_data: DocumentCre
 
     valor: str = code_document_type.code
     code_document = generar_codigo_documento(db, valor)
-    file_url = upload_file_to_gcs(file, f"{code_document}-v1.pdf")
+    uploaded = upload_stream(file, f"{code_document}-v1.pdf")
     # file_url = f"{code_document}-v1.pdf"
     # Crear nuevo documento
     new_document = Documento(
@@ -111,21 +111,27 @@ def create_documents_service(db: Session, user: dict, document_data: DocumentCre
         creado_en=datetime.now(),
         revisado_por_id=document_data.revisado_por_id,
         aprobado_por_id=document_data.aprobado_por_id,
-        archivo_url=file_url
+        archivo_url=uploaded.url,
+        archivo_sha256=uploaded.sha256,
+        archivo_bytes=uploaded.size
     )
     db.add(new_version)
 
     try:
-        db.commit()
-        send_document_notifications(db=db, version_id=new_version.version_id)
-        _overlay_pdf_with_status_image(
+        db.flush()
+        # El estampado se encola en la misma transacción y lo procesa el worker
+        get_stamp_queue().enqueue(
             db,
-            new_version.archivo_url,
-            initial_state.item_id,
+            version_id=new_version.version_id,
+            archivo_url=new_version.archivo_url,
+            status_item_id=initial_state.item_id,
             signer_name=str(document_data.creador_id),
-            fecha=datetime.now( ),
+            fecha=datetime.now(),
             nombre_documento=document_data.nombre
         )
+        # Las notificaciones también viajan en la transacción; las envía el worker de correo
+        send_document_notifications(db=db, version_id=new_version.version_id)
+        db.commit()
 
     except IntegrityError as e:
         db.rollback()
@@ -137,59 +143,167 @@ def create_documents_service(db: Session, user: dict, document_data: DocumentCre
     return "Documento creado correctamente"
 
 
-def get_documents_service(db: Session, user: dict):
-    rol = user.get('rol')
-    usuario_id = user.get('usuario_id')
-    area_id = user.get('area_id')
-    empresa_id = user.get('empresa_id')
+# El id de "Aprobado" se resuelve dentro de la misma consulta del listado
+_APROBADO_ID = select(CatalogItem.item_id).where(CatalogItem.name == "Aprobado").limit(1).scalar_subquery()
+
+DOCUMENTS_PAGE_MAX = 200
+DOCUMENTS_ADMIN_ROLES = ("admin", "Administrador")
+
+
+def _visible_version(user: dict, version):
+    """
+    Condición de visibilidad por rol sobre `version` (DocumentoVersion o su alias); None si ve todo.
+    `user` es el dict de get_current_user: roles (conjunto) y user_id. Quien no es
+    Administrador ve los documentos aprobados; "Usuario Estándar" además los de su
+    área y las versiones que revisa o aprueba.
+    """
+    roles = user.get('roles') or ()
+    if any(rol in roles for rol in DOCUMENTS_ADMIN_ROLES):
+        return None
 
-    # Obtener item_id de estados
-    aprobado_state = db.query(CatalogItem).filter(CatalogItem.name == "Aprobado").first()
-    aprobado_id = aprobado_state.item_id if aprobado_state else None
+    if "Usuario Estándar" in roles:
+        condiciones = [Documento.area_responsable_item_id == user.get('area_id'),
+                       version.estado_item_id == _APROBADO_ID]
+        if user.get('user_id') is not None:
+            # "sub" del JWT viaja como texto
+            user_id = int(user['user_id'])
+            condiciones += [version.revisado_por_id == user_id, version.aprobado_por_id == user_id]
+        return or_(*condiciones)
+    # Alta Dirección y demás roles; sin estado "Aprobado" en el catálogo no se filtra
+    return or_(_APROBADO_ID.is_(None), version.estado_item_id == _APROBADO_ID)
+
+
+def _like_pattern(text: str) -> str:
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _documents_list_stmt(user: dict, filters: DocumentListFiltersDto | None = None):
+    """
+    Listado de documentos de la empresa en una sola consulta. Con filters.latest
+    cada documento aporta sólo su última versión visible para el usuario, elegida
+    con un LATERAL (... ORDER BY numero_version DESC LIMIT 1) sobre el índice
+    (documento_id, numero_version); sin filters se listan todas las versiones.
+    """
+    empresa_id = user.get('empresa_id')
 
     tipo_item = aliased(CatalogItem)
     clasificacion_item = aliased(CatalogItem)
     estado_item = aliased(CatalogItem)
 
-    query = (
-        db.query(
+    if filters is not None and filters.latest:
+        latest = (select(DocumentoVersion)
+                  .where(DocumentoVersion.documento_id == Documento.documento_id)
+                  .order_by(DocumentoVersion.numero_version.desc())
+                  .limit(1))
+        visible = _visible_version(user, DocumentoVersion)
+        if visible is not None:
+            latest = latest.where(visible)
+        version = aliased(DocumentoVersion, latest.lateral("ultima_version"))
+        version_join = true()
+    else:
+        version = DocumentoVersion
+        version_join = DocumentoVersion.documento_id == Documento.documento_id
+
+    stmt = (
+        select(
             Documento.codigo,
             Documento.nombre,
             Documento.documento_id,
-            DocumentoVersion.numero_version,
+            version.numero_version,
             tipo_item.name.label("tipo"),
             Areas.nombre.label("area"),
             estado_item.name.label("estado"),
             clasificacion_item.name.label("clasificacion"),
             func.to_char(Documento.created_at, 'DD-MM-YY').label("creado"),
-            DocumentoVersion.version_id,
-            DocumentoVersion.archivo_url.label("url")
+            version.version_id,
+            version.archivo_url.label("url")
         )
-        .join(DocumentoVersion, DocumentoVersion.documento_id == Documento.documento_id)
+        .select_from(Documento)
+        .join(version, version_join)
         .join(tipo_item, tipo_item.item_id == Documento.tipo_item_id)
         .join(Areas, Areas.area_id == Documento.area_responsable_item_id)
         .join(clasificacion_item, clasificacion_item.item_id == Documento.clasificacion_item_id)
-        .join(estado_item, estado_item.item_id == DocumentoVersion.estado_item_id)
-        .filter(Documento.empresa_id == empresa_id)  # Filtro por empresa para seguridad
+        .join(estado_item, estado_item.item_id == version.estado_item_id)
+        .where(Documento.empresa_id == empresa_id)  # Filtro por empresa para seguridad
     )
 
-    if rol == "Usuario Estándar":
-        query = query.filter(
-            (Documento.area_responsable_item_id == area_id) |
-            (DocumentoVersion.estado_item_id == aprobado_id) |
-            (DocumentoVersion.revisado_por_id == usuario_id) |
-            (DocumentoVersion.aprobado_por_id == usuario_id)
+    if filters is None or not filters.latest:
+        visible = _visible_version(user, version)
+        if visible is not None:
+            stmt = stmt.where(visible)
+
+    if filters is not None:
+        if filters.tipo_item_id is not None:
+            stmt = stmt.where(Documento.tipo_item_id == filters.tipo_item_id)
+        if filters.area_id is not None:
+            stmt = stmt.where(Documento.area_responsable_item_id == filters.area_id)
+        if filters.clasificacion_item_id is not None:
+            stmt = stmt.where(Documento.clasificacion_item_id == filters.clasificacion_item_id)
+        if filters.estado_item_id is not None:
+            stmt = stmt.where(version.estado_item_id == filters.estado_item_id)
+        if filters.q:
+            pattern = _like_pattern(filters.q.strip())
+            stmt = stmt.where(or_(Documento.nombre.ilike(pattern, escape="\\"),
+                                  Documento.codigo.ilike(pattern, escape="\\")))
+    return stmt, version
+
+
+def _decode_documents_cursor(cursor: str) -> tuple[int, int]:
+    documento_id, numero_version = decode_cursor(cursor, 2)
+    try:
+        return int(documento_id), int(numero_version)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+
+
+def _documents_page_stmt(user: dict, filters: DocumentListFiltersDto, cursor: str | None, limit: int):
+    """Página keyset: documentos más nuevos primero, y dentro de cada uno la versión más alta."""
+    stmt, version = _documents_list_stmt(user, filters)
+    if cursor:
+        documento_id, numero_version = _decode_documents_cursor(cursor)
+        stmt = stmt.where(
+            # La primera condición deja usar el índice (empresa_id, documento_id) como rango
+            Documento.documento_id <= documento_id,
+            tuple_(Documento.documento_id, version.numero_version) < tuple_(documento_id, numero_version),
         )
-    elif rol == "Alta Dirección":
-        if aprobado_id:
-            query = query.filter(DocumentoVersion.estado_item_id == aprobado_id)
+    return (stmt.order_by(Documento.documento_id.desc(), version.numero_version.desc())
+            .limit(min(limit, DOCUMENTS_PAGE_MAX) + 1))
+
+
+def _documents_page(rows, limit: int) -> dict:
+    limit = min(limit, DOCUMENTS_PAGE_MAX)
+    items = [dict(r._mapping) for r in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(items[-1]["documento_id"], items[-1]["numero_version"])
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def get_documents_service(db: Session, user: dict):
+    stmt, _ = _documents_list_stmt(user)
+    resultados = db.execute(stmt).all()
+    return [dict(r._mapping) for r in resultados]
 
-    # Para Administrador, no se aplica filtro adicional
 
-    resultados = query.all()
+async def aget_documents_service(db: AsyncSession, user: dict):
+    """Versión async de get_documents_service para el listado (GET /)."""
+    stmt, _ = _documents_list_stmt(user)
+    resultados = (await db.execute(stmt)).all()
     return [dict(r._mapping) for r in resultados]
 
 
+def get_documents_page_service(db: Session, user: dict, filters: DocumentListFiltersDto,
+                               cursor: str | None = None, limit: int = 50):
+    return _documents_page(db.execute(_documents_page_stmt(user, filters, cursor, limit)).all(), limit)
+
+
+async def aget_documents_page_service(db: AsyncSession, user: dict, filters: DocumentListFiltersDto,
+                                      cursor: str | None = None, limit: int = 50):
+    """Listado paginado (GET /page) por la capa async."""
+    return _documents_page((await db.execute(_documents_page_stmt(user, filters, cursor, limit))).all(), limit)
+
+
 def get_document_by_id_service(db: Session, document_id: int):
     tipo_item = aliased(CatalogItem)
     clasificacion_item = aliased(CatalogItem)
@@ -231,9 +345,9 @@ def get_document_by_id_service(db: Session, document_id: int):
     return dict(resultado._mapping) if resultado else None
 
 
-def view_document_service(db: Session, version_id: int) -> str:
+def get_version_blob_name(db: Session, version_id: int) -> str:
     """
-    Devuelve una URL firmada para visualizar el documento.
+    Devuelve el nombre del blob del PDF de una versión.
     """
     document_version = (
         db.query(DocumentoVersion.archivo_url)
@@ -247,8 +361,14 @@ def view_document_service(db: Session, version_id: int) -> str:
             detail="Documento no encontrado."
         )
     parsed_url = urlparse(document_version.archivo_url)
-    blob_name = parsed_url.path.split('/')[-1]
-    return generate_signed_url(blob_name)
+    return parsed_url.path.split('/')[-1]
+
+
+def view_document_service(db: Session, version_id: int) -> str:
+    """
+    Devuelve una URL firmada para visualizar el documento.
+    """
+    return generate_signed_url(get_version_blob_name(db, version_id))
 
 
 def create_document_version_service(db: Session, user: dict, document_code: str, document_data: DocumentVersionDto,
@@ -302,7 +422,7 @@ def create_document_version_service(db: Session, user: dict, document_code: str,
 
     # Generar nombre del archivo con versión
     file_name = f"{existing_document.codigo}-v{new_version_number}.pdf"
-    file_url = upload_file_to_gcs(file, file_name)
+    uploaded = upload_stream(file, file_name)
 
     # Obtener estado inicial (similar a create_documents_service)
     initial_state = db.query(CatalogItem).filter(CatalogItem.name == "En revisión").first()
@@ -318,21 +438,26 @@ def create_document_version_service(db: Session, user: dict, document_code: str,
         creado_en=datetime.now(),
         revisado_por_id=document_data.revisado_por_id,
         aprobado_por_id=document_data.aprobador_por_id,
-        archivo_url=file_url
+        archivo_url=uploaded.url,
+        archivo_sha256=uploaded.sha256,
+        archivo_bytes=uploaded.size
     )
     db.add(new_version)
 
     try:
-        db.commit()
-        send_document_notifications(db=db, version_id=new_version.version_id)
-        _overlay_pdf_with_status_image(
+        db.flush()
+        get_stamp_queue().enqueue(
             db,
-            file_url,
-            initial_state.item_id,
+            version_id=new_version.version_id,
+            archivo_url=uploaded.url,
+            status_item_id=initial_state.item_id,
             signer_name=str(document_data.creador_id),
             fecha=datetime.now(),
-            nombre_documento=document_data.nombre
+            nombre_documento=existing_document.nombre
         )
+        # Las notificaciones también viajan en la transacción; las envía el worker de correo
+        send_document_notifications(db=db, version_id=new_version.version_id)
+        db.commit()
 
     except IntegrityError as e:
         db.rollback()
@@ -345,6 +470,10 @@ def create_document_version_service(db: Session, user: dict, document_code: str,
 
 
 def send_document_notifications(db: Session, version_id: int):
+    """
+    Encola en la bandeja de salida los correos al revisor y al aprobador de la versión
+    (no hace commit). Se deduplican por (versión, destinatario).
+    """
     # Obtener datos de la versión y usuarios involucrados
     version = db.query(DocumentoVersion).filter(DocumentoVersion.version_id == version_id).first()
     documento = db.query(Documento).filter(Documento.documento_id == version.documento_id).first()
@@ -352,6 +481,7 @@ def send_document_notifications(db: Session, version_id: int):
 
     revisor = db.query(Usuario).filter(Usuario.usuario_id == version.revisado_por_id).first()
     aprobador = db.query(Usuario).filter(Usuario.usuario_id == version.aprobado_por_id).first()
+    outbox = get_email_outbox()
 
     # Notificación al revisor
     if revisor:
@@ -364,8 +494,7 @@ def send_document_notifications(db: Session, version_id: int):
             # nombre_usuario=user.get('first_name') + ' ' + user.get('last_name')
             nombre_usuario= revisor.first_name + ' ' + revisor.last_name
         )
-
-        send_email_notification(notification_revisor)
+        _enqueue_notification(db, outbox, version_id, notification_revisor)
 
     # Notificación al aprobador
     if aprobador:
@@ -377,7 +506,13 @@ def send_document_notifications(db: Session, version_id: int):
             nombre_empresa=empresa.nombre_legal,
             nombre_usuario= aprobador.first_name + ' ' + aprobador.last_name
         )
-        send_email_notification(notification_aprobador)
+        _enqueue_notification(db, outbox, version_id, notification_aprobador)
+
+
+def _enqueue_notification(db: Session, outbox, version_id: int, notification: NotificationEmailDto):
+    subject, body_text, body_html = render_notification(notification)
+    outbox.enqueue(db, to_email=notification.to_email, subject=subject, body_text=body_text,
+                   body_html=body_html, version_id=version_id)
 
 
 
@@ -400,22 +535,22 @@ def create_comentario_revision_service(db: Session, user: dict, comentario_data:
         version.estado_item_id = comentario_data.status_item_id
 
     try:
+        if version and version.archivo_url:
+            # El id del comentario distingue cada cambio de estado: volver a aplicar un
+            # estado (p. ej. tras revertirlo) estampa de nuevo aunque el anterior ya terminó
+            db.flush()
+            # la firma sobre el PDF la agrega el worker; el estado se consulta por version_id
+            # pasar el id del usuario como cadena para que _overlay busque por ID
+            get_stamp_queue().enqueue(
+                db,
+                version_id=version.version_id,
+                archivo_url=version.archivo_url,
+                status_item_id=comentario_data.status_item_id,
+                signer_name=str(usuario_id),
+                fecha=datetime.now(),
+                change_id=new_comentario.comentario_id
+            )
         db.commit()
-        # después del commit, intentar modificar el PDF en GCS
-        try:
-            if version and version.archivo_url:
-                # pasar el id del usuario como cadena para que _overlay busque por ID
-                _overlay_pdf_with_status_image(
-                    db,
-                    version.archivo_url,
-                    comentario_data.status_item_id,
-                    signer_name=str(usuario_id),
-                    fecha=datetime.now()
-                )
-        except Exception as e:
-            # no silenciar: devolver error claro para depuración
-            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                                detail=f"Error al agregar la firma al PDF: {e}")
         return "Comentario creado correctamente"
     except IntegrityError as e:
         db.rollback()
@@ -425,6 +560,13 @@ def create_comentario_revision_service(db: Session, user: dict, comentario_data:
         ) from e
 
 
+def get_stamp_jobs_by_version_service(db: Session, version_id: int):
+    """
+    Devuelve el estado de los trabajos de estampado de una versión.
+    """
+    return get_stamp_queue().jobs_for_version(db, version_id)
+
+
 def get_comentarios_by_version_service(db: Session, version_id: int):
     usuario_alias = aliased(Usuario)
     resultados = (
@@ -441,7 +583,13 @@ def get_comentarios_by_version_service(db: Session, version_id: int):
     return [dict(r._mapping) for r in resultados]
 
 
-def _overlay_pdf_with_status_image(db, archivo_url: str, status_item_id: int, signer_name: str = None, fecha: datetime = None,nombre_documento: str | None = None):
+def _overlay_pdf_with_status_image(db, archivo_url: str, status_item_id: int, signer_name: str = None, fecha: datetime = None,nombre_documento: str | None = None,
+                                   if_generation_match: int | None = None):
+    """
+    Estampa nombre, fecha y firma del usuario sobre la primera página del PDF.
+    Si se indica if_generation_match, la descarga y la subida sólo proceden si el blob
+    sigue en esa generación (evita estampar dos veces al reintentar).
+    """
     if not archivo_url:
         return False
 
@@ -473,93 +621,56 @@ def _overlay_pdf_with_status_image(db, archivo_url: str, status_item_id: int, si
     if not usuario_obj or not usuario_obj.url_firma:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no cuenta con firma")
 
-    def _extract_blob_name_from_url(url: str) -> str | None:
-        if not url:
-            return None
-        p = urlparse(url)
-        if p.scheme == "gs":
-            return p.path.lstrip("/")
-        if p.scheme in ("http", "https"):
-            path = p.path.lstrip("/")
-            netloc = (p.netloc or "")
-            if netloc.endswith("storage.googleapis.com"):
-                parts = path.split("/", 1)
-                if len(parts) == 2:
-                    return parts[1]
-                return None
-            if netloc.endswith(".storage.googleapis.com"):
-                return path
-            segments = path.split("/")
-            if len(segments) >= 4 and segments[0] == "b" and segments[2] == "o":
-                return "/".join(segments[3:])
-            bucket_name = os.environ.get("BUCKET_NAME")
-            if bucket_name and path.startswith(f"{bucket_name}/"):
-                return path[len(bucket_name) + 1 :]
-            return path
-        return url
-
-    bucket_name = os.environ.get("BUCKET_NAME")
-    if not bucket_name:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Bucket no configurado")
-
-    client = storage.Client()
+    storage = get_storage()
 
     # Obtener nombre del blob del PDF normalizando la URL
-    pdf_blob_name = _extract_blob_name_from_url(archivo_url)
+    pdf_blob_name = extract_blob_name(archivo_url)
     if not pdf_blob_name:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Nombre de blob del PDF no válido")
 
+    timer = StampTimer(pdf_blob_name)
+
     # Descargar el PDF original
     try:
-        bucket = client.bucket(bucket_name)
-        pdf_blob = bucket.blob(pdf_blob_name)
-        pdf_bytes = pdf_blob.download_as_bytes()
+        with timer.phase("download"):
+            pdf_bytes = storage.read(pdf_blob_name, if_generation_match=if_generation_match)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error descargando PDF: {str(e)}"
         )
 
-    # Descargar la imagen de firma
-    try:
-        firma_blob_name = _extract_blob_name_from_url(usuario_obj.url_firma)
-        if not firma_blob_name:
-            raise ValueError("Nombre de blob de firma no válido")
-
-        blob_firma = bucket.blob(firma_blob_name)
-        signature_bytes = blob_firma.download_as_bytes()
-    except Exception as e:
+    # Firma preprocesada: se toma de la caché o se descarga y procesa una sola vez
+    firma_blob_name = extract_blob_name(usuario_obj.url_firma)
+    if not firma_blob_name:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error descargando firma: {str(e)}"
+            detail="Error descargando firma: Nombre de blob de firma no válido"
         )
 
-    # Procesar la imagen de firma
-    try:
-
-
-        # Abrir imagen y convertir a RGBA
-        img = PILImage.open(io.BytesIO(signature_bytes))
-
-        # Convertir a RGBA si no lo está
-        if img.mode != 'RGBA':
-            img = img.convert('RGBA')
-
-        # Crear un nuevo fondo transparente
-        background = PILImage.new('RGBA', img.size, (255, 255, 255, 0))
-
-        # Combinar imagen con fondo
-        img = PILImage.alpha_composite(background, img)
-
-        # Guardar como PNG en buffer (preserva transparencia)
-        img_buffer = io.BytesIO()
-        img.save(img_buffer, format='PNG', optimize=True)
-        img_buffer.seek(0)
+    def _download_firma():
+        try:
+            return storage.read_with_generation(firma_blob_name)
+        except ObjectNotFound:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error descargando firma: No existe el blob {firma_blob_name}"
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error descargando firma: {str(e)}"
+            )
 
-        # Crear ImageReader desde el buffer
-        img_reader = ImageReader(img_buffer)
-        img_w, img_h = img.size
+    def _firma_generation():
+        firma_stat = storage.stat(firma_blob_name)
+        return firma_stat.generation if firma_stat else None
 
+    try:
+        with timer.phase("signature"):
+            firma = signature_cache.get_or_load(firma_blob_name, _download_firma, _firma_generation)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -568,156 +679,30 @@ def _overlay_pdf_with_status_image(db, archivo_url: str, status_item_id: int, si
 
     # Procesar el PDF
     try:
-        reader = PdfReader(BytesIO(pdf_bytes))
-        if not reader.pages:
-            raise ValueError("PDF sin páginas")
-
-        first_page = reader.pages[0]
-        media = first_page.mediabox
-        page_width = float(media.width)
-        page_height = float(media.height)
-
-        left_margin = 40.0  # margen izquierdo en puntos (ajusta para mover todo a la derecha)
-        right_margin = 20.0
-        column_gap = 2  # px: reducir este valor para disminuir separación entre columnas
-        total_gaps = 2 * column_gap
-        columns_vertical_shift = 130.0
-        available_width = page_width - left_margin - right_margin - total_gaps
-        image_scale_factor = 0.6
-        column_width = available_width / 3.0
-        print(f"Page size: {page_width} x {page_height}")
-        max_image_width_pts = column_width * 0.8
-        if available_width <= 0:
-            raise ValueError("Ancho de página insuficiente para los márgenes/gaps configurados")
-        column_width = available_width / 3.0
-        print(f"Page size: {page_width} x {page_height}")
-        # Calcular dimensiones y posición
-        third_width = page_width / 3.0
-        print(f"third_width {third_width}")
-        target_w = max_image_width_pts * image_scale_factor
-        print(f"target_w {target_w}")
-        scale = target_w / img_w if img_w else 1.0
-        print(f"scale {scale}")
-        target_h = img_h * scale
-        print(f"target_h {target_h}")
-
-        # Reservar espacio para texto encima de la imagen
-        text_space = 36  # espacio total aproximado para nombre y fecha
-        bottom_margin = 30  # distancia desde el borde inferior
-        y = bottom_margin + columns_vertical_shift
-        print(f"y column {y}")
-        # Asegurar que imagen + texto quepan en la página; si no, reducir escala
-        max_allowed_height = page_height - y - text_space - 10
-        if target_h > max_allowed_height and max_allowed_height > 10:
-            scale *= max_allowed_height / target_h
-            target_h = img_h * scale
-            target_w = img_w * scale
-
-        # Posicionar en la columna correspondiente (coordenada X)
-        x = left_margin + column * (column_width + column_gap) + (column_width - target_w) / 2.0
-        print(f"x column {x}")
-        # Y en coordenada de ReportLab: colocar la imagen encima del margen inferior
-
-
-        # Preparar texto
-        fecha = fecha or datetime.now()
-        fecha_str = fecha.strftime("%d-%m-%Y %H:%M")
-
-        # if "aprob" in status_name:
-        #     label = ""
-        # elif "rechaz" in status_name or "no aprobado" in status_name:
-        #     label = ""
-        # else:
-        #     label = ""
-
-        nombre_completo = f"{usuario_obj.first_name} {usuario_obj.last_name}".strip()
-        # display_name = f"{label}{nombre_completo}"
-        display_name = f"{nombre_completo}"
-
-        # Crear overlay
-        packet = BytesIO()
-        c = canvas.Canvas(packet, pagesize=(page_width, page_height))
-        
-        # ====== TÍTULO: NombreDocumento ======
-        if nombre_documento:
-            # Fuente para el título
-            font_name = "Helvetica-Bold"
-            font_size_title = 16
-            c.setFont(font_name, font_size_title)
-
-            # Coordenadas aproximadas del placeholder «NombreDocumento»
-            # (ajusta estos valores a ojo hasta que quede perfecto)
-            title_x = page_width / 2  # centrado
-            title_y = page_height / 2 + 80  # un poco arriba del centro
-
-            # Ancho del texto para poder "borrar" el placeholder de fondo
-            text_width = pdfmetrics.stringWidth(nombre_documento, font_name, font_size_title)
-
-            # Pintar un rectángulo blanco para cubrir «NombreDocumento»
-            c.setFillColorRGB(1, 1, 1)  # blanco
-            c.rect(
-                title_x - text_width / 2 - 10,  # x
-                title_y - 4,                     # y
-                text_width + 20,                 # ancho
-                font_size_title + 8,             # alto
-                fill=1,
-                stroke=0,
-            )
-
-            # Escribir el nombre real del documento
-            c.setFillColorRGB(0, 0, 0)  # negro
-            c.drawCentredString(title_x, title_y, nombre_documento)
-        # ====== FIN TÍTULO ======
-
-        # Dibujar imagen en la parte inferior
-        c.drawImage(
-            img_reader,
-            x, y,
-            width=target_w,
-            height=target_h,
-            mask='auto',
-            preserveAspectRatio=True
-        )
-
-        # Configurar fuente
-        font_size = 10
-        c.setFont("Helvetica", font_size)
-
-        # Calcular posiciones de texto: colocar encima de la imagen
-        text_x = x + target_w / 2.0
-        text_y_name = y + target_h + 8
-        text_y_date = text_y_name + 12
+        with timer.phase("parse"):
+            target_pdf = StampablePdf(pdf_bytes)
+            template = get_overlay_template(*target_pdf.page_size, column)
 
-        # Si el texto supera el alto de la página, reducir tamaño de fuente
-        if text_y_date > page_height - 10:
-            font_size = 8
-            c.setFont("Helvetica", font_size)
-            text_y_name = y + target_h + 6
-            text_y_date = text_y_name + 10
-
-        # Dibujar textos centrados sobre la imagen
-        c.drawCentredString(text_x, text_y_name, display_name)
-        c.drawCentredString(text_x, text_y_date, fecha_str)
-
-        c.save()
-        packet.seek(0)
-
-        # Merge con PDF original
-        overlay_reader = PdfReader(packet)
-        writer = PdfWriter()
+        fecha = fecha or datetime.now()
+        display_name = f"{usuario_obj.first_name} {usuario_obj.last_name}".strip()
 
-        for i, page in enumerate(reader.pages):
-            if i == 0:
-                page.merge_page(overlay_reader.pages[0])
-            writer.add_page(page)
+        with timer.phase("render"):
+            overlay = render_status_overlay(
+                template, firma.png_bytes, firma.width, firma.height,
+                display_name, fecha.strftime("%d-%m-%Y %H:%M"), nombre_documento
+            )
 
-        # Guardar resultado
-        output = BytesIO()
-        writer.write(output)
-        output.seek(0)
+        # Estampar sobre la primera página (actualización incremental o reescritura completa)
+        with timer.phase("stamp"):
+            result = target_pdf.stamp(overlay)
 
         # Subir PDF modificado
-        pdf_blob.upload_from_file(output, content_type='application/pdf')
+        with timer.phase("upload"):
+            storage.write(pdf_blob_name, result.open(), size=result.size, content_type='application/pdf',
+                          if_generation_match=if_generation_match)
+        # La URL firmada anterior apuntaría al PDF ya cacheado por el navegador
+        signed_url_cache.invalidate(pdf_blob_name)
+        timer.finish(mode=result.mode, size=result.size)
 
         return True
 
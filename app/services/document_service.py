@@ -5,7 +5,7 @@ from app.schemas.document import DocumentCreate, Document
 from app.schemas.version import VersionCreate, VersionInfo
 from app.infrastructure.document_repository import DocumentRepository
 from app.infrastructure.version_repository import VersionRepository
-from app.services.storage_service import LocalStorageService
+from app.services.storage_service import LocalDiskStorage
 from app.schemas.document import TypeOfDocument
 from app.utils.text_utils import clear_name
 from typing import Optional
@@ -18,7 +18,19 @@ from typing import Optional, Callable
 from app.infrastructure.version_repository import VersionRepository
 from app.services.document_google_service import view_document_service
 
-storage = LocalStorageService()
+storage = LocalDiskStorage()
+
+
+def _version_key(code: str, version, ext: str = ".pdf") -> str:
+    # <code>_v<version>.pdf, con los guiones del código cambiados por guiones bajos
+    return f"{code.replace('-', '_')}_v{version}{ext}"
+
+
+async def _save_version_file(file: UploadFile, code: str, version) -> str:
+    """Guarda el PDF de la versión en el almacenamiento local y retorna su ruta."""
+    key = _version_key(code, version, Path(file.filename).suffix or ".pdf")
+    await storage.awrite(key, file.file, content_type=file.content_type)
+    return str(storage.root / key)
 
 class DocumentService:
     
@@ -41,8 +53,7 @@ class DocumentService:
         code = f"{prefix}-{seq:03d}"
 
         # 4) Guardar archivo v1 y obtener ruta
-        filename = f"{code}-v1"
-        file_path = await storage.save_file(file, filename)
+        file_path = await _save_version_file(file, code, 1)
 
         # 5) Crear registro en documents.csv (versión 1)
         doc = DocumentRepository.create_document(data, code)
@@ -81,8 +92,7 @@ class DocumentService:
         next_v = VersionRepository.get_next_version_by_id(code)
 
         # 4) Guardar el PDF con sufijo -vN
-        filename = f"{doc.code}-v{next_v}"
-        file_path = await storage.save_file(file, filename)
+        file_path = await _save_version_file(file, doc.code, next_v)
 
         # 5) Registrar en document_versions.csv
         version_info = VersionRepository.create_version(
@@ -135,7 +145,7 @@ class DocumentService:
         doc = DocumentRepository.get_document(code)
         if not doc:
             raise HTTPException(404, "Documento no encontrado")
-        return storage.get_file_path(doc.code, doc.version)
+        return storage.root / _version_key(doc.code, doc.version)
     
     async def get_signed_view_url(self, version_id: int, db: Session) -> Optional[str]:
         
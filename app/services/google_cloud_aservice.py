@@ -1,38 +1,132 @@
+import hashlib
 import os
-from google.cloud import storage
+from dataclasses import dataclass
+from pathlib import Path
 from dotenv import load_dotenv
 from fastapi import UploadFile
-from datetime import timedelta
+from urllib.parse import urlparse
+
+from app.services.signed_url_cache import signed_url_cache
+from app.services.storage_service import get_storage, LOCAL_STORAGE_DIR
 
 load_dotenv()
 
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = os.path.join(os.path.dirname(__file__), '..', '..', 'cloud-storage.json')
-BUCKET_NAME = os.environ['BUCKET_NAME']
-storage_client = storage.Client()
+UPLOAD_COMPUTE_SHA256 = os.getenv("UPLOAD_COMPUTE_SHA256", "1").lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class UploadResult:
+    url: str
+    size: int
+    sha256: str | None
+
+
+class HashingReader:
+    """
+    Envuelve el archivo de entrada y calcula SHA-256 y tamaño conforme se lee.
+    Si la subida reanudable retrocede para reintentar un fragmento, los bytes ya
+    contabilizados no se vuelven a sumar.
+    """
+
+    def __init__(self, fileobj, compute_sha256: bool = True):
+        self._file = fileobj
+        self._hash = hashlib.sha256() if compute_sha256 else None
+        self._pos = fileobj.tell()
+        self._start = self._pos
+        self._hashed_upto = self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._file.read(size)
+        end = self._pos + len(data)
+        if end > self._hashed_upto:
+            if self._hash is not None:
+                self._hash.update(memoryview(data)[self._hashed_upto - self._pos:])
+            self._hashed_upto = end
+        self._pos = end
+        return data
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        self._pos = self._file.seek(offset, whence)
+        if self._pos > self._hashed_upto:
+            raise ValueError("No se puede avanzar sobre bytes que no se han leído")
+        return self._pos
+
+    @property
+    def size(self) -> int:
+        return self._hashed_upto - self._start
+
+    def hexdigest(self) -> str | None:
+        return self._hash.hexdigest() if self._hash is not None else None
+
+
+def upload_stream(file: UploadFile, destination_blob_name: str,
+                  compute_sha256: bool = UPLOAD_COMPUTE_SHA256) -> UploadResult:
+    """
+    Sube el archivo al almacenamiento configurado sin cargarlo completo en memoria
+    (en GCS, subida reanudable en fragmentos de UPLOAD_CHUNK_SIZE).
+    """
+    source = file.file
+    source.seek(0)
+    reader = HashingReader(source, compute_sha256)
+    storage = get_storage()
+    storage.write(destination_blob_name, reader, content_type=file.content_type)
+    return UploadResult(url=storage.url_for(destination_blob_name), size=reader.size, sha256=reader.hexdigest())
 
 
 def upload_file_to_gcs( file: UploadFile, destination_blob_name: str) -> str:
     """
     Sube un archivo a un bucket de GCS y devuelve la URL pública.
     """
-    bucket = storage_client.bucket(BUCKET_NAME)
-    blob = bucket.blob(destination_blob_name)
-
-    file_content = file.file.read()
+    return upload_stream(file, destination_blob_name, compute_sha256=False).url
 
-    blob.upload_from_string(file_content, content_type=file.content_type)
+def extract_blob_name(url: str) -> str | None:
+    """
+    Obtiene el nombre del blob a partir de una URL gs://, pública o de la API de GCS.
+    """
+    if not url:
+        return None
+    p = urlparse(url)
+    if p.scheme == "memory":
+        return p.path.lstrip("/")
+    if p.scheme == "file":
+        local_root = getattr(get_storage(), "root", None) or Path(LOCAL_STORAGE_DIR).resolve()
+        path = Path(p.path)
+        return path.relative_to(local_root).as_posix() if path.is_relative_to(local_root) else p.path
+    if p.scheme == "gs":
+        return p.path.lstrip("/")
+    if p.scheme in ("http", "https"):
+        path = p.path.lstrip("/")
+        netloc = (p.netloc or "")
+        if netloc.endswith("storage.googleapis.com"):
+            parts = path.split("/", 1)
+            if len(parts) == 2:
+                return parts[1]
+            return None
+        if netloc.endswith(".storage.googleapis.com"):
+            return path
+        segments = path.split("/")
+        if len(segments) >= 4 and segments[0] == "b" and segments[2] == "o":
+            return "/".join(segments[3:])
+        bucket_name = os.environ.get("BUCKET_NAME")
+        if bucket_name and path.startswith(f"{bucket_name}/"):
+            return path[len(bucket_name) + 1 :]
+        return path
+    return url
 
-    return blob.public_url
 
 def generate_signed_url(blob_name: str) -> str:
     """
-    Genera una URL firmada para acceder a un blob en GCS.
+    Genera una URL firmada para acceder a un blob en GCS (reutiliza la vigente si la hay).
+    """
+    storage = get_storage()
+    return signed_url_cache.get_or_sign(blob_name, lambda expiration: storage.signed_url(blob_name, expiration))
+
+def get_blob_generation(blob_name: str) -> int | None:
+    """
+    Devuelve la generación actual del blob (None si no existe).
     """
-    bucket = storage_client.bucket(BUCKET_NAME)
-    blob = bucket.blob(blob_name)
-    url = blob.generate_signed_url(
-        version="v4",
-        expiration=timedelta(hours=1),
-        method="GET"
-    )
-    return url
\ No newline at end of file
+    stat = get_storage().stat(blob_name)
+    return stat.generation if stat else None
@@ -0,0 +1,408 @@
+# app/services/pdf_stamp_service.py
+"""
+Motor de estampado de PDFs.
+
+Modo "incremental" (por defecto): el overlay se agrega como actualización
+incremental al final del archivo (objetos nuevos + nueva tabla xref con /Prev),
+reescribiendo sólo el objeto de la primera página. Los bytes originales se
+suben tal cual, sin reconstruir el resto del documento.
+
+Modo "rewrite": el comportamiento anterior (PdfReader -> merge_page -> PdfWriter).
+También se usa como respaldo cuando el PDF no admite la actualización incremental
+(cifrado, xref en streams, xref reconstruida por estar dañado...).
+
+Se elige con PDF_STAMP_MODE=incremental|rewrite.
+
+El overlay llega como FormOverlay (contenido + fuentes + imágenes ya armados,
+ver stamp_template.py) y se agrega como Form XObject sin pasar por un PDF
+intermedio; también se acepta el PDF de una página del overlay.
+"""
+from __future__ import annotations
+
+import io
+import os
+import re
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional, Union
+
+from PyPDF2 import PageObject, PdfReader, PdfWriter
+from PyPDF2.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    FloatObject,
+    IndirectObject,
+    NameObject,
+    NumberObject,
+    PdfObject,
+    StreamObject,
+)
+
+PDF_STAMP_MODE = os.getenv("PDF_STAMP_MODE", "incremental").lower()
+
+_INHERITABLE = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+_STARTXREF_RE = re.compile(rb"startxref\s+(\d+)\s+%%EOF", re.S)
+
+
+class IncrementalNotSupported(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class OverlayImage:
+    """Image XObject (y su máscara de transparencia); cada estampado agrega copias."""
+    image: StreamObject
+    smask: Optional[StreamObject] = None
+
+
+@dataclass(frozen=True)
+class FormOverlay:
+    """Overlay de una página listo para usarse como Form XObject."""
+    width: float
+    height: float
+    content: bytes
+    # Diccionarios de fuente directos (sin objetos indirectos), por nombre de recurso
+    fonts: dict
+    images: dict
+
+    def resources(self, add_object) -> DictionaryObject:
+        """/Resources del overlay; `add_object` agrega un stream al PDF destino y devuelve su referencia."""
+        resources = DictionaryObject()
+        if self.fonts:
+            resources[NameObject("/Font")] = DictionaryObject(
+                {NameObject(name): font for name, font in self.fonts.items()})
+        if self.images:
+            xobjects = DictionaryObject()
+            for name, overlay_image in self.images.items():
+                image = _copy_stream(overlay_image.image)
+                if overlay_image.smask is not None:
+                    image[NameObject("/SMask")] = add_object(_copy_stream(overlay_image.smask))
+                xobjects[NameObject(name)] = add_object(image)
+            resources[NameObject("/XObject")] = xobjects
+        return resources
+
+    def to_pdf(self) -> bytes:
+        """PDF de una página con el overlay (para el modo rewrite)."""
+        writer = PdfWriter()
+        page = PageObject.create_blank_page(None, self.width, self.height)
+        page[NameObject("/Resources")] = self.resources(writer._add_object)
+        page[NameObject("/Contents")] = writer._add_object(_content_stream(self.content))
+        writer.add_page(page)
+        output = BytesIO()
+        writer.write(output)
+        return output.getvalue()
+
+
+Overlay = Union[FormOverlay, bytes]
+
+
+@dataclass
+class StampResult:
+    chunks: list
+    size: int
+    mode: str
+
+    def open(self) -> "ChainedReader":
+        return ChainedReader(self.chunks)
+
+
+class ChainedReader(io.RawIOBase):
+    """
+    Lector que concatena varios buffers sin copiarlos a uno solo. Soporta tell/seek
+    porque la subida reanudable de GCS los usa para calcular y reintentar fragmentos.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = [memoryview(c) for c in chunks]
+        self._size = sum(len(c) for c in self._chunks)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._pos = max(0, min(offset, self._size))
+        return self._pos
+
+    def readinto(self, b) -> int:
+        target = memoryview(b).cast("B")
+        written = 0
+        skip = self._pos
+        for chunk in self._chunks:
+            if skip >= len(chunk):
+                skip -= len(chunk)
+                continue
+            n = min(len(target) - written, len(chunk) - skip)
+            target[written:written + n] = chunk[skip:skip + n]
+            written += n
+            skip = 0
+            if written == len(target):
+                break
+        self._pos += written
+        return written
+
+
+class StampablePdf:
+    """PDF abierto para estampar sobre su primera página."""
+
+    def __init__(self, pdf_bytes: bytes):
+        self.pdf_bytes = pdf_bytes
+        self.reader = PdfReader(BytesIO(pdf_bytes), strict=False)
+        if self.reader.is_encrypted:
+            # sin actualización incremental: se estampa reescribiendo el documento
+            self.page_ref, self.page_attrs = None, None
+            media = self.reader.pages[0].mediabox
+            self._media = [float(media.left), float(media.bottom), float(media.right), float(media.top)]
+            return
+        self.page_ref, self.page_attrs = _first_page(self.reader)
+        if self.page_ref is None:
+            raise ValueError("PDF sin páginas")
+        media = self.page_attrs["/MediaBox"].get_object()
+        self._media = [float(v) for v in media]
+
+    @property
+    def page_size(self) -> tuple[float, float]:
+        media = self._media
+        return media[2] - media[0], media[3] - media[1]
+
+    def stamp(self, overlay: Overlay, mode: str | None = None) -> StampResult:
+        mode = (mode or PDF_STAMP_MODE).lower()
+        if mode == "incremental":
+            try:
+                appendix = self._incremental_update(overlay)
+                return StampResult([self.pdf_bytes, appendix], len(self.pdf_bytes) + len(appendix), "incremental")
+            except IncrementalNotSupported:
+                pass
+        output = full_rewrite(self.reader, overlay)
+        return StampResult([output], len(output), "rewrite")
+
+    # ---------- actualización incremental ----------
+    def _incremental_update(self, overlay: Overlay) -> bytes:
+        if self.reader.is_encrypted or self.page_ref is None:
+            raise IncrementalNotSupported("PDF cifrado")
+        trailer = self.reader.trailer
+        if "/XRefStm" in trailer:
+            raise IncrementalNotSupported("PDF híbrido")
+        prev = _startxref(self.pdf_bytes)
+        if prev is None or not self.pdf_bytes[prev:prev + 4] == b"xref":
+            raise IncrementalNotSupported("xref en stream o dañada")
+
+        writer = _AppendedObjects(int(trailer["/Size"]))
+
+        form = DecodedStreamObject()
+        if isinstance(overlay, FormOverlay):
+            form.set_data(overlay.content)
+            width, height = overlay.width, overlay.height
+            resources = overlay.resources(writer.add)
+        else:
+            overlay_page = PdfReader(BytesIO(overlay)).pages[0]
+            form.set_data(overlay_page.get_contents().get_data())
+            width, height = overlay_page.mediabox.width, overlay_page.mediabox.height
+            resources = (writer.import_object(overlay_page.raw_get("/Resources"))
+                         if "/Resources" in overlay_page else None)
+        form = form.flate_encode()
+        form[NameObject("/Type")] = NameObject("/XObject")
+        form[NameObject("/Subtype")] = NameObject("/Form")
+        form[NameObject("/BBox")] = ArrayObject(FloatObject(v) for v in (0, 0, width, height))
+        # El overlay se dibuja desde (0, 0); se traslada si la MediaBox no empieza en el origen
+        form[NameObject("/Matrix")] = ArrayObject(
+            FloatObject(v) for v in (1, 0, 0, 1, self._media[0], self._media[1])
+        )
+        if resources is not None:
+            form[NameObject("/Resources")] = resources
+        form_ref = writer.add(form)
+
+        page = DictionaryObject()
+        for key, value in self.page_attrs.items():
+            page[NameObject(key)] = value
+
+        resources = _copy_dict(page.raw_get("/Resources") if "/Resources" in page else None)
+        xobjects = _copy_dict(resources.raw_get("/XObject") if "/XObject" in resources else None)
+        stamp_name = _unique_name(xobjects, "/IsoStamp")
+        xobjects[NameObject(stamp_name)] = form_ref
+        resources[NameObject("/XObject")] = xobjects
+        page[NameObject("/Resources")] = resources
+
+        contents = ArrayObject()
+        contents.append(writer.add(_content_stream(b"q\n")))
+        if "/Contents" in page:
+            original = page.raw_get("/Contents")
+            resolved = original.get_object()
+            if isinstance(resolved, ArrayObject):
+                contents.extend(resolved)
+            else:
+                contents.append(original)
+        contents.append(writer.add(_content_stream(f"\nQ\nq {stamp_name} Do Q\n".encode())))
+        page[NameObject("/Contents")] = contents
+
+        writer.replace(self.page_ref, page)
+
+        extra = {"/Root": trailer.raw_get("/Root")}
+        for key in ("/Info", "/ID"):
+            if key in trailer:
+                extra[key] = trailer.raw_get(key)
+        separator = b"" if self.pdf_bytes.endswith(b"\n") else b"\n"
+        return separator + writer.serialize(len(self.pdf_bytes) + len(separator), prev, extra)
+
+
+def full_rewrite(reader: PdfReader, overlay: Overlay) -> bytes:
+    """Merge con PdfWriter reescribiendo el documento completo."""
+    overlay_pdf = overlay.to_pdf() if isinstance(overlay, FormOverlay) else overlay
+    overlay_reader = PdfReader(BytesIO(overlay_pdf))
+    writer = PdfWriter()
+    for i, page in enumerate(reader.pages):
+        if i == 0:
+            page.merge_page(overlay_reader.pages[0])
+        writer.add_page(page)
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+class _AppendedObjects:
+    """Objetos nuevos o reemplazados de una actualización incremental."""
+
+    def __init__(self, first_free: int):
+        self.next_num = first_free
+        self.objects: dict[int, tuple[int, PdfObject]] = {}
+        self._imported: dict[tuple[int, int], IndirectObject] = {}
+
+    def add(self, obj: PdfObject) -> IndirectObject:
+        ref = IndirectObject(self.next_num, 0, None)
+        self.next_num += 1
+        self.objects[ref.idnum] = (0, obj)
+        return ref
+
+    def replace(self, ref: IndirectObject, obj: PdfObject) -> None:
+        self.objects[ref.idnum] = (ref.generation, obj)
+
+    def import_object(self, obj):
+        """Copia un objeto de otro PDF renumerando sus referencias indirectas."""
+        if isinstance(obj, IndirectObject):
+            key = (obj.idnum, obj.generation)
+            if key not in self._imported:
+                ref = IndirectObject(self.next_num, 0, None)
+                self.next_num += 1
+                self._imported[key] = ref
+                self.objects[ref.idnum] = (0, self.import_object(obj.get_object()))
+            return self._imported[key]
+        if isinstance(obj, StreamObject):
+            copy = obj.__class__()
+            copy._data = obj._data
+            for key, value in dict.items(obj):
+                copy[NameObject(key)] = self.import_object(value)
+            return copy
+        if isinstance(obj, DictionaryObject):
+            return DictionaryObject({NameObject(k): self.import_object(v) for k, v in dict.items(obj)})
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self.import_object(v) for v in obj)
+        return obj
+
+    def serialize(self, base_offset: int, prev_xref: int, trailer_entries: dict) -> bytes:
+        out = BytesIO()
+        offsets = {}
+        for num in sorted(self.objects):
+            generation, obj = self.objects[num]
+            offsets[num] = (base_offset + out.tell(), generation)
+            out.write(f"{num} {generation} obj\n".encode())
+            obj.write_to_stream(out, None)
+            out.write(b"\nendobj\n")
+
+        xref_offset = base_offset + out.tell()
+        # cada sección de la actualización abre con la cabeza de la lista de libres
+        out.write(b"xref\n0 1\n0000000000 65535 f\r\n")
+        nums = sorted(offsets)
+        start = 0
+        while start < len(nums):
+            end = start
+            while end + 1 < len(nums) and nums[end + 1] == nums[end] + 1:
+                end += 1
+            out.write(f"{nums[start]} {end - start + 1}\n".encode())
+            for num in nums[start:end + 1]:
+                offset, generation = offsets[num]
+                out.write(f"{offset:010d} {generation:05d} n\r\n".encode())
+            start = end + 1
+
+        trailer = DictionaryObject()
+        trailer[NameObject("/Size")] = NumberObject(max(self.next_num, max(nums) + 1))
+        trailer[NameObject("/Prev")] = NumberObject(prev_xref)
+        for key, value in trailer_entries.items():
+            trailer[NameObject(key)] = value
+        out.write(b"trailer\n")
+        trailer.write_to_stream(out, None)
+        out.write(f"\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+        return out.getvalue()
+
+
+def _first_page(reader: PdfReader) -> tuple[Optional[IndirectObject], Optional[dict]]:
+    """
+    Desciende por /Kids[0] hasta la primera hoja sin aplanar todo el árbol de páginas.
+    Devuelve la referencia de la página y sus atributos (crudos) con los heredados incluidos.
+    """
+    root = reader.trailer["/Root"]
+    node_ref = root.raw_get("/Pages")
+    inherited: dict = {}
+    for _ in range(64):
+        node = node_ref.get_object()
+        for key in _INHERITABLE:
+            if key in node:
+                inherited[key] = node.raw_get(key)
+        if node.get("/Type") == "/Page" or "/Kids" not in node:
+            attrs = {key: node.raw_get(key) for key in node}
+            for key, value in inherited.items():
+                attrs.setdefault(key, value)
+            if "/MediaBox" not in attrs:
+                attrs["/MediaBox"] = ArrayObject(FloatObject(v) for v in (0, 0, 612, 792))
+            return node_ref, attrs
+        kids = node["/Kids"]
+        if not kids:
+            return None, None
+        node_ref = list.__getitem__(kids, 0)
+    return None, None
+
+
+def _startxref(pdf_bytes: bytes) -> Optional[int]:
+    match = None
+    for match in _STARTXREF_RE.finditer(pdf_bytes[-2048:]):
+        pass
+    return int(match.group(1)) if match else None
+
+
+def _copy_dict(value) -> DictionaryObject:
+    copy = DictionaryObject()
+    if value is not None:
+        for key, item in dict.items(value.get_object()):
+            copy[NameObject(key)] = item
+    return copy
+
+
+def _unique_name(existing: DictionaryObject, prefix: str) -> str:
+    n = 0
+    while f"{prefix}{n}" in existing:
+        n += 1
+    return f"{prefix}{n}"
+
+
+def _copy_stream(stream: StreamObject) -> StreamObject:
+    copy = stream.__class__()
+    copy._data = stream._data
+    for key, value in dict.items(stream):
+        copy[NameObject(key)] = value
+    return copy
+
+
+def _content_stream(data: bytes) -> DecodedStreamObject:
+    stream = DecodedStreamObject()
+    stream.set_data(data)
+    return stream
@@ -0,0 +1,108 @@
+# app/services/permission_cache.py
+"""
+Caché por usuario de sus roles y permisos efectivos.
+
+El login y /auth/user los consultan en cada llamada; con la caché quedan en
+una búsqueda por usuario_id. Las mutaciones de admin_service la invalidan:
+los cambios a un usuario (roles o permisos directos) sólo invalidan a ese
+usuario, y los cambios a un rol o permiso (que afectan a todos sus usuarios)
+vacían la caché completa.
+
+Cada carga recuerda la generación con la que empezó y no se guarda si hubo una
+invalidación mientras consultaba, así una lectura concurrente con un cambio no
+deja datos viejos. Con varios workers cada proceso tiene su propia caché, y
+PERMISSION_CACHE_TTL_SECONDS acota cuánto tarda un cambio en verse en los demás.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable
+
+PERMISSION_CACHE_TTL_SECONDS = float(os.getenv("PERMISSION_CACHE_TTL_SECONDS", "60"))
+PERMISSION_CACHE_MAX_ENTRIES = int(os.getenv("PERMISSION_CACHE_MAX_ENTRIES", "4096"))
+
+
+@dataclass(frozen=True)
+class UserAccess:
+    roles: tuple[str, ...]
+    permisos: tuple[str, ...]
+
+
+class PermissionCache:
+
+    def __init__(self, ttl_seconds: float = PERMISSION_CACHE_TTL_SECONDS,
+                 max_entries: int = PERMISSION_CACHE_MAX_ENTRIES,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        # usuario_id -> (acceso, válido hasta)
+        self._entries: OrderedDict[int, tuple[UserAccess, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_load(self, usuario_id: int, load: Callable[[], UserAccess]) -> UserAccess:
+        usuario_id = int(usuario_id)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(usuario_id)
+            if entry is not None:
+                if now < entry[1]:
+                    self._entries.move_to_end(usuario_id)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[usuario_id]
+                self.expirations += 1
+            generation = self._generation
+
+        access = load()
+        with self._lock:
+            self.misses += 1
+            if generation == self._generation and self.ttl_seconds > 0:
+                self._entries[usuario_id] = (access, now + self.ttl_seconds)
+                self._entries.move_to_end(usuario_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return access
+
+    def invalidate_user(self, usuario_id: int | None) -> None:
+        if usuario_id is None:
+            return
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            self._entries.pop(int(usuario_id), None)
+
+    def invalidate_all(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+permission_cache = PermissionCache()
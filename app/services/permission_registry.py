@@ -0,0 +1,216 @@
+# app/services/permission_registry.py
+"""
+Registro por empresa de posiciones de bit para permisos y roles, usado para
+llevar en el JWT bitsets compactos en lugar de las listas de nombres.
+
+Cada permiso visible para la empresa (globales + propios) y cada rol de la
+empresa ocupa la posición que le toca al ordenarlos por id, incluyendo los
+inactivos. Como los ids sólo crecen y las bajas son lógicas (activo = false),
+un permiso nuevo siempre cae al final y las posiciones existentes no cambian.
+
+El token lleva:
+    pv  versión del registro: "<n permisos>.<max permiso_id>.<n roles>.<max rol_id>"
+    pb  bitset de permisos (base64url, little-endian, sin padding)
+    rb  bitset de roles
+
+Un token emitido con una versión anterior se sigue leyendo con el registro
+actual si los ids hasta el máximo de esa versión siguen siendo los mismos
+(nadie borró físicamente un permiso o rol). Si el token es más nuevo que el
+registro en memoria (otro worker ya vio un permiso nuevo) se recarga; si aun
+así no cuadra, el token se rechaza y el usuario vuelve a iniciar sesión.
+
+JWT_COMPACT_CLAIMS=0 vuelve a emitir las listas "roles" y "permisos".
+"""
+from __future__ import annotations
+
+import base64
+import logging
+import os
+import threading
+import time
+from bisect import bisect_right
+from typing import Callable, Iterable
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.infrastructure.models import Permiso, Rol
+
+logger = logging.getLogger(__name__)
+
+JWT_COMPACT_CLAIMS = os.getenv("JWT_COMPACT_CLAIMS", "1").lower() in ("1", "true", "yes")
+PERMISSION_REGISTRY_TTL_SECONDS = float(os.getenv("PERMISSION_REGISTRY_TTL_SECONDS", "300"))
+
+_MAX_DECODED = 1024
+
+
+def encode_bits(positions: Iterable[int]) -> str:
+    value = 0
+    for position in positions:
+        value |= 1 << position
+    raw = value.to_bytes((value.bit_length() + 7) // 8, "little")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_bits(encoded: str) -> list[int]:
+    raw = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+    value = int.from_bytes(raw, "little")
+    positions = []
+    while value:
+        low = value & -value
+        positions.append(low.bit_length() - 1)
+        value ^= low
+    return positions
+
+
+class StaleTokenRegistry(Exception):
+    """El token usa posiciones que ya no corresponden al registro actual."""
+
+
+class PermissionRegistry:
+
+    def __init__(self, empresa_id: int, permisos: list[tuple[int, str]], roles: list[tuple[int, str]]):
+        # (id, nombre) ordenados por id: la posición en la lista es el bit
+        self.empresa_id = empresa_id
+        self._permiso_ids = [pid for pid, _ in permisos]
+        self._rol_ids = [rid for rid, _ in roles]
+        self.permisos = tuple(codigo for _, codigo in permisos)
+        self.roles = tuple(nombre for _, nombre in roles)
+        self.version = ".".join(str(n) for n in (
+            len(self._permiso_ids), self._permiso_ids[-1] if self._permiso_ids else 0,
+            len(self._rol_ids), self._rol_ids[-1] if self._rol_ids else 0,
+        ))
+        self._permiso_bits = self._positions(self.permisos)
+        self._rol_bits = self._positions(self.roles)
+        self._decoded: dict[tuple[str, str, str], tuple[frozenset, frozenset]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _positions(names: tuple[str, ...]) -> dict[str, list[int]]:
+        # Un código global y uno de la empresa pueden repetirse: el nombre marca ambos bits
+        positions: dict[str, list[int]] = {}
+        for position, name in enumerate(names):
+            positions.setdefault(name, []).append(position)
+        return positions
+
+    def knows(self, roles: Iterable[str], permisos: Iterable[str]) -> bool:
+        return all(r in self._rol_bits for r in roles) and all(p in self._permiso_bits for p in permisos)
+
+    def encode(self, roles: Iterable[str], permisos: Iterable[str]) -> dict:
+        return {
+            "pv": self.version,
+            "rb": encode_bits(b for r in roles for b in self._rol_bits.get(r, ())),
+            "pb": encode_bits(b for p in permisos for b in self._permiso_bits.get(p, ())),
+        }
+
+    def compatibility(self, version: str) -> int:
+        """-1 si el token es más nuevo que el registro, 0 si ya no cuadra, 1 si se puede leer."""
+        try:
+            p_count, p_max, r_count, r_max = (int(n) for n in version.split("."))
+        except (AttributeError, ValueError):
+            return 0
+        if p_max > (self._permiso_ids[-1] if self._permiso_ids else 0) or \
+                r_max > (self._rol_ids[-1] if self._rol_ids else 0):
+            return -1
+        same = bisect_right(self._permiso_ids, p_max) == p_count and bisect_right(self._rol_ids, r_max) == r_count
+        return 1 if same else 0
+
+    def decode(self, claims: dict) -> tuple[frozenset, frozenset]:
+        """(roles, permisos) del token como conjuntos, para verificar pertenencia en O(1)."""
+        key = (claims.get("pv"), claims.get("rb", ""), claims.get("pb", ""))
+        cached = self._decoded.get(key)
+        if cached is not None:
+            return cached
+        if self.compatibility(key[0]) != 1:
+            raise StaleTokenRegistry(key[0])
+        try:
+            roles = frozenset(self.roles[b] for b in decode_bits(key[1]))
+            permisos = frozenset(self.permisos[b] for b in decode_bits(key[2]))
+        except (IndexError, ValueError) as e:
+            raise StaleTokenRegistry(key[0]) from e
+        with self._lock:
+            if len(self._decoded) >= _MAX_DECODED:
+                self._decoded.clear()
+            self._decoded[key] = (roles, permisos)
+        return roles, permisos
+
+
+def _registry_statements(empresa_id: int):
+    permisos = (select(Permiso.permiso_id, Permiso.codigo)
+                .where(or_(Permiso.empresa_id.is_(None), Permiso.empresa_id == empresa_id))
+                .order_by(Permiso.permiso_id))
+    roles = select(Rol.rol_id, Rol.nombre).where(Rol.empresa_id == empresa_id).order_by(Rol.rol_id)
+    return permisos, roles
+
+
+class PermissionRegistryStore:
+
+    def __init__(self, ttl_seconds: float = PERMISSION_REGISTRY_TTL_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._registries: dict[int, tuple[PermissionRegistry, float]] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def cached(self, empresa_id: int) -> PermissionRegistry | None:
+        entry = self._registries.get(empresa_id)
+        if entry is not None and self._clock() < entry[1]:
+            return entry[0]
+        return None
+
+    def put(self, registry: PermissionRegistry) -> PermissionRegistry:
+        with self._lock:
+            self.loads += 1
+            self._registries[registry.empresa_id] = (registry, self._clock() + self.ttl_seconds)
+        return registry
+
+    def load(self, db: Session, empresa_id: int) -> PermissionRegistry:
+        permisos_stmt, roles_stmt = _registry_statements(empresa_id)
+        return self.put(PermissionRegistry(
+            empresa_id,
+            [(pid, str(codigo)) for pid, codigo in db.execute(permisos_stmt)],
+            [(rid, str(nombre)) for rid, nombre in db.execute(roles_stmt)],
+        ))
+
+    async def aload(self, empresa_id: int) -> PermissionRegistry:
+        from app.infrastructure.db import AsyncSessionLocal
+
+        permisos_stmt, roles_stmt = _registry_statements(empresa_id)
+        async with AsyncSessionLocal() as db:
+            permisos = [(pid, str(codigo)) for pid, codigo in await db.execute(permisos_stmt)]
+            roles = [(rid, str(nombre)) for rid, nombre in await db.execute(roles_stmt)]
+        return self.put(PermissionRegistry(empresa_id, permisos, roles))
+
+    def for_encoding(self, db: Session, empresa_id: int, roles: list[str], permisos: list[str]) -> PermissionRegistry:
+        """Registro que conoce todos los nombres a codificar (se recarga si alguno es nuevo)."""
+        registry = self.cached(empresa_id)
+        if registry is None or not registry.knows(roles, permisos):
+            registry = self.load(db, empresa_id)
+        return registry
+
+    async def adecode(self, empresa_id: int, claims: dict) -> tuple[frozenset, frozenset]:
+        registry = self.cached(empresa_id)
+        if registry is None or registry.compatibility(claims.get("pv")) == -1:
+            registry = await self.aload(empresa_id)
+        return registry.decode(claims)
+
+    def invalidate(self, empresa_id: int | None = None) -> None:
+        with self._lock:
+            if empresa_id is None:
+                self._registries.clear()
+            else:
+                self._registries.pop(empresa_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "compact_claims": JWT_COMPACT_CLAIMS,
+                "empresas": len(self._registries),
+                "ttl_seconds": self.ttl_seconds,
+                "loads": self.loads,
+                "versions": {str(e): r.version for e, (r, _) in self._registries.items()},
+            }
+
+
+permission_registry = PermissionRegistryStore()
@@ -1,7 +1,8 @@
 from __future__ import annotations
 from typing import Optional, List, Dict
 from fastapi import HTTPException
-from sqlalchemy import func, or_
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
@@ -625,3 +626,111 @@ def list_nivel_riesgo(db: Session, user: dict) -> List[CatalogItem]:
 def list_amenaza(db: Session, user: dict) -> List[CatalogItem]:
     ensure_authenticated(user)
     return _list_catalog_items_by_id(db, user["empresa_id"], CATALOG_IDS["amenaza"])
+
+
+# ========== LECTURAS ASYNC (listados) ==========
+def _riesgos_stmt(empresa_id: int, tipo: str, q: Optional[str]):
+    stmt = select(Riesgo).where(
+        Riesgo.empresa_id == empresa_id,
+        Riesgo.tipo_riesgo == tipo,
+        Riesgo.deleted_at.is_(None),
+    )
+    if q:
+        like = f"%{q.strip()}%"
+        stmt = stmt.where(or_(Riesgo.nombre.ilike(like), Riesgo.descripcion.ilike(like)))
+    return stmt
+
+
+async def _riesgos_page(db: AsyncSession, user: dict, tipo: str, extra_model, fields: tuple,
+                        q: Optional[str], limit: int, offset: int):
+    ensure_authenticated(user)
+    base = _riesgos_stmt(user["empresa_id"], tipo, q)
+    total = await db.scalar(base.with_only_columns(func.count(), maintain_column_froms=True)) or 0
+    items = list((await db.scalars(
+        base.order_by(Riesgo.riesgo_id.desc()).limit(limit).offset(offset)
+    )).all())
+
+    ids = [r.riesgo_id for r in items]
+    if ids:
+        ext = {
+            e.riesgo_id: e
+            for e in (await db.scalars(select(extra_model).where(extra_model.riesgo_id.in_(ids)))).all()
+        }
+        for r in items:
+            e = ext.get(r.riesgo_id)
+            if e:
+                for field in fields:
+                    setattr(r, field, getattr(e, field))
+    return items, total
+
+
+async def alist_riesgos_generales_paged(
+    db: AsyncSession, user: dict, q: Optional[str], limit: int, offset: int
+):
+    return await _riesgos_page(
+        db, user, "general", RiesgoGeneralExtra,
+        ("responsable_id", "probabilidad_item_id", "impacto_item_id", "nivel_item_id", "score"),
+        q, limit, offset,
+    )
+
+
+async def alist_riesgos_activo_paged(
+    db: AsyncSession, user: dict, q: Optional[str], limit: int, offset: int
+):
+    return await _riesgos_page(
+        db, user, "activo", RiesgoActivoExtra,
+        ("activo_id", "amenaza_item_id", "vulnerabilidad", "propietario_id",
+         "probabilidad_item_id", "impacto_item_id", "nivel_item_id", "score",
+         "integridad_item_id", "disponibilidad_item_id", "confidencialidad_item_id"),
+        q, limit, offset,
+    )
+
+
+async def _view_page(db: AsyncSession, view, empresa_id: int, search_columns: tuple,
+                     q: Optional[str], limit: int, offset: int):
+    base = select(view).where(view.empresa_id == empresa_id)
+    if q:
+        like = f"%{q}%"
+        base = base.where(or_(*(col.ilike(like) for col in search_columns)))
+    total = await db.scalar(base.with_only_columns(func.count(), maintain_column_froms=True)) or 0
+    rows = (await db.scalars(
+        base.order_by(view.riesgo_id.desc()).limit(limit).offset(offset)
+    )).all()
+    return [r.__dict__ for r in rows], int(total)
+
+
+async def alist_generales_view(
+    db: AsyncSession, user: dict, q: Optional[str], limit: int, offset: int
+):
+    ensure_authenticated(user)
+    return await _view_page(
+        db, VRiesgoGeneralList, user["empresa_id"],
+        (VRiesgoGeneralList.nombre, VRiesgoGeneralList.descripcion, VRiesgoGeneralList.responsable_nombre),
+        q, limit, offset,
+    )
+
+
+async def alist_activos_view(
+    db: AsyncSession, user: dict, q: Optional[str], limit: int, offset: int
+):
+    ensure_authenticated(user)
+    return await _view_page(
+        db, VRiesgoActivoList, user["empresa_id"],
+        (VRiesgoActivoList.nombre, VRiesgoActivoList.descripcion,
+         VRiesgoActivoList.propietario_nombre, VRiesgoActivoList.vulnerabilidad),
+        q, limit, offset,
+    )
+
+
+async def alist_catalog_by_key(db: AsyncSession, user: dict, key: str) -> List[CatalogItem]:
+    """Versión async de list_probabilidad / list_impacto / list_nivel_riesgo / list_amenaza."""
+    ensure_authenticated(user)
+    rows = await db.scalars(
+        select(CatalogItem)
+        .where(CatalogItem.catalog_id == CATALOG_IDS[key])
+        .where(CatalogItem.active.is_(True))
+        .where(CatalogItem.deleted_at.is_(None))
+        .where(or_(CatalogItem.empresa_id.is_(None), CatalogItem.empresa_id == user["empresa_id"]))
+        .order_by(CatalogItem.sort_order, CatalogItem.name)
+    )
+    return list(rows.all())
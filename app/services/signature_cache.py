@@ -0,0 +1,126 @@
+# app/services/signature_cache.py
+"""
+Caché de firmas ya preprocesadas (RGBA + PNG optimizado) para el estampado de PDFs.
+
+Las entradas se indexan por nombre de blob y guardan la generación de GCS con la
+que se descargaron, así una aprobación repetida del mismo revisor no vuelve a
+descargar la imagen ni a pasar por Pillow. Como upload_firma_service crea siempre
+un blob con nombre nuevo, una entrada sólo queda obsoleta si alguien sobrescribe
+el blob a mano; para ese caso existe SIGNATURE_CACHE_REVALIDATE_SECONDS (0 = no
+revalidar), que compara la generación con una consulta de metadatos.
+"""
+from __future__ import annotations
+
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from PIL import Image as PILImage
+
+SIGNATURE_CACHE_MAX_ENTRIES = int(os.getenv("SIGNATURE_CACHE_MAX_ENTRIES", "256"))
+SIGNATURE_CACHE_REVALIDATE_SECONDS = float(os.getenv("SIGNATURE_CACHE_REVALIDATE_SECONDS", "0"))
+
+
+@dataclass(frozen=True)
+class SignatureRendering:
+    png_bytes: bytes
+    width: int
+    height: int
+    generation: Optional[int]
+    loaded_at: float
+
+
+def render_signature(signature_bytes: bytes) -> tuple[bytes, int, int]:
+    """Convierte la firma a RGBA sobre fondo transparente y la guarda como PNG."""
+    img = PILImage.open(io.BytesIO(signature_bytes))
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    background = PILImage.new('RGBA', img.size, (255, 255, 255, 0))
+    img = PILImage.alpha_composite(background, img)
+    img_buffer = io.BytesIO()
+    img.save(img_buffer, format='PNG', optimize=True)
+    return img_buffer.getvalue(), img.size[0], img.size[1]
+
+
+class SignatureCache:
+
+    def __init__(self, max_entries: int = SIGNATURE_CACHE_MAX_ENTRIES,
+                 revalidate_seconds: float = SIGNATURE_CACHE_REVALIDATE_SECONDS):
+        self.max_entries = max_entries
+        self.revalidate_seconds = revalidate_seconds
+        self._entries: OrderedDict[str, SignatureRendering] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_load(
+        self,
+        blob_name: str,
+        download: Callable[[], tuple[bytes, Optional[int]]],
+        current_generation: Callable[[], Optional[int]] | None = None,
+    ) -> SignatureRendering:
+        """
+        Devuelve la firma procesada. `download` debe regresar (bytes, generación);
+        `current_generation` sólo se usa al revalidar entradas antiguas.
+        """
+        with self._lock:
+            entry = self._entries.get(blob_name)
+            if entry is not None:
+                self._entries.move_to_end(blob_name)
+
+        if entry is not None and self._is_fresh(entry, current_generation):
+            with self._lock:
+                self.hits += 1
+            return entry
+
+        signature_bytes, generation = download()
+        png_bytes, width, height = render_signature(signature_bytes)
+        entry = SignatureRendering(png_bytes, width, height, generation, time.monotonic())
+        with self._lock:
+            self.misses += 1
+            self._entries[blob_name] = entry
+            self._entries.move_to_end(blob_name)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def _is_fresh(self, entry: SignatureRendering, current_generation) -> bool:
+        if not self.revalidate_seconds or current_generation is None:
+            return True
+        if time.monotonic() - entry.loaded_at < self.revalidate_seconds:
+            return True
+        return current_generation() == entry.generation
+
+    def invalidate(self, blob_name: str | None) -> None:
+        if not blob_name:
+            return
+        with self._lock:
+            if self._entries.pop(blob_name, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+signature_cache = SignatureCache()
@@ -0,0 +1,104 @@
+# app/services/signed_url_cache.py
+"""
+Caché de URLs firmadas (V4) por nombre de blob.
+
+Firmar una URL es una operación RSA y la URL vale SIGNED_URL_TTL_SECONDS, así
+que se reutiliza hasta SIGNED_URL_SAFETY_MARGIN_SECONDS antes de que expire
+(margen para que el navegador alcance a descargar el PDF con ella). Al
+re-estampar un PDF se invalida su entrada para que el cliente reciba una URL
+nueva y no sirva la versión anterior desde su propia caché. Si el worker de
+estampado corre en otro proceso, el TTL acota cuánto puede durar esa URL vieja.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Callable
+
+SIGNED_URL_TTL_SECONDS = int(os.getenv("SIGNED_URL_TTL_SECONDS", "3600"))
+SIGNED_URL_SAFETY_MARGIN_SECONDS = int(os.getenv("SIGNED_URL_SAFETY_MARGIN_SECONDS", "300"))
+SIGNED_URL_CACHE_MAX_ENTRIES = int(os.getenv("SIGNED_URL_CACHE_MAX_ENTRIES", "2048"))
+
+
+class SignedUrlCache:
+
+    def __init__(self, ttl_seconds: int = SIGNED_URL_TTL_SECONDS,
+                 safety_margin_seconds: int = SIGNED_URL_SAFETY_MARGIN_SECONDS,
+                 max_entries: int = SIGNED_URL_CACHE_MAX_ENTRIES,
+                 clock: Callable[[], float] = time.monotonic):
+        if safety_margin_seconds >= ttl_seconds:
+            raise ValueError("El margen de seguridad debe ser menor que la vigencia de la URL")
+        self.ttl_seconds = ttl_seconds
+        self.safety_margin_seconds = safety_margin_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        # blob -> (url, instante a partir del cual ya no se reutiliza)
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def expiration(self) -> timedelta:
+        return timedelta(seconds=self.ttl_seconds)
+
+    def get_or_sign(self, blob_name: str, sign: Callable[[timedelta], str]) -> str:
+        """Devuelve la URL vigente del blob o la firma con `sign(expiration)`."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(blob_name)
+            if entry is not None:
+                if now < entry[1]:
+                    self._entries.move_to_end(blob_name)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[blob_name]
+                self.expirations += 1
+
+        # Se firma fuera del lock; dos peticiones simultáneas pueden firmar ambas, ambas URLs valen
+        url = sign(self.expiration)
+        reuse_until = now + self.ttl_seconds - self.safety_margin_seconds
+        with self._lock:
+            self.misses += 1
+            self._entries[blob_name] = (url, reuse_until)
+            self._entries.move_to_end(blob_name)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return url
+
+    def invalidate(self, blob_name: str | None) -> None:
+        if not blob_name:
+            return
+        with self._lock:
+            if self._entries.pop(blob_name, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "safety_margin_seconds": self.safety_margin_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+signed_url_cache = SignedUrlCache()
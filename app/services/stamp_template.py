@@ -0,0 +1,251 @@
+# app/services/stamp_template.py
+"""
+Plantillas del overlay de estampado.
+
+El overlay se arma directamente como Form XObject (FormOverlay), sin canvas de
+reportlab por estampado:
+- Por tamaño de página, columna y fuentes se calcula una vez la geometría fija
+  (márgenes, columnas, escala objetivo de la firma, posición del título que tapa
+  «NombreDocumento») y los diccionarios de fuente.
+- Por firma (PNG ya preprocesado por signature_cache) se genera una vez el
+  Image XObject con su máscara de transparencia.
+- Por llamada sólo se escribe el content stream: recuadro y texto del título,
+  posición de la firma, nombre del firmante y fecha.
+
+También expone el hook de tiempos del estampado: cada fase se mide y se reporta
+en nivel DEBUG (logger "app.stamping") y a los hooks registrados con
+add_stamp_timing_hook.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+import zlib
+from dataclasses import dataclass, field
+from functools import lru_cache
+from io import BytesIO
+from typing import Callable
+
+from PIL import Image as PILImage
+from PyPDF2.generic import DictionaryObject, EncodedStreamObject, NameObject, NumberObject
+from reportlab.pdfbase import pdfmetrics
+
+from app.services.pdf_stamp_service import FormOverlay, OverlayImage
+
+logger = logging.getLogger("app.stamping")
+
+LEFT_MARGIN = 40.0  # margen izquierdo en puntos (ajusta para mover todo a la derecha)
+RIGHT_MARGIN = 20.0
+COLUMN_GAP = 2  # reducir este valor para disminuir separación entre columnas
+COLUMNS_VERTICAL_SHIFT = 130.0
+IMAGE_SCALE_FACTOR = 0.6
+TEXT_SPACE = 36  # espacio total aproximado para nombre y fecha
+BOTTOM_MARGIN = 30  # distancia desde el borde inferior
+TITLE_FONT_SIZE = 16
+TEXT_FONT_SIZE = 10
+TEXT_FONT_SIZE_SMALL = 8
+
+# Nombres de recurso dentro del Form XObject del overlay
+_TEXT_FONT = "/F1"
+_TITLE_FONT = "/F2"
+_SIGNATURE = "/Firma"
+
+
+@dataclass(frozen=True)
+class OverlayTemplate:
+    page_width: float
+    page_height: float
+    column: int
+    text_font: str
+    title_font: str
+    column_left: float
+    column_width: float
+    target_w: float
+    y: float
+    max_allowed_height: float
+    title_x: float
+    title_y: float
+    # Recursos /Font del overlay (fuera del hash: la plantilla se usa como llave de caché)
+    fonts: dict = field(default=None, compare=False, hash=False, repr=False)
+
+
+@dataclass(frozen=True)
+class SignaturePlacement:
+    x: float
+    y: float
+    width: float
+    height: float
+    text_x: float
+    text_y_name: float
+    text_y_date: float
+    font_size: int
+
+
+@lru_cache(maxsize=64)
+def get_overlay_template(page_width: float, page_height: float, column: int,
+                         text_font: str = "Helvetica", title_font: str = "Helvetica-Bold") -> OverlayTemplate:
+    """Geometría fija del overlay para un tamaño de página, columna y fuentes."""
+    available_width = page_width - LEFT_MARGIN - RIGHT_MARGIN - 2 * COLUMN_GAP
+    if available_width <= 0:
+        raise ValueError("Ancho de página insuficiente para los márgenes/gaps configurados")
+    column_width = available_width / 3.0
+    max_image_width_pts = column_width * 0.8
+    y = BOTTOM_MARGIN + COLUMNS_VERTICAL_SHIFT
+    return OverlayTemplate(
+        page_width=page_width,
+        page_height=page_height,
+        column=column,
+        text_font=text_font,
+        title_font=title_font,
+        column_left=LEFT_MARGIN + column * (column_width + COLUMN_GAP),
+        column_width=column_width,
+        target_w=max_image_width_pts * IMAGE_SCALE_FACTOR,
+        y=y,
+        max_allowed_height=page_height - y - TEXT_SPACE - 10,
+        # Coordenadas aproximadas del placeholder «NombreDocumento»: centrado, un poco arriba del centro
+        title_x=page_width / 2,
+        title_y=page_height / 2 + 80,
+        fonts={_TEXT_FONT: _standard_font(text_font), _TITLE_FONT: _standard_font(title_font)},
+    )
+
+
+def _standard_font(name: str) -> DictionaryObject:
+    # Fuentes estándar de PDF: no se incrustan, igual que con reportlab
+    return DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject(f"/{name}"),
+        NameObject("/Encoding"): NameObject("/WinAnsiEncoding"),
+    })
+
+
+def _image_stream(width: int, height: int, color_space: str, raw: bytes) -> EncodedStreamObject:
+    stream = EncodedStreamObject()
+    stream._data = zlib.compress(raw, 6)
+    stream.update({
+        NameObject("/Type"): NameObject("/XObject"),
+        NameObject("/Subtype"): NameObject("/Image"),
+        NameObject("/Width"): NumberObject(width),
+        NameObject("/Height"): NumberObject(height),
+        NameObject("/ColorSpace"): NameObject(color_space),
+        NameObject("/BitsPerComponent"): NumberObject(8),
+        NameObject("/Filter"): NameObject("/FlateDecode"),
+    })
+    return stream
+
+
+@lru_cache(maxsize=64)
+def signature_image(signature_png: bytes) -> OverlayImage:
+    """Image XObject de la firma (RGB + máscara alfa); se genera una vez por PNG."""
+    img = PILImage.open(BytesIO(signature_png)).convert("RGBA")
+    width, height = img.size
+    alpha = img.getchannel("A")
+    smask = None
+    if alpha.getextrema() != (255, 255):
+        smask = _image_stream(width, height, "/DeviceGray", alpha.tobytes())
+    return OverlayImage(_image_stream(width, height, "/DeviceRGB", img.convert("RGB").tobytes()), smask)
+
+
+@lru_cache(maxsize=512)
+def place_signature(template: OverlayTemplate, img_w: int, img_h: int) -> SignaturePlacement:
+    """Posición de la firma y de los textos según las proporciones de la imagen."""
+    target_w = template.target_w
+    scale = target_w / img_w if img_w else 1.0
+    target_h = img_h * scale
+    # Asegurar que imagen + texto quepan en la página; si no, reducir escala
+    if target_h > template.max_allowed_height and template.max_allowed_height > 10:
+        scale *= template.max_allowed_height / target_h
+        target_h = img_h * scale
+        target_w = img_w * scale
+
+    x = template.column_left + (template.column_width - target_w) / 2.0
+    font_size = TEXT_FONT_SIZE
+    text_y_name = template.y + target_h + 8
+    text_y_date = text_y_name + 12
+    # Si el texto supera el alto de la página, reducir tamaño de fuente
+    if text_y_date > template.page_height - 10:
+        font_size = TEXT_FONT_SIZE_SMALL
+        text_y_name = template.y + target_h + 6
+        text_y_date = text_y_name + 10
+
+    return SignaturePlacement(
+        x=x, y=template.y, width=target_w, height=target_h,
+        text_x=x + target_w / 2.0, text_y_name=text_y_name, text_y_date=text_y_date,
+        font_size=font_size,
+    )
+
+
+def _pdf_string(text: str) -> bytes:
+    raw = text.encode("cp1252", "replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _centred_text(font: str, font_name: str, size: float, x: float, y: float, text: str) -> bytes:
+    x -= pdfmetrics.stringWidth(text, font_name, size) / 2
+    return b"BT %s %d Tf %.2f %.2f Td %s Tj ET\n" % (font.encode(), size, x, y, _pdf_string(text))
+
+
+def render_status_overlay(template: OverlayTemplate, signature_png: bytes, img_w: int, img_h: int,
+                          display_name: str, fecha_str: str, nombre_documento: str | None = None) -> FormOverlay:
+    """Overlay de una página con las partes dinámicas sobre la plantilla y la firma ya cacheadas."""
+    placement = place_signature(template, img_w, img_h)
+    content = []
+
+    if nombre_documento:
+        # Rectángulo blanco para cubrir «NombreDocumento» y el nombre real encima
+        text_width = pdfmetrics.stringWidth(nombre_documento, template.title_font, TITLE_FONT_SIZE)
+        content.append(b"q 1 1 1 rg %.2f %.2f %.2f %.2f re f Q\n" % (
+            template.title_x - text_width / 2 - 10, template.title_y - 4, text_width + 20, TITLE_FONT_SIZE + 8))
+        content.append(_centred_text(_TITLE_FONT, template.title_font, TITLE_FONT_SIZE,
+                                     template.title_x, template.title_y, nombre_documento))
+
+    content.append(b"q %.2f 0 0 %.2f %.2f %.2f cm %s Do Q\n" % (
+        placement.width, placement.height, placement.x, placement.y, _SIGNATURE.encode()))
+    for text, text_y in ((display_name, placement.text_y_name), (fecha_str, placement.text_y_date)):
+        content.append(_centred_text(_TEXT_FONT, template.text_font, placement.font_size,
+                                     placement.text_x, text_y, text))
+
+    return FormOverlay(
+        width=template.page_width,
+        height=template.page_height,
+        content=b"".join(content),
+        fonts=template.fonts,
+        images={_SIGNATURE: signature_image(signature_png)},
+    )
+
+
+# ---------- Tiempos del estampado ----------
+_timing_hooks: list[Callable[[dict], None]] = []
+
+
+def add_stamp_timing_hook(hook: Callable[[dict], None]) -> None:
+    """Registra un callback que recibe {'blob': ..., '<fase>_ms': ..., 'total_ms': ...}."""
+    _timing_hooks.append(hook)
+
+
+class StampTimer:
+
+    def __init__(self, blob_name: str | None):
+        self.blob_name = blob_name
+        self.phases: dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[f"{name}_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    def finish(self, **extra) -> dict:
+        record = {"blob": self.blob_name, **self.phases, **extra,
+                  "total_ms": round((time.perf_counter() - self._start) * 1000, 2)}
+        logger.debug("Estampado %s", record)
+        for hook in _timing_hooks:
+            try:
+                hook(record)
+            except Exception:
+                logger.exception("Error en hook de tiempos de estampado")
+        return record
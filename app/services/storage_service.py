@@ -1,32 +1,388 @@
 # app/services/storage_service.py
+"""
+Almacenamiento de objetos (PDFs, firmas, fotos) detrás de una sola interfaz.
+
+STORAGE_BACKEND elige la implementación:
+    gcs     bucket BUCKET_NAME de Google Cloud Storage (producción)
+    local   directorio LOCAL_STORAGE_DIR; rangos con mmap y previsualización con sendfile
+    memory  diccionario en memoria (pruebas y benchmarks)
+
+Las operaciones síncronas las usan los servicios y el worker de estampado; las
+variantes `a*` delegan a un hilo para poder llamarlas desde endpoints async.
+El cliente de GCS se crea una sola vez por proceso.
+"""
+import asyncio
+import mmap
 import os
+import shutil
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from fastapi import UploadFile
-
-class LocalStorageService:
-    def __init__(self, base_dir: str = "storage"):
-        self.base_dir = Path(base_dir)
-        self.base_dir.mkdir(parents=True, exist_ok=True)
-
-    async def save_file(self, file: UploadFile, filename_no_ext: str) -> str:
-        """
-        Guarda el UploadFile en disco con nombre filename_no_ext + su extensión original.
-        Retorna la ruta completa.
-        """
-        # extraemos la extensión (.pdf, .jpg, etc.)
-        ext = Path(file.filename).suffix or ".pdf"
-        # Replace hyphens with underscores in filename
-        filename_no_ext = filename_no_ext.replace("-", "_")
-        dest_path = self.base_dir / f"{filename_no_ext}{ext}"
-        content = await file.read()
-        with open(dest_path, "wb") as f:
-            f.write(content)
-        return str(dest_path)
-
-    def get_file_path(self, code: str, version: str) -> Path:
-        """
-        Devuelve la ruta al PDF <code>-v<version>.pdf en el storage local.
-        """
-        code = code.replace("-", "_")
-        return self.base_dir / f"{code}_v{version}.pdf"
+from typing import AsyncIterator, BinaryIO, Iterator, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = os.path.join(os.path.dirname(__file__), '..', '..', 'cloud-storage.json')
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "gcs").lower()
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", "storage")
+# La subida reanudable de GCS exige múltiplos de 256 KiB
+_CHUNK_ALIGNMENT = 256 * 1024
+UPLOAD_CHUNK_SIZE = max(_CHUNK_ALIGNMENT,
+                        int(os.getenv("UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024))) // _CHUNK_ALIGNMENT * _CHUNK_ALIGNMENT)
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class ObjectNotFound(Exception):
+    pass
+
+
+class PreconditionFailed(Exception):
+    """La generación del objeto no coincide con if_generation_match."""
+
+
+@dataclass(frozen=True)
+class ObjectStat:
+    key: str
+    size: int
+    generation: Optional[int]
+    content_type: Optional[str]
+    updated: Optional[datetime]
+
+
+class ObjectStorage(ABC):
+    name = "base"
+    supports_signed_urls = False
+
+    # ---------- Operaciones síncronas ----------
+    @abstractmethod
+    def read(self, key: str, if_generation_match: int | None = None) -> bytes:
+        ...
+
+    @abstractmethod
+    def read_with_generation(self, key: str) -> tuple[bytes, Optional[int]]:
+        """Lee el objeto y la generación exacta que se leyó."""
+        ...
+
+    @abstractmethod
+    def write(self, key: str, stream: BinaryIO, size: int | None = None, content_type: str | None = None,
+              if_generation_match: int | None = None) -> ObjectStat:
+        ...
+
+    @abstractmethod
+    def stat(self, key: str) -> Optional[ObjectStat]:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    def iter_chunks(self, key: str, start: int = 0, end: int | None = None,
+                    chunk_size: int = READ_CHUNK_SIZE) -> Iterator[bytes]:
+        """Itera el rango [start, end] (end inclusivo, como HTTP Range)."""
+        data = self.read(key)
+        stop = len(data) if end is None else min(end + 1, len(data))
+        view = memoryview(data)
+        for offset in range(start, stop, chunk_size):
+            yield bytes(view[offset:min(offset + chunk_size, stop)])
+
+    @abstractmethod
+    def url_for(self, key: str) -> str:
+        """URL persistente que se guarda en BD (archivo_url, url_firma)."""
+        ...
+
+    def signed_url(self, key: str, expiration: timedelta = timedelta(hours=1)) -> str:
+        return self.url_for(key)
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Ruta en disco si el backend la tiene (permite sendfile)."""
+        return None
+
+    # ---------- Operaciones async ----------
+    async def aread(self, key: str, if_generation_match: int | None = None) -> bytes:
+        return await asyncio.to_thread(self.read, key, if_generation_match)
+
+    async def awrite(self, key: str, stream: BinaryIO, size: int | None = None, content_type: str | None = None,
+                     if_generation_match: int | None = None) -> ObjectStat:
+        return await asyncio.to_thread(self.write, key, stream, size, content_type, if_generation_match)
+
+    async def astat(self, key: str) -> Optional[ObjectStat]:
+        return await asyncio.to_thread(self.stat, key)
+
+    async def adelete(self, key: str) -> None:
+        await asyncio.to_thread(self.delete, key)
+
+    async def asigned_url(self, key: str, expiration: timedelta = timedelta(hours=1)) -> str:
+        return await asyncio.to_thread(self.signed_url, key, expiration)
+
+    async def aiter_chunks(self, key: str, start: int = 0, end: int | None = None,
+                           chunk_size: int = READ_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        iterator = self.iter_chunks(key, start, end, chunk_size)
+        while True:
+            chunk = await asyncio.to_thread(next, iterator, None)
+            if chunk is None:
+                break
+            yield chunk
+
+
+class GcsStorage(ObjectStorage):
+    name = "gcs"
+    supports_signed_urls = True
+
+    def __init__(self, bucket_name: str | None = None):
+        self.bucket_name = bucket_name or os.getenv("BUCKET_NAME")
+        self._client = None
+        self._bucket = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    if not self.bucket_name:
+                        raise RuntimeError("BUCKET_NAME no está configurado")
+                    from google.cloud import storage
+                    self._client = storage.Client()
+                    self._bucket = self._client.bucket(self.bucket_name)
+        return self._client
+
+    @property
+    def bucket(self):
+        self.client
+        return self._bucket
+
+    def read(self, key: str, if_generation_match: int | None = None) -> bytes:
+        from google.api_core import exceptions as gexc
+        try:
+            return self.bucket.blob(key).download_as_bytes(if_generation_match=if_generation_match)
+        except gexc.NotFound as e:
+            raise ObjectNotFound(key) from e
+        except gexc.PreconditionFailed as e:
+            raise PreconditionFailed(key) from e
+
+    def read_with_generation(self, key: str) -> tuple[bytes, Optional[int]]:
+        blob = self.bucket.get_blob(key)
+        if blob is None:
+            raise ObjectNotFound(key)
+        return self.read(key, if_generation_match=blob.generation), blob.generation
+
+    def write(self, key: str, stream: BinaryIO, size: int | None = None, content_type: str | None = None,
+              if_generation_match: int | None = None) -> ObjectStat:
+        from google.api_core import exceptions as gexc
+        blob = self.bucket.blob(key, chunk_size=UPLOAD_CHUNK_SIZE)
+        try:
+            blob.upload_from_file(stream, size=size, content_type=content_type,
+                                  if_generation_match=if_generation_match)
+        except gexc.PreconditionFailed as e:
+            raise PreconditionFailed(key) from e
+        return ObjectStat(key, blob.size, blob.generation, blob.content_type, blob.updated)
+
+    def stat(self, key: str) -> Optional[ObjectStat]:
+        blob = self.bucket.get_blob(key)
+        if blob is None:
+            return None
+        return ObjectStat(key, blob.size, blob.generation, blob.content_type, blob.updated)
+
+    def delete(self, key: str) -> None:
+        self.bucket.blob(key).delete()
+
+    def iter_chunks(self, key: str, start: int = 0, end: int | None = None,
+                    chunk_size: int = READ_CHUNK_SIZE) -> Iterator[bytes]:
+        blob = self.bucket.blob(key)
+        with blob.open("rb", chunk_size=max(chunk_size, _CHUNK_ALIGNMENT)) as reader:
+            reader.seek(start)
+            remaining = None if end is None else end + 1 - start
+            while remaining is None or remaining > 0:
+                chunk = reader.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def url_for(self, key: str) -> str:
+        return self.bucket.blob(key).public_url
+
+    def signed_url(self, key: str, expiration: timedelta = timedelta(hours=1)) -> str:
+        return self.bucket.blob(key).generate_signed_url(version="v4", expiration=expiration, method="GET")
+
+
+class LocalDiskStorage(ObjectStorage):
+    """
+    Objetos como archivos bajo `root`. La generación es st_mtime_ns; las escrituras
+    van a un temporal y se publican con os.replace para que un lector nunca vea un
+    archivo a medias.
+    """
+    name = "local"
+
+    def __init__(self, root: str | Path = LOCAL_STORAGE_DIR):
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._write_lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root):
+            raise ValueError(f"Clave fuera del almacenamiento: {key}")
+        return path
+
+    @staticmethod
+    def _check_generation(current: int, key: str, if_generation_match: int | None) -> None:
+        # Igual que en GCS, if_generation_match=0 significa «sólo si no existe»
+        if if_generation_match is not None and current != if_generation_match:
+            raise PreconditionFailed(key)
+
+    def read(self, key: str, if_generation_match: int | None = None) -> bytes:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                st = os.fstat(f.fileno())
+                self._check_generation(st.st_mtime_ns, key, if_generation_match)
+                return f.read()
+        except FileNotFoundError as e:
+            raise ObjectNotFound(key) from e
+
+    def read_with_generation(self, key: str) -> tuple[bytes, Optional[int]]:
+        stat = self.stat(key)
+        if stat is None:
+            raise ObjectNotFound(key)
+        return self.read(key, if_generation_match=stat.generation), stat.generation
+
+    def write(self, key: str, stream: BinaryIO, size: int | None = None, content_type: str | None = None,
+              if_generation_match: int | None = None) -> ObjectStat:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                shutil.copyfileobj(stream, out, UPLOAD_CHUNK_SIZE)
+            with self._write_lock:
+                current = path.stat().st_mtime_ns if path.exists() else 0
+                self._check_generation(current, key, if_generation_match)
+                os.replace(tmp_name, path)
+                # El reloj de mtime es grueso: dos escrituras seguidas podrían compartir generación
+                st = path.stat()
+                if st.st_mtime_ns <= current:
+                    os.utime(path, ns=(st.st_atime_ns, current + 1))
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        return self.stat(key)
+
+    def stat(self, key: str) -> Optional[ObjectStat]:
+        path = self._path(key)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        content_type = "application/pdf" if path.suffix.lower() == ".pdf" else None
+        return ObjectStat(key, st.st_size, st.st_mtime_ns, content_type,
+                          datetime.fromtimestamp(st.st_mtime, tz=timezone.utc))
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def iter_chunks(self, key: str, start: int = 0, end: int | None = None,
+                    chunk_size: int = READ_CHUNK_SIZE) -> Iterator[bytes]:
+        path = self._path(key)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError as e:
+            raise ObjectNotFound(key) from e
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return
+            stop = size if end is None else min(end + 1, size)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for offset in range(start, stop, chunk_size):
+                    yield mapped[offset:min(offset + chunk_size, stop)]
+
+    def url_for(self, key: str) -> str:
+        return self._path(key).as_uri()
+
+    def local_path(self, key: str) -> Optional[Path]:
+        path = self._path(key)
+        return path if path.is_file() else None
+
+
+class InMemoryStorage(ObjectStorage):
+    name = "memory"
+
+    def __init__(self):
+        self._objects: dict[str, tuple[bytes, int, Optional[str], datetime]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def read(self, key: str, if_generation_match: int | None = None) -> bytes:
+        with self._lock:
+            entry = self._objects.get(key)
+        if entry is None:
+            raise ObjectNotFound(key)
+        if if_generation_match is not None and entry[1] != if_generation_match:
+            raise PreconditionFailed(key)
+        return entry[0]
+
+    def read_with_generation(self, key: str) -> tuple[bytes, Optional[int]]:
+        with self._lock:
+            entry = self._objects.get(key)
+        if entry is None:
+            raise ObjectNotFound(key)
+        return entry[0], entry[1]
+
+    def write(self, key: str, stream: BinaryIO, size: int | None = None, content_type: str | None = None,
+              if_generation_match: int | None = None) -> ObjectStat:
+        data = stream.read() if size is None else stream.read(size)
+        with self._lock:
+            current = self._objects.get(key)
+            if if_generation_match is not None and (current[1] if current else 0) != if_generation_match:
+                raise PreconditionFailed(key)
+            self._generation += 1
+            self._objects[key] = (data, self._generation, content_type, datetime.now(timezone.utc))
+        return self.stat(key)
+
+    def stat(self, key: str) -> Optional[ObjectStat]:
+        with self._lock:
+            entry = self._objects.get(key)
+        if entry is None:
+            return None
+        return ObjectStat(key, len(entry[0]), entry[1], entry[2], entry[3])
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._objects.pop(key, None)
+
+    def url_for(self, key: str) -> str:
+        return f"memory:///{key}"
+
+
+_storage: ObjectStorage | None = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> ObjectStorage:
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                if STORAGE_BACKEND == "local":
+                    _storage = LocalDiskStorage(LOCAL_STORAGE_DIR)
+                elif STORAGE_BACKEND == "memory":
+                    _storage = InMemoryStorage()
+                else:
+                    _storage = GcsStorage()
+    return _storage
+
+
+def set_storage(storage: ObjectStorage | None) -> None:
+    """Reemplaza el backend activo (pruebas y benchmarks); None vuelve a leer la configuración."""
+    global _storage
+    with _storage_lock:
+        _storage = storage
 
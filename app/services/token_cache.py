@@ -0,0 +1,143 @@
+# app/services/token_cache.py
+"""
+Caché de JWT ya verificados, indexada por el SHA-256 de la clave de firma
+(su identificador, key_id) y el token.
+
+Un mismo token llega en cada petición del cliente durante su hora de vigencia;
+verificar la firma y los claims con python-jose cuesta decenas de microsegundos
+por llamada, mientras que buscar su hash en esta caché es casi gratis. Sólo se
+guardan tokens válidos (uno inválido vuelve a verificarse y a fallar) y cada
+entrada vale hasta min(exp del token, JWT_CACHE_TTL_SECONDS), así que un token
+expirado nunca se acepta desde la caché. Como la clave forma parte del índice,
+al rotar SECRET_KEY los tokens firmados con la anterior vuelven a verificarse
+(y fallan) en lugar de seguir aceptándose hasta que venza su entrada.
+
+JWT_BACKEND=pyjwt verifica con PyJWT en lugar de python-jose (no está en
+requirements.txt; si falta se sigue con jose).
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from jose import JWTError, jwt as jose_jwt
+
+logger = logging.getLogger(__name__)
+
+JWT_CACHE_MAX_ENTRIES = int(os.getenv("JWT_CACHE_MAX_ENTRIES", "4096"))
+JWT_CACHE_TTL_SECONDS = float(os.getenv("JWT_CACHE_TTL_SECONDS", "300"))
+JWT_BACKEND = os.getenv("JWT_BACKEND", "jose").lower()
+
+
+def _jose_decode(token: str, key: str, algorithm: str) -> dict:
+    return jose_jwt.decode(token, key, algorithms=[algorithm])
+
+
+def _pyjwt_decoder() -> Callable[[str, str, str], dict] | None:
+    try:
+        import jwt as pyjwt
+    except ImportError:
+        return None
+
+    def decode(token: str, key: str, algorithm: str) -> dict:
+        try:
+            return pyjwt.decode(token, key, algorithms=[algorithm])
+        except pyjwt.PyJWTError as e:
+            # Mismo tipo de error que jose para que los llamadores no cambien
+            raise JWTError(str(e)) from e
+
+    return decode
+
+
+@functools.lru_cache(maxsize=8)
+def signing_key_id(key: str, algorithm: str) -> str:
+    """Identificador de la clave para indexar la caché sin guardar la clave misma."""
+    return hashlib.sha256(f"{algorithm}:{key}".encode()).hexdigest()[:16]
+
+
+decode_jwt: Callable[[str, str, str], dict] = _jose_decode
+if JWT_BACKEND == "pyjwt":
+    decode_jwt = _pyjwt_decoder() or _jose_decode
+    if decode_jwt is _jose_decode:
+        logger.warning("JWT_BACKEND=pyjwt pero PyJWT no está instalado; se usa python-jose")
+
+
+class TokenCache:
+
+    def __init__(self, max_entries: int = JWT_CACHE_MAX_ENTRIES,
+                 ttl_seconds: float = JWT_CACHE_TTL_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # Reloj de pared: se compara contra el claim exp (epoch)
+        self._clock = clock
+        # sha256(key_id, token) -> (claims, válido hasta)
+        self._entries: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def get_or_decode(self, token: str, decode: Callable[[str], dict], key_id: str = "") -> dict:
+        """
+        Devuelve los claims del token, verificándolo con `decode` si no está en
+        caché. `key_id` identifica la clave con la que verifica `decode`; una
+        entrada sólo se reutiliza con el mismo key_id. Los errores de `decode` se
+        propagan y no se cachean. Los claims devueltos son compartidos: no deben modificarse.
+        """
+        if self.max_entries <= 0:
+            return decode(token)
+        key = hashlib.sha256(f"{key_id}\0{token}".encode()).digest()
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now < entry[1]:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[key]
+                self.expirations += 1
+
+        claims = decode(token)
+        valid_until = now + self.ttl_seconds
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            valid_until = min(valid_until, exp)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (claims, valid_until)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return claims
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": "pyjwt" if decode_jwt is not _jose_decode else "jose",
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+token_cache = TokenCache()
@@ -0,0 +1,44 @@
+# app/utils/http_range.py
+from fastapi import HTTPException
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Compara If-None-Match con el ETag (comparación débil, admite listas y *)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def parse_byte_range(range_header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Interpreta un encabezado Range de un solo rango y devuelve (inicio, fin) inclusivo.
+    Devuelve None si no hay rango o si se piden varios (se responde el archivo completo);
+    lanza 416 si el rango no es satisfacible.
+    """
+    if not range_header:
+        return None
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_s, sep, end_s = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if start_s == "":
+            # bytes=-N: los últimos N bytes
+            suffix = int(end_s)
+            if suffix <= 0:
+                raise ValueError
+            start, end = max(size - suffix, 0), size - 1
+        else:
+            start = int(start_s)
+            end = int(end_s) if end_s else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Rango no satisfacible",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1)
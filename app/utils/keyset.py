@@ -0,0 +1,22 @@
+# app/utils/keyset.py
+import base64
+import json
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(*key) -> str:
+    """Cursor opaco con la llave de orden de la última fila entregada."""
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Llave del cursor; 400 si no es un cursor emitido por encode_cursor con `size` valores."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        key = None
+    if not isinstance(key, list) or len(key) != size:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+    return key
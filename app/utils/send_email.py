@@ -1,19 +1,14 @@
-import smtplib
 from dotenv import load_dotenv
 from email.message import EmailMessage
 import os
 
+from app.infrastructure.smtp_pool import get_smtp_pool
 from app.schemas.Dtos.DocumentDtos import NotificationEmailDto
 
 load_dotenv()
 
 def send_email_password(to_email: str, reset_url: str):
-    smtp_server = os.getenv("SMTP_SERVER")
-    smtp_port = int(os.getenv("SMTP_PORT", 587))
     smtp_user = os.getenv("SMTP_USER")
-    smtp_password = os.getenv("SMTP_PASSWORD")
-    smtp_tls = os.getenv("SMTP_TLS", "1").lower() in ("1", "true", "yes")
-    smtp_ssl = os.getenv("SMTP_SSL", "0").lower() in ("1", "true", "yes")
 
     msg = EmailMessage()
     msg["Subject"] = "Recuperación de contraseña"
@@ -32,31 +27,24 @@ def send_email_password(to_email: str, reset_url: str):
     """
     msg.add_alternative(html_content, subtype="html")
 
+    get_smtp_pool().send_message(msg)
 
-    if smtp_ssl:
-        with smtplib.SMTP_SSL(smtp_server, smtp_port) as server:
-            server.login(smtp_user, smtp_password)
-            server.send_message(msg)
-    else:
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            if smtp_tls:
-                server.starttls()
-            server.login(smtp_user, smtp_password)
-            server.send_message(msg)
+def build_email_message(to_email: str, subject: str, body_text: str, body_html: str | None = None) -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = subject
+    msg["From"] = os.getenv("SMTP_USER")
+    msg["To"] = to_email
+    msg.set_content(body_text)
+    if body_html:
+        msg.add_alternative(body_html, subtype="html")
+    return msg
 
-def send_email_notification(notification_data: NotificationEmailDto):
-    smtp_server = os.getenv("SMTP_SERVER")
-    smtp_port = int(os.getenv("SMTP_PORT", 587))
-    smtp_user = os.getenv("SMTP_USER")
-    smtp_password = os.getenv("SMTP_PASSWORD")
-    smtp_tls = os.getenv("SMTP_TLS", "1").lower() in ("1", "true", "yes")
-    smtp_ssl = os.getenv("SMTP_SSL", "0").lower() in ("1", "true", "yes")
 
-    msg = EmailMessage()
-    msg["Subject"] = notification_data.subject
-    msg["From"] = smtp_user
-    msg["To"] = notification_data.to_email
-    msg.set_content(f"Se ha generado el documento {notification_data.documento} el cual necesita que realices la siguiente acción: {notification_data.accion}.")
+def render_notification(notification_data: NotificationEmailDto) -> tuple[str, str, str]:
+    """
+    Devuelve (asunto, texto, html) de la notificación de documento.
+    """
+    body_text = f"Se ha generado el documento {notification_data.documento} el cual necesita que realices la siguiente acción: {notification_data.accion}."
 
     html_content = f"""
     <html>
@@ -70,15 +58,12 @@ def send_email_notification(notification_data: NotificationEmailDto):
         </body>
     </html>
     """
-    msg.add_alternative(html_content, subtype="html")
+    return notification_data.subject, body_text, html_content
+
+
+def send_email_notification(notification_data: NotificationEmailDto):
+    subject, body_text, body_html = render_notification(notification_data)
+    msg = build_email_message(notification_data.to_email, subject, body_text, body_html)
 
-    # Usar TLS por defecto si no es SSL explícito
-    if smtp_ssl:
-        with smtplib.SMTP_SSL(smtp_server, smtp_port) as server:
-            server.login(smtp_user, smtp_password)
-            server.send_message(msg)
-    else:
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()  # Forzar TLS
-            server.login(smtp_user, smtp_password)
-            server.send_message(msg)
\ No newline at end of file
+    # Conexión del pool (TLS según SMTP_TLS/SMTP_SSL)
+    get_smtp_pool().send_message(msg)
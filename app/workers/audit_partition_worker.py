@@ -0,0 +1,46 @@
+#Archivo Workers/ Particiones de auditoría
+"""
+Mantenimiento periódico de las particiones de iso.audit_log.
+
+Embebido en la API con AUDIT_PARTITION_MAINTENANCE=1 (valor por defecto): hace
+una pasada al arrancar y otra cada AUDIT_PARTITION_INTERVAL_SECONDS, así un
+proceso que pasa meses sin reiniciarse sigue creando las particiones por
+adelantado. Como proceso independiente:
+    python -m app.workers.audit_partition_worker
+"""
+from __future__ import annotations
+
+import logging
+import threading
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.infrastructure.audit_partitions import (
+    AUDIT_PARTITION_INTERVAL_SECONDS, AUDIT_PARTITION_MAINTENANCE, run_maintenance,
+)
+from app.workers.runner import run_forever, run_loop, start_embedded
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def _tick(db: Session) -> int:
+    run_maintenance(db)
+    # Siempre espera el intervalo completo antes de la siguiente pasada
+    return 0
+
+
+def run_worker(stop_event: threading.Event | None = None) -> None:
+    run_loop("particiones de auditoría", _tick, AUDIT_PARTITION_INTERVAL_SECONDS, stop_event)
+
+
+def start_embedded_worker() -> tuple[threading.Thread, threading.Event] | None:
+    if not AUDIT_PARTITION_MAINTENANCE:
+        return None
+    return start_embedded("audit-partition-worker", run_worker)
+
+
+if __name__ == "__main__":
+    run_forever(run_worker)
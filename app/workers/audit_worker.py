@@ -0,0 +1,61 @@
+#Archivo Workers/ Envío de auditoría
+"""
+Worker que pasa la outbox de auditoría (iso.audit_outbox) a iso.audit_log.
+
+Sólo tiene trabajo con AUDIT_SINK=async. Embebido en la API (valor por
+defecto, AUDIT_WORKER_EMBEDDED=1) despierta cada AUDIT_FLUSH_INTERVAL_SECONDS
+o en cuanto el buffer junta AUDIT_BATCH_SIZE ids. Como proceso independiente:
+    python -m app.workers.audit_worker
+no ve el buffer de la API y trabaja sólo con el barrido de filas más viejas
+que AUDIT_OUTBOX_GRACE_SECONDS.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.infrastructure.audit_sink import (
+    AUDIT_FLUSH_INTERVAL_SECONDS, AUDIT_OUTBOX_GRACE_SECONDS, AUDIT_SINK, AuditSink, audit_sink,
+)
+from app.infrastructure.query_stats import track_queries
+from app.workers.runner import run_forever, run_loop, start_embedded, worker_enabled
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def run_pending(db: Session, sink: AuditSink | None = None, grace_seconds: float = AUDIT_OUTBOX_GRACE_SECONDS) -> int:
+    """Vacía el buffer y barre la outbox. Devuelve cuántos registros escribió."""
+    sink = sink or audit_sink
+    written = 0
+    while len(sink):
+        with track_queries("worker audit_batch"):
+            written += sink.ship(db)
+    while True:
+        with track_queries("worker audit_sweep"):
+            swept = sink.sweep(db, grace_seconds)
+        if not swept:
+            return written
+        written += swept
+
+
+def run_worker(stop_event: threading.Event | None = None, sink: AuditSink | None = None) -> None:
+    sink = sink or audit_sink
+    # La última pasada al parar deja el buffer vacío; lo que quede en la outbox lo
+    # toma el barrido del siguiente arranque
+    run_loop("auditoría", lambda db: run_pending(db, sink), AUDIT_FLUSH_INTERVAL_SECONDS, stop_event,
+             wake=sink.batch_ready, final_pass=True)
+
+
+def start_embedded_worker() -> tuple[threading.Thread, threading.Event] | None:
+    if AUDIT_SINK != "async" or not worker_enabled("AUDIT_WORKER_EMBEDDED"):
+        return None
+    return start_embedded("audit-worker", run_worker)
+
+
+if __name__ == "__main__":
+    run_forever(run_worker)
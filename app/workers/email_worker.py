@@ -0,0 +1,95 @@
+#Archivo Workers/ Envío de correos
+"""
+Worker que despacha la bandeja de salida (iso.email_outbox).
+
+Uso como proceso independiente:
+    python -m app.workers.email_worker
+
+Cada lote de hasta EMAIL_BATCH_SIZE correos se envía por una sola sesión SMTP
+autenticada. Con EMAIL_WORKER_EMBEDDED=1 (valor por defecto) el lifespan de la
+API arranca el mismo bucle en un hilo; poner 0 cuando se despliegue aparte.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import smtplib
+import threading
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app.infrastructure.query_stats import track_queries
+from app.infrastructure.email_outbox import get_email_outbox
+from app.infrastructure.smtp_pool import get_smtp_pool
+from app.utils.send_email import build_email_message
+from app.workers.runner import run_forever, run_loop, start_embedded, worker_enabled
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+EMAIL_WORKER_POLL_SECONDS = float(os.getenv("EMAIL_WORKER_POLL_SECONDS", "5"))
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+
+# Errores propios del mensaje: se reintenta sólo ese correo y la sesión sigue
+_MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError,
+                   smtplib.SMTPNotSupportedError, ValueError)
+
+
+def send_batch(db: Session, outbox=None, mailer=None, limit: int = EMAIL_BATCH_SIZE) -> int:
+    """
+    Envía un lote por una sola conexión. Si la sesión se cae a medio lote, los
+    correos que faltaban se reprograman con backoff. Devuelve cuántos reclamó.
+    """
+    outbox = outbox or get_email_outbox()
+    mailer = mailer or get_smtp_pool()
+    emails = outbox.claim_batch(db, limit)
+    if not emails:
+        return 0
+
+    pending = list(emails)
+    try:
+        with mailer.connection() as server:
+            while pending:
+                email = pending[0]
+                try:
+                    server.send_message(build_email_message(
+                        email["to_email"], email["subject"], email["body_text"], email["body_html"]))
+                except _MESSAGE_ERRORS as e:
+                    logger.warning("Correo %s a %s falló: %s", email["email_id"], email["to_email"], e)
+                    outbox.mark_failed(db, email, str(e))
+                else:
+                    outbox.mark_done(db, email["email_id"])
+                pending.pop(0)
+    except Exception as e:
+        db.rollback()
+        logger.warning("Sesión SMTP falló con %s correos pendientes: %s", len(pending), e)
+        for email in pending:
+            outbox.mark_failed(db, email, str(e))
+    return len(emails)
+
+
+def run_pending(db: Session, outbox=None, mailer=None) -> int:
+    """Envía lotes hasta vaciar la bandeja. Devuelve cuántos correos tomó."""
+    processed = 0
+    while True:
+        with track_queries("worker email_batch"):
+            claimed = send_batch(db, outbox, mailer)
+        if not claimed:
+            return processed
+        processed += claimed
+
+
+def run_worker(stop_event: threading.Event | None = None) -> None:
+    run_loop("correo", run_pending, EMAIL_WORKER_POLL_SECONDS, stop_event)
+
+
+def start_embedded_worker() -> tuple[threading.Thread, threading.Event] | None:
+    if not worker_enabled("EMAIL_WORKER_EMBEDDED"):
+        return None
+    return start_embedded("email-worker", run_worker)
+
+
+if __name__ == "__main__":
+    run_forever(run_worker)
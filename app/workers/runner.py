@@ -0,0 +1,71 @@
+#Archivo Workers/ Bucle común
+"""
+Bucle de polling y arranque embebido que comparten los workers.
+
+Cada worker aporta una función `tick(db) -> int` que hace una pasada con una
+sesión nueva y devuelve cuánto trabajo hizo. Embebido en la API, el worker
+corre en un hilo daemon que el lifespan detiene con el Event devuelto por
+start_embedded; como proceso independiente se llama a run_loop directamente.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from app.infrastructure.db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def run_loop(label: str, tick: Callable[[Session], int], poll_seconds: float,
+             stop_event: threading.Event | None = None, wake: threading.Event | None = None,
+             final_pass: bool = False, session_factory: Callable[[], Session] = SessionLocal) -> None:
+    """
+    Llama a `tick` hasta que se pida parar. Sin trabajo espera `poll_seconds`; con
+    `wake` espera siempre en ese Event, que el productor marca cuando hay un lote
+    listo. Con `final_pass` hace una última pasada después de la señal de parada.
+    """
+    stop_event = stop_event or threading.Event()
+    logger.info("Worker de %s iniciado", label)
+    while True:
+        stopping = stop_event.is_set()
+        if stopping and not final_pass:
+            return
+        db = session_factory()
+        try:
+            processed = tick(db)
+        except Exception:
+            logger.exception("Error en el worker de %s", label)
+            processed = 0
+        finally:
+            db.close()
+        if stopping:
+            return
+        if wake is not None:
+            wake.wait(poll_seconds)
+        elif not processed:
+            stop_event.wait(poll_seconds)
+
+
+def worker_enabled(env_name: str) -> bool:
+    return os.getenv(env_name, "1").lower() in ("1", "true", "yes")
+
+
+def start_embedded(name: str, run: Callable[[threading.Event], None]) -> tuple[threading.Thread, threading.Event]:
+    stop_event = threading.Event()
+    thread = threading.Thread(target=run, args=(stop_event,), name=name, daemon=True)
+    thread.start()
+    return thread, stop_event
+
+
+def run_forever(run: Callable[[], None]) -> None:
+    """Punto de entrada de `python -m app.workers.<worker>`."""
+    logging.basicConfig(level=logging.INFO)
+    try:
+        run()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,96 @@
+#Archivo Workers/ Estampado de PDFs
+"""
+Worker que procesa la cola de estampado (iso.stamp_job).
+
+Uso como proceso independiente:
+    python -m app.workers.stamp_worker
+
+Con STAMP_WORKER_EMBEDDED=1 (valor por defecto) el lifespan de la API arranca
+el mismo bucle en un hilo; poner 0 cuando se despliegue el worker aparte.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import Callable
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.infrastructure.query_stats import track_queries
+from app.infrastructure.stamp_queue import get_stamp_queue
+from app.workers.runner import run_forever, run_loop, start_embedded, worker_enabled
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+STAMP_WORKER_POLL_SECONDS = float(os.getenv("STAMP_WORKER_POLL_SECONDS", "2"))
+
+
+def stamp_job(db: Session, queue, job: dict) -> None:
+    """
+    Estampa el PDF de un trabajo. Es idempotente ante reintentos: se registra la
+    generación del blob antes de estampar y, si al reintentar ya cambió, el intento
+    previo llegó a subir el PDF y sólo falta marcarlo como terminado.
+    """
+    # Import diferido: el servicio importa la cola y este módulo importa el servicio
+    from app.services.document_google_service import _overlay_pdf_with_status_image
+    from app.services.google_cloud_aservice import get_blob_generation, extract_blob_name
+
+    generation = get_blob_generation(extract_blob_name(job["archivo_url"]))
+    if job["source_generation"] is not None and generation != job["source_generation"]:
+        return
+    queue.set_source_generation(db, job["job_id"], generation)
+
+    _overlay_pdf_with_status_image(
+        db,
+        job["archivo_url"],
+        job["status_item_id"],
+        signer_name=job["signer_name"],
+        fecha=job["fecha"],
+        nombre_documento=job["nombre_documento"],
+        if_generation_match=generation,
+    )
+
+
+def run_pending(db: Session, queue=None, handler: Callable[[Session, object, dict], None] = stamp_job,
+                limit: int | None = None) -> int:
+    """
+    Procesa trabajos hasta vaciar la cola (o hasta `limit`). Devuelve cuántos tomó.
+    """
+    queue = queue or get_stamp_queue()
+    processed = 0
+    while limit is None or processed < limit:
+        job = queue.claim(db)
+        if not job:
+            break
+        processed += 1
+        try:
+            with track_queries("worker stamp_job"):
+                handler(db, queue, job)
+        except Exception as e:
+            db.rollback()
+            error = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.warning("Estampado job=%s version=%s intento=%s falló: %s",
+                           job["job_id"], job["version_id"], job["attempts"], error)
+            queue.mark_failed(db, job, str(error))
+        else:
+            queue.mark_done(db, job["job_id"])
+    return processed
+
+
+def run_worker(stop_event: threading.Event | None = None) -> None:
+    run_loop("estampado", run_pending, STAMP_WORKER_POLL_SECONDS, stop_event)
+
+
+def start_embedded_worker() -> tuple[threading.Thread, threading.Event] | None:
+    if not worker_enabled("STAMP_WORKER_EMBEDDED"):
+        return None
+    return start_embedded("stamp-worker", run_worker)
+
+
+if __name__ == "__main__":
+    run_forever(run_worker)
@@ -0,0 +1,91 @@
+"""
+Espacio y tiempo de flush de la auditoría, completa contra compacta.
+
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.bench_audit_compaction [--rows 2000]
+
+Historial sintético sobre iso.catalog: cada fila se crea con una descripción
+larga tomada de un conjunto chico de plantillas (como los textos de riesgos y
+controles, que se repiten entre registros), se renombra, cambia de
+descripción y se borra. Todo corre en una transacción que se revierte al final;
+el espacio es la suma de pg_column_size de las filas de audit_log y audit_blob
+escritas.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import uuid
+
+from sqlalchemy import func, select
+
+import app.infrastructure.audit  # noqa: F401  (registra los listeners)
+from app.infrastructure import audit_blobs
+from app.infrastructure.db import SessionLocal
+from app.infrastructure.models import AuditBlob, AuditLog, Catalog
+
+_TEMPLATES = [
+    (f"Plantilla {n}. El activo presenta una vulnerabilidad en la gestión de accesos privilegiados; "
+     "se justifica el tratamiento por el impacto en la confidencialidad e integridad de la información. ") * 12
+    for n in range(20)
+]
+
+
+def _size(db, model, since_id=None) -> int:
+    stmt = select(func.coalesce(func.sum(func.pg_column_size(model.__table__.table_valued())), 0))
+    if since_id is not None:
+        stmt = stmt.where(AuditLog.id > since_id)
+    return db.scalar(stmt)
+
+
+def run(rows: int, compact: bool, compression: str) -> dict:
+    audit_blobs.AUDIT_COMPACT = compact
+    audit_blobs.AUDIT_BLOB_COMPRESSION = compression
+    db = SessionLocal()
+    try:
+        db.info["actor"] = "bench@empresa.test"
+        last_id = db.scalar(select(func.coalesce(func.max(AuditLog.id), 0)))
+        blob_bytes = _size(db, AuditBlob)
+        prefix = uuid.uuid4().hex[:8]
+        items = [Catalog(catalog_key=f"bench-{prefix}-{i}", name=f"Catálogo {i}",
+                         description=_TEMPLATES[i % len(_TEMPLATES)]) for i in range(rows)]
+        elapsed = 0.0
+        for change in (
+            lambda: db.add_all(items),
+            lambda: [setattr(item, "name", item.name + " (rev)") for item in items],
+            lambda: [setattr(item, "description", _TEMPLATES[(i + 1) % len(_TEMPLATES)]) for i, item in enumerate(items)],
+            lambda: [db.delete(item) for item in items],
+        ):
+            change()
+            start = time.perf_counter()
+            db.flush()
+            elapsed += time.perf_counter() - start
+        return {
+            "audit_log": _size(db, AuditLog, last_id),
+            "audit_blob": _size(db, AuditBlob) - blob_bytes,
+            "flush_ms": elapsed * 1000,
+        }
+    finally:
+        db.rollback()
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    header = f"{'modo':>16} {'audit_log KB':>13} {'audit_blob KB':>14} {'total KB':>9} {'flush ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for label, compact, compression in (("completa", False, "none"), ("compacta", True, "none"),
+                                        ("compacta+zlib", True, "zlib"), ("compacta+zstd", True, "zstd")):
+        if compression == "zstd" and audit_blobs._zstd() is None:
+            continue
+        result = run(args.rows, compact, compression)
+        total = result["audit_log"] + result["audit_blob"]
+        print(f"{label:>16} {result['audit_log'] / 1024:>13.1f} {result['audit_blob'] / 1024:>14.1f} "
+              f"{total / 1024:>9.1f} {result['flush_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
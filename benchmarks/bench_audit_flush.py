@@ -0,0 +1,85 @@
+"""
+Micro-benchmark del costo de la auditoría en el flush.
+
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.bench_audit_flush [--sizes 1 100 10000]
+
+Para cada tamaño inserta, modifica y borra N filas de iso.catalog en una
+transacción que se revierte al final, con y sin los listeners de audit.py, y
+reporta la mediana del tiempo de cada flush y las sentencias ejecutadas.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+import uuid
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.infrastructure import audit
+from app.infrastructure.db import SessionLocal, engine
+from app.infrastructure.models import Catalog
+
+_LISTENERS = (("before_flush", audit.audit_before_flush), ("after_flush", audit.audit_after_flush))
+
+
+def _set_audit(enabled: bool) -> None:
+    for name, listener in _LISTENERS:
+        if enabled and not event.contains(Session, name, listener):
+            event.listen(Session, name, listener)
+        elif not enabled and event.contains(Session, name, listener):
+            event.remove(Session, name, listener)
+
+
+def run_once(size: int) -> dict:
+    statements = [0]
+
+    def count(*_):
+        statements[0] += 1
+
+    timings = {}
+    event.listen(engine, "before_cursor_execute", count)
+    db = SessionLocal()
+    try:
+        db.info["actor"] = "bench@empresa.test"
+        prefix = uuid.uuid4().hex[:8]
+        items = [Catalog(catalog_key=f"bench-{prefix}-{i}", name=f"Catálogo {i}") for i in range(size)]
+        for phase, change in (
+            ("insert", lambda: db.add_all(items)),
+            ("update", lambda: [setattr(item, "description", "editado") for item in items]),
+            ("delete", lambda: [db.delete(item) for item in items]),
+        ):
+            change()
+            statements[0] = 0
+            start = time.perf_counter()
+            db.flush()
+            timings[phase] = ((time.perf_counter() - start) * 1000, statements[0])
+    finally:
+        db.rollback()
+        db.close()
+        event.remove(engine, "before_cursor_execute", count)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    header = f"{'filas':>7} {'auditoría':>10} {'fase':>7} {'mediana ms':>11} {'sentencias':>11}"
+    print(header)
+    print("-" * len(header))
+    for size in args.sizes:
+        for enabled in (False, True):
+            _set_audit(enabled)
+            runs = [run_once(size) for _ in range(args.repeat)]
+            for phase in ("insert", "update", "delete"):
+                median = statistics.median(r[phase][0] for r in runs)
+                print(f"{size:>7} {'sí' if enabled else 'no':>10} {phase:>7} {median:>11.2f} {runs[-1][phase][1]:>11}")
+    _set_audit(True)
+
+
+if __name__ == "__main__":
+    main()
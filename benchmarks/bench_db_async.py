@@ -0,0 +1,243 @@
+"""
+Benchmark de los endpoints de lectura: sesión sync (psycopg2 + threadpool) vs
+sesión async (asyncpg).
+
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.bench_db_async --seed
+    python -m benchmarks.bench_db_async [--concurrency 50 200] [--duration 15]
+
+La base debe tener el esquema migrado (alembic upgrade head). --seed crea las
+tablas de riesgos si faltan y carga una empresa de prueba (id 900001) con
+activos, riesgos, documentos y catálogos.
+
+El servidor (uvicorn, un worker) corre en un subproceso y expone cada listado
+dos veces, /sync/... con get_db y las funciones sync de los servicios, y
+/async/... con get_async_db y sus versiones async, así que las consultas son
+las mismas y sólo cambia el camino a la base. No pasa por auth ni middlewares.
+El generador de carga es un cliente httpx en el proceso principal: en una
+máquina con pocos núcleos compite con el servidor por CPU, así que los números
+sirven para comparar los dos caminos entre sí, no como capacidad absoluta.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.infrastructure.db import engine, get_async_db, get_db
+from app.services import assets_service, catalog_service, document_google_service, risks_service
+
+EMPRESA_ID = 900001
+USER = {"user_id": 1, "usuario_id": 1, "empresa_id": EMPRESA_ID, "area_id": None, "activo": True,
+        "roles": ["Administrador"], "permisos": []}
+
+ENDPOINTS = ("documents", "assets", "risks", "catalog")
+
+
+def create_app() -> FastAPI:
+    bench = FastAPI()
+
+    @bench.get("/sync/documents")
+    def sync_documents(db: Session = Depends(get_db)):
+        return document_google_service.get_documents_service(db, USER)
+
+    @bench.get("/async/documents")
+    async def async_documents(db: AsyncSession = Depends(get_async_db)):
+        return await document_google_service.aget_documents_service(db, USER)
+
+    @bench.get("/sync/assets")
+    def sync_assets(db: Session = Depends(get_db)):
+        items, total = assets_service.list_assets_paged(db, USER, None, 25, 0)
+        return {"items": [i.activo_id for i in items], "total": total}
+
+    @bench.get("/async/assets")
+    async def async_assets(db: AsyncSession = Depends(get_async_db)):
+        items, total = await assets_service.alist_assets_paged(db, USER, None, 25, 0)
+        return {"items": [i.activo_id for i in items], "total": total}
+
+    @bench.get("/sync/risks")
+    def sync_risks(db: Session = Depends(get_db)):
+        items, total = risks_service.list_riesgos_generales_paged(db, USER, None, 25, 0)
+        return {"items": [(i.riesgo_id, i.score) for i in items], "total": total}
+
+    @bench.get("/async/risks")
+    async def async_risks(db: AsyncSession = Depends(get_async_db)):
+        items, total = await risks_service.alist_riesgos_generales_paged(db, USER, None, 25, 0)
+        return {"items": [(i.riesgo_id, i.score) for i in items], "total": total}
+
+    @bench.get("/sync/catalog")
+    def sync_catalog(db: Session = Depends(get_db)):
+        from app.routers.catalogs import CatalogoItemSimple
+        rows = db.execute(catalog_service.catalog_items_stmt("tipo_activo", EMPRESA_ID)).scalars().all()
+        return [CatalogoItemSimple.model_validate(r) for r in rows]
+
+    @bench.get("/async/catalog")
+    async def async_catalog(db: AsyncSession = Depends(get_async_db)):
+        from app.routers.catalogs import CatalogoItemSimple
+        rows = await catalog_service.list_catalog_items(db, "tipo_activo", EMPRESA_ID)
+        return [CatalogoItemSimple.model_validate(r) for r in rows]
+
+    return bench
+
+
+# ---------- Datos de prueba ----------
+CATALOGS = {
+    "tipo_documento": 900101, "clasificacion_documento": 900102, "estado_documento": 900103,
+    "tipo_activo": 900104, "estado_activo": 900105, "clasificacion_activo": 900106, "area": 900107,
+}
+
+
+def seed(activos: int, riesgos: int, documentos: int) -> None:
+    from app.infrastructure.risks_infra import Riesgo, RiesgoGeneralExtra
+
+    with engine.begin() as conn:
+        Riesgo.__table__.create(conn, checkfirst=True)
+        RiesgoGeneralExtra.__table__.create(conn, checkfirst=True)
+        for table in ("documento", "activo", "areas", "empresa"):
+            conn.execute(text(f"DELETE FROM {table} WHERE empresa_id = :e"), {"e": EMPRESA_ID})
+        conn.execute(text("DELETE FROM catalog WHERE catalog_id = ANY(:ids)"), {"ids": list(CATALOGS.values())})
+        conn.execute(text("DELETE FROM riesgo WHERE empresa_id = :e"), {"e": EMPRESA_ID})
+        conn.execute(text("INSERT INTO empresa (empresa_id, nombre_legal) VALUES (:e, 'Empresa Benchmark')"),
+                     {"e": EMPRESA_ID})
+        for key, catalog_id in CATALOGS.items():
+            conn.execute(text("INSERT INTO catalog (catalog_id, catalog_key, name) VALUES (:id, :key, :key)"),
+                         {"id": catalog_id, "key": key})
+            conn.execute(text("""
+                INSERT INTO catalog_item (item_id, catalog_id, code, name, sort_order)
+                SELECT :id * 10 + n, :id, 'C' || n, :key || ' ' || n, n FROM generate_series(1, 6) n
+            """), {"id": catalog_id, "key": key})
+        item = {key: catalog_id * 10 + 1 for key, catalog_id in CATALOGS.items()}
+        conn.execute(text("INSERT INTO areas (area_id, empresa_id, nombre) VALUES (:a, :e, 'Área Benchmark')"),
+                     {"a": item["area"], "e": EMPRESA_ID})
+        conn.execute(text("""
+            INSERT INTO activo (empresa_id, nombre, tipo_item_id, estado_item_id, clasificacion_item_id,
+                                descripcion, ubicacion, marca, valor)
+            SELECT :e, 'ACTIVO ' || n, :tipo, :estado, :clas, 'Descripción del activo ' || n, 'Sitio ' || (n % 7),
+                   'Marca ' || (n % 13), n * 10
+              FROM generate_series(1, :n) n
+        """), {"e": EMPRESA_ID, "tipo": item["tipo_activo"], "estado": item["estado_activo"],
+               "clas": item["clasificacion_activo"], "n": activos})
+        conn.execute(text("""
+            WITH r AS (
+                INSERT INTO riesgo (empresa_id, tipo_riesgo, nombre, descripcion, created_at, updated_at)
+                SELECT :e, 'general', 'Riesgo ' || n, 'Descripción del riesgo ' || n, now(), now()
+                  FROM generate_series(1, :n) n
+                RETURNING riesgo_id)
+            INSERT INTO riesgo_general (riesgo_id, score) SELECT riesgo_id, riesgo_id % 25 FROM r
+        """), {"e": EMPRESA_ID, "n": riesgos})
+        conn.execute(text("""
+            WITH d AS (
+                INSERT INTO documento (empresa_id, nombre, codigo, tipo_item_id, area_responsable_item_id,
+                                       clasificacion_item_id)
+                SELECT :e, 'Documento ' || n, 'DOC-' || n, :tipo, :area, :clas FROM generate_series(1, :n) n
+                RETURNING documento_id)
+            INSERT INTO documento_version (documento_id, numero_version, estado_item_id, archivo_url)
+            SELECT documento_id, 1, :estado, 'memory:///documentos/' || documento_id || '.pdf' FROM d
+        """), {"e": EMPRESA_ID, "tipo": item["tipo_documento"], "area": item["area"],
+               "clas": item["clasificacion_documento"], "estado": item["estado_documento"], "n": documentos})
+        conn.execute(text("ANALYZE"))
+
+
+# ---------- Carga ----------
+async def _load(base_url: str, path: str, concurrency: int, duration: float) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code != 200:
+                        errors += 1
+                        continue
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 1) if latencies else None,
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 1) if latencies else None,
+    }
+
+
+def _wait_ready(base_url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/docs", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("El servidor de benchmark no arrancó")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", action="store_true", help="cargar datos de prueba y salir")
+    parser.add_argument("--activos", type=int, default=5000)
+    parser.add_argument("--riesgos", type=int, default=2000)
+    parser.add_argument("--documentos", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--endpoints", nargs="+", default=list(ENDPOINTS), choices=ENDPOINTS)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.activos, args.riesgos, args.documentos)
+        print(f"Datos cargados para empresa {EMPRESA_ID}")
+        return
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "--factory", "benchmarks.bench_db_async:create_app",
+         "--port", str(args.port), "--log-level", "warning", "--no-access-log"],
+        env=os.environ.copy(),
+    )
+    try:
+        _wait_ready(base_url)
+        print(f"{'endpoint':<10} {'clientes':>8} {'modo':<6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errores':>8}")
+        results = []
+        for endpoint in args.endpoints:
+            for concurrency in args.concurrency:
+                for mode in ("sync", "async"):
+                    path = f"/{mode}/{endpoint}"
+                    asyncio.run(_load(base_url, path, concurrency, 2))  # calentamiento
+                    r = asyncio.run(_load(base_url, path, concurrency, args.duration))
+                    r.update(endpoint=endpoint, concurrency=concurrency, mode=mode)
+                    results.append(r)
+                    print(f"{endpoint:<10} {concurrency:>8} {mode:<6} {r['rps']:>8} {r['p50_ms']:>8} "
+                          f"{r['p99_ms']:>8} {r['errors']:>8}")
+        print(json.dumps(results))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
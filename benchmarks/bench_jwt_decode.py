@@ -0,0 +1,84 @@
+"""
+Benchmark de la verificación del JWT en get_current_user.
+
+    python -m benchmarks.bench_jwt_decode [--iterations 20000] [--tokens 1 100]
+
+Compara, por llamada:
+- jose:        python-jose verificando firma y claims (lo que se hacía siempre)
+- pyjwt:       PyJWT, si está instalado (JWT_BACKEND=pyjwt)
+- caché:       token_cache con el token ya verificado
+- dependencia: get_current_user completo (caché + armado del usuario)
+
+--tokens simula cuántos usuarios distintos rotan en la caché.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from datetime import timedelta
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from app.services import auth_service  # noqa: E402
+from app.services.token_cache import TokenCache, _jose_decode, _pyjwt_decoder  # noqa: E402
+
+
+def make_tokens(count: int) -> list[str]:
+    return [
+        auth_service.create_access_token(payload={
+            "sub": str(i), "email": f"usuario{i}@empresa.test", "first_name": "Ana", "last_name": "Pérez",
+            "empresa_id": 1, "area_id": 1, "activo": True, "roles": ["Administrador", "Revisor"],
+            "permisos": [f"permiso_{p}" for p in range(30)],
+        }, expires_delta=timedelta(hours=1))
+        for i in range(count)
+    ]
+
+
+def run_sync(coro):
+    # get_current_user no espera nada: basta un send() para completarla sin pasar por un event loop
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("la corrutina quedó suspendida")
+
+
+def measure(fn, tokens: list[str], iterations: int) -> float:
+    """Microsegundos por llamada."""
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(tokens[i % len(tokens)])
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, nargs="+", default=[1, 100])
+    args = parser.parse_args()
+
+    key, algorithm = auth_service.SECRET_KEY, auth_service.ALGORITHM
+    pyjwt_decode = _pyjwt_decoder()
+
+    header = f"{'tokens':>7} {'modo':>12} {'µs/llamada':>11}"
+    print(header)
+    print("-" * len(header))
+    for count in args.tokens:
+        tokens = make_tokens(count)
+        cases = {"jose": lambda t: _jose_decode(t, key, algorithm)}
+        if pyjwt_decode is not None:
+            cases["pyjwt"] = lambda t: pyjwt_decode(t, key, algorithm)
+        cache = TokenCache()
+        cases["caché"] = lambda t: cache.get_or_decode(t, lambda tok: _jose_decode(tok, key, algorithm))
+        auth_service.token_cache.clear()
+        cases["dependencia"] = lambda t: run_sync(auth_service.get_current_user(t))
+
+        for name, fn in cases.items():
+            fn(tokens[0])
+            print(f"{count:>7} {name:>12} {measure(fn, tokens, args.iterations):>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
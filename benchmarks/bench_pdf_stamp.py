@@ -0,0 +1,129 @@
+"""
+Benchmark del estampado de PDFs: reescritura completa vs actualización incremental.
+
+    python -m benchmarks.bench_pdf_stamp [--pages 1 50 500] [--repeat 5]
+
+Cada caso corre en un subproceso aparte para que el pico de RSS (ru_maxrss)
+corresponda sólo a ese modo y tamaño. La latencia incluye abrir el PDF, generar
+el overlay, estampar y leer el resultado completo (como lo haría la subida).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+from PIL import Image as PILImage
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from app.services.pdf_stamp_service import StampablePdf
+
+PAGE_SIZE = (595.0, 842.0)
+
+
+def build_pdf(pages: int) -> bytes:
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=PAGE_SIZE)
+    for i in range(pages):
+        c.setFont("Helvetica-Bold", 16)
+        c.drawCentredString(PAGE_SIZE[0] / 2, PAGE_SIZE[1] / 2 + 80, "NombreDocumento")
+        c.setFont("Helvetica", 10)
+        for line in range(60):
+            c.drawString(40, 800 - line * 12, f"Página {i + 1} - política de seguridad de la información, línea {line}")
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def build_overlay(width: float, height: float) -> bytes:
+    img = PILImage.new("RGBA", (400, 150), (255, 255, 255, 0))
+    for x in range(40, 360):
+        img.putpixel((x, 75 + (x % 30) - 15), (0, 0, 0, 255))
+    png = BytesIO()
+    img.save(png, format="PNG")
+    png.seek(0)
+
+    packet = BytesIO()
+    c = canvas.Canvas(packet, pagesize=(width, height))
+    c.setFillColorRGB(1, 1, 1)
+    c.rect(width / 2 - 90, height / 2 + 76, 180, 24, fill=1, stroke=0)
+    c.setFillColorRGB(0, 0, 0)
+    c.setFont("Helvetica-Bold", 16)
+    c.drawCentredString(width / 2, height / 2 + 80, "Política de Seguridad")
+    c.drawImage(ImageReader(png), 60, 160, width=100, height=38, mask="auto")
+    c.setFont("Helvetica", 10)
+    c.drawCentredString(110, 206, "Revisor de Prueba")
+    c.drawCentredString(110, 218, "17-10-2026 10:00")
+    c.save()
+    return packet.getvalue()
+
+
+def _stamp_once(pdf_bytes: bytes, mode: str) -> tuple[float, str, int]:
+    start = time.perf_counter()
+    target = StampablePdf(pdf_bytes)
+    result = target.stamp(build_overlay(*target.page_size), mode=mode)
+    stream = result.open()
+    while stream.read(1024 * 1024):
+        pass
+    return (time.perf_counter() - start) * 1000, result.mode, result.size
+
+
+def run_child(mode: str, path: str, repeat: int) -> None:
+    with open(path, "rb") as f:
+        pdf_bytes = f.read()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    for _ in range(repeat):
+        elapsed, used_mode, size = _stamp_once(pdf_bytes, mode)
+        timings.append(elapsed)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "mode": used_mode,
+        "input_bytes": len(pdf_bytes),
+        "output_bytes": size,
+        "median_ms": round(statistics.median(timings), 2),
+        "peak_rss_kb": rss_after,
+        "rss_growth_kb": rss_after - rss_before,
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], args.repeat)
+        return
+
+    header = f"{'páginas':>8} {'modo':>12} {'entrada KB':>11} {'salida KB':>10} {'mediana ms':>11} {'pico RSS MB':>12} {'Δ RSS MB':>9}"
+    print(header)
+    print("-" * len(header))
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = os.path.join(tmp, f"doc_{pages}.pdf")
+            with open(path, "wb") as f:
+                f.write(build_pdf(pages))
+            for mode in ("rewrite", "incremental"):
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_pdf_stamp", "--repeat", str(args.repeat),
+                     "--child", mode, path],
+                    check=True, capture_output=True, text=True,
+                )
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                print(f"{pages:>8} {r['mode']:>12} {r['input_bytes'] / 1024:>11.1f} {r['output_bytes'] / 1024:>10.1f} "
+                      f"{r['median_ms']:>11.2f} {r['peak_rss_kb'] / 1024:>12.1f} {r['rss_growth_kb'] / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import asyncio
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from sqlalchemy import create_engine, event, func, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.infrastructure.audit import _json_value
+from app.infrastructure.audit_blobs import encode_blob, decode_blob
+from app.infrastructure.models import AuditBlob, AuditLog, Catalog
+from app.schemas.audit import AuditLogFilters
+from app.services import audit_service
+
+
+def _session():
+    # El INSERT ... ON CONFLICT (hash) DO NOTHING de audit_blobs también compila en SQLite
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", lambda conn, _: conn.execute("ATTACH DATABASE ':memory:' AS iso"))
+    Catalog.__table__.create(engine)
+    AuditLog.__table__.create(engine)
+    AuditBlob.__table__.create(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    return Session(engine), statements
+
+
+def test_flush_writes_all_audit_rows_in_one_statement():
+    db, statements = _session()
+    db.info["actor"] = "ana@empresa.test"
+    db.add_all([Catalog(catalog_id=i + 1, catalog_key=f"K{i}", name=f"Catálogo {i}") for i in range(3)])
+    db.flush()
+    assert sum("INSERT INTO iso.audit_log" in s for s in statements) == 1
+
+    rows = db.execute(select(AuditLog).order_by(AuditLog.id)).scalars().all()
+    assert [r.operation for r in rows] == ["CREATE"] * 3
+    assert all(r.target_pk_id == r.target_pk["catalog_id"] and r.target_pk_id for r in rows)
+    assert rows[0].after["catalog_key"] == "K0"
+    assert rows[0].actor == "ana@empresa.test"
+
+    first, second, third = db.execute(select(Catalog).order_by(Catalog.catalog_id)).scalars().all()
+    first.name = "Renombrado"
+    first.description = "Nueva"
+    db.delete(second)
+    statements.clear()
+    db.flush()
+    assert sum("INSERT INTO iso.audit_log" in s for s in statements) == 1
+
+    update, delete = db.execute(select(AuditLog).where(AuditLog.id > rows[-1].id).order_by(AuditLog.id)).scalars()
+    assert (update.operation, update.before, update.after) == (
+        "UPDATE", {"name": "Catálogo 0", "description": None}, {"name": "Renombrado", "description": "Nueva"})
+    assert (delete.operation, delete.target_pk, delete.after) == ("DELETE", {"catalog_id": second.catalog_id}, None)
+    assert delete.before["catalog_key"] == "K1"
+
+
+def test_flush_without_changes_writes_nothing():
+    db, statements = _session()
+    db.flush()
+    assert not any("audit_log" in s for s in statements)
+
+
+def test_json_values_cover_decimal_and_dates():
+    assert _json_value({"monto": Decimal("1.5"), "fechas": [date(2025, 1, 31)]}) == {
+        "monto": 1.5, "fechas": ["2025-01-31"]}
+
+
+def test_large_texts_are_stored_once_and_history_is_reconstructed():
+    db, statements = _session()
+    long_text = "Control de acceso lógico. " * 40
+    db.add(Catalog(catalog_id=1, catalog_key="K", name="Catálogo", description=long_text))
+    db.flush()
+    catalog = db.get(Catalog, 1)
+    catalog.name = "Renombrado"
+    db.flush()
+    catalog.description = long_text + "Revisado."
+    db.flush()
+    db.delete(catalog)
+    db.flush()
+
+    create, rename, edit, delete = db.execute(select(AuditLog).order_by(AuditLog.id)).scalars()
+    # Sin NULLs en el alta y el texto largo como referencia
+    assert None not in create.after.values()
+    assert set(create.after["description"]) == {"$blob"}
+    assert create.after["description"] == edit.before["description"]
+    assert db.scalar(select(func.count()).select_from(AuditBlob)) == 2
+
+    history = audit_service.reconstruct_history(db, "catalog", 1)
+    assert [e["operation"] for e in history] == ["CREATE", "UPDATE", "UPDATE", "DELETE"]
+    assert history[0]["after"]["description"] == long_text
+    assert history[1]["state"]["name"] == "Renombrado" and history[1]["state"]["catalog_key"] == "K"
+    assert history[2]["state"]["description"] == long_text + "Revisado."
+    assert history[3]["state"] is None and history[3]["before"]["description"] == long_text + "Revisado."
+    assert audit_service.snapshot_at(db, "catalog", 1) is None
+
+
+def test_blob_encodings_round_trip():
+    raw = ("riesgo " * 200).encode("utf-8")
+    for compression in ("none", "zlib"):
+        encoding, content = encode_blob(raw, compression)
+        assert decode_blob(encoding, content) == raw.decode("utf-8")
+    assert len(encode_blob(raw, "zlib")[1]) < len(raw)
+
+
+def test_keyset_pages_and_ndjson_export_cover_every_row_once():
+    db, _ = _session()
+    db.info["actor"] = "ana@empresa.test"
+    db.add_all([Catalog(catalog_id=i + 1, catalog_key=f"K{i}", name=f"Catálogo {i}") for i in range(7)])
+    db.flush()
+    db.add(AuditLog(table_name="usuario_rol", operation="UPDATE", target_pk_id=1, target_pk={"usuario_id": 1}))
+    # Mismo instante para todas: el id desempata dentro del cursor
+    db.execute(update(AuditLog).values(created_at=datetime(2026, 10, 1, 12, 0)))
+    db.commit()
+    admin = {"user_id": "1", "activo": True, "roles": frozenset({"Administrador"})}
+    filters = AuditLogFilters(table_name="catalog")
+
+    seen, cursor = [], None
+    for _ in range(10):
+        page = audit_service.list_audit_service(db, admin, filters, cursor, limit=3)
+        seen += [e["id"] for e in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == sorted(seen, reverse=True) and len(seen) == len(set(seen)) == 7
+
+    async def export():
+        chunks = audit_service.aiter_audit_ndjson(filters, chunk=2, session_factory=lambda: Session(db.get_bind()))
+        return b"".join([chunk async for chunk in chunks]).decode("utf-8").splitlines()
+
+    lines = asyncio.run(export())
+    assert [json.loads(line)["id"] for line in lines] == sorted(seen)
+
+    with pytest.raises(HTTPException) as exc:
+        audit_service.list_audit_service(db, admin, filters, "no-es-cursor")
+    assert exc.value.status_code == 400
+    with pytest.raises(HTTPException) as exc:
+        audit_service.list_audit_service(db, {**admin, "roles": frozenset({"Revisor"})}, filters)
+    assert exc.value.status_code == 403
@@ -0,0 +1,75 @@
+from datetime import date, datetime, timezone
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+from app.infrastructure import audit_partitions
+
+
+def test_partition_bounds_are_whole_utc_months():
+    assert audit_partitions.add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert audit_partitions.add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert audit_partitions.create_partition_sql(date(2026, 12, 1), schema="iso") == (
+        'CREATE TABLE IF NOT EXISTS "iso".audit_log_p2026_12 PARTITION OF "iso".audit_log '
+        "FOR VALUES FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')")
+
+
+def test_only_months_fully_before_the_retention_window_expire(monkeypatch):
+    months = [date(2026, m, 1) for m in range(9, 13)]
+    monkeypatch.setattr(audit_partitions, "existing_partitions",
+                        lambda db: {m: audit_partitions.partition_name(m) for m in months})
+    now = datetime(2027, 2, 15, tzinfo=timezone.utc)
+
+    expired = audit_partitions.expired_partitions(None, retention_months=3, now=now)
+    assert [p.name for p in expired] == ["audit_log_p2026_09", "audit_log_p2026_10"]
+    assert audit_partitions.expired_partitions(None, retention_months=0, now=now) == []
+
+
+def test_rows_already_in_default_move_to_the_new_partition_in_one_transaction():
+    statements = audit_partitions.move_from_default_sql(date(2026, 12, 1), schema="iso")
+    assert statements[0] == 'ALTER TABLE "iso".audit_log DETACH PARTITION "iso".audit_log_default'
+    assert statements[1] == audit_partitions.create_partition_sql(date(2026, 12, 1), schema="iso")
+    assert statements[2].startswith('INSERT INTO "iso".audit_log_p2026_12 (id, created_at,')
+    assert statements[3] == ('DELETE FROM "iso".audit_log_default WHERE '
+                             "created_at >= '2026-12-01 00:00:00+00' AND created_at < '2027-01-01 00:00:00+00'")
+    assert statements[4].endswith('ATTACH PARTITION "iso".audit_log_default DEFAULT')
+
+
+def test_maintenance_unlocks_on_the_connection_that_took_the_lock(tmp_path, monkeypatch):
+    # SQLite con QueuePool y funciones que imitan el advisory lock de sesión de Postgres
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}", poolclass=QueuePool, pool_size=3)
+    holders, used = {}, []
+
+    @event.listens_for(engine, "connect")
+    def _register(dbapi_connection, _):
+        def try_lock(key):
+            if holders.get(key, dbapi_connection) is not dbapi_connection:
+                return 0
+            holders[key] = dbapi_connection
+            return 1
+
+        def unlock(key):
+            return 1 if holders.get(key) is dbapi_connection and holders.pop(key) else 0
+
+        dbapi_connection.create_function("pg_try_advisory_lock", 1, try_lock)
+        dbapi_connection.create_function("pg_advisory_unlock", 1, unlock)
+
+    # Conexiones ociosas en el pool: un commit que la devolviera haría que el paso siguiente tome otra
+    warm = [engine.connect() for _ in range(3)]
+    for connection in warm:
+        connection.close()
+
+    def step(db, *args, **kwargs):
+        used.append(db.connection().connection.dbapi_connection)
+        db.execute(text("SELECT 1"))
+        db.commit()
+        return []
+
+    monkeypatch.setattr(audit_partitions, "ensure_partitions", step)
+    monkeypatch.setattr(audit_partitions, "detach_expired", step)
+
+    for _ in range(2):
+        assert audit_partitions.run_maintenance(Session(engine)) == {"created": [], "detached": []}
+        assert holders == {}
+        assert used[-1] is used[-2]
@@ -0,0 +1,76 @@
+from sqlalchemy import BigInteger, create_engine, event, func, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.infrastructure import audit
+from app.infrastructure.audit_sink import AuditSink
+from app.infrastructure.models import AuditLog, AuditOutbox, Catalog
+from app.workers import audit_worker
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_bigint(type_, compiler, **kw):
+    # Para que outbox_id sea INTEGER PRIMARY KEY (autoincremental) en sqlite
+    return "INTEGER"
+
+
+def _engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    event.listen(engine, "connect", lambda conn, _: conn.execute("ATTACH DATABASE ':memory:' AS iso"))
+    for model in (Catalog, AuditLog, AuditOutbox):
+        model.__table__.create(engine)
+    return engine
+
+
+def _count(db, model):
+    return db.scalar(select(func.count()).select_from(model))
+
+
+def test_async_sink_ships_committed_flushes_and_drops_rollbacks(monkeypatch):
+    monkeypatch.setattr(audit, "AUDIT_SINK", "async")
+    sink = AuditSink(buffer_size=10, batch_size=10)
+    monkeypatch.setattr(audit, "audit_sink", sink)
+    engine = _engine()
+
+    with Session(engine) as db:
+        db.info["actor"] = "ana@empresa.test"
+        db.add_all([Catalog(catalog_id=i + 1, catalog_key=f"K{i}", name=f"Catálogo {i}") for i in range(3)])
+        db.flush()
+        # Nada en audit_log dentro de la transacción de negocio: una sola fila de outbox
+        assert (_count(db, AuditLog), _count(db, AuditOutbox)) == (0, 1)
+        db.commit()
+        assert len(sink) == 1
+
+        db.add(Catalog(catalog_id=10, catalog_key="X", name="Descartado"))
+        db.flush()
+        db.rollback()
+        assert len(sink) == 1
+
+    with Session(engine) as db:
+        assert audit_worker.run_pending(db, sink) == 3
+        rows = db.execute(select(AuditLog).order_by(AuditLog.id)).scalars().all()
+        assert [r.operation for r in rows] == ["CREATE"] * 3
+        assert rows[0].actor == "ana@empresa.test" and rows[0].created_at is not None
+        assert _count(db, AuditOutbox) == 0
+    assert (sink.stats()["shipped"], sink.stats()["swept"]) == (3, 0)
+
+
+def test_sweep_recovers_rows_dropped_from_buffer(monkeypatch):
+    monkeypatch.setattr(audit, "AUDIT_SINK", "async")
+    sink = AuditSink(buffer_size=1, batch_size=1)
+    monkeypatch.setattr(audit, "audit_sink", sink)
+    engine = _engine()
+
+    with Session(engine) as db:
+        for i in range(3):
+            db.add(Catalog(catalog_id=i + 1, catalog_key=f"K{i}", name=f"Catálogo {i}"))
+            db.commit()
+    assert (len(sink), sink.stats()["dropped"]) == (1, 2)
+
+    with Session(engine) as db:
+        # Las filas descartadas del buffer siguen en la outbox hasta que pase el período de gracia
+        assert audit_worker.run_pending(db, sink, grace_seconds=3600) == 1
+        assert _count(db, AuditOutbox) == 2
+        assert audit_worker.run_pending(db, sink, grace_seconds=-60) == 2
+        assert (_count(db, AuditLog), _count(db, AuditOutbox)) == (3, 0)
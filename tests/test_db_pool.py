@@ -0,0 +1,60 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.infrastructure.db_pool import TimedQueuePool, pool_stats, psycopg2_connect_args, split_pool_budget
+
+
+def _engine():
+    return create_engine(
+        "sqlite://",
+        creator=lambda: sqlite3.connect(":memory:", check_same_thread=False),
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+
+
+def test_pool_records_checkouts_and_timeouts():
+    engine = _engine()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    stats = pool_stats(engine.pool)
+    assert stats["max_connections"] == 1
+    assert stats["checkouts"] == 2
+    assert stats["checkins"] == 2
+    assert stats["connects"] == 1
+    assert stats["timeouts"] == 1
+
+    # dispose() recrea el pool pero conserva las métricas acumuladas sin duplicar listeners
+    engine.dispose()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    stats = pool_stats(engine.pool)
+    assert stats["checkouts"] == 3
+    assert stats["checkins"] == 3
+    assert stats["connects"] == 2
+
+
+def test_psycopg2_connect_args_sets_search_path_and_application_name():
+    args = psycopg2_connect_args("iso")
+    assert "-csearch_path=iso,public" in args["options"]
+    assert args["application_name"]
+
+
+def test_sync_and_async_pools_share_one_budget():
+    assert split_pool_budget(5, 0.3, minimum=1) == (3, 2)
+    assert split_pool_budget(10, 0.3) == (7, 3)
+    # La parte async explícita se descuenta del presupuesto
+    assert split_pool_budget(10, 0.3, async_part=4) == (6, 4)
+    # Ningún pool queda en 0 (ilimitado para QueuePool)
+    assert split_pool_budget(1, 0.3, minimum=1) == (1, 1)
+    assert split_pool_budget(0, 0.3) == (0, 0)
@@ -0,0 +1,69 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.schemas.Dtos.DocumentDtos import DocumentListFiltersDto
+from app.services.document_google_service import _documents_page_stmt, _documents_page, _like_pattern
+from app.utils.keyset import decode_cursor, encode_cursor
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_latest_mode_uses_lateral_and_keyset_order():
+    # Como lo entrega get_current_user: roles en un conjunto y "sub" como texto
+    user = {"empresa_id": 3, "roles": frozenset({"Usuario Estándar"}), "user_id": "7", "area_id": 11}
+    sql = _sql(_documents_page_stmt(user, DocumentListFiltersDto(q="50%_ok", tipo_item_id=4),
+                                    encode_cursor(120, 2), 20))
+
+    assert "JOIN LATERAL" in sql and "ORDER BY iso.documento_version.numero_version DESC" in sql
+    # La visibilidad del usuario elige la última versión que puede ver, dentro del LATERAL
+    lateral = sql[sql.index("JOIN LATERAL"):sql.index("AS ultima_version")]
+    assert "revisado_por_id = 7" in lateral and "catalog_item.name = 'Aprobado'" in lateral
+    assert "documento.documento_id <= 120" in sql
+    assert "(iso.documento.documento_id, ultima_version.numero_version) < (120, 2)" in sql
+    assert sql.rstrip().endswith("LIMIT 21")
+    # psycopg2 duplica los %; el texto buscado lleva escapados % y _
+    assert "ILIKE '%%50\\%%\\_ok%%' ESCAPE" in sql
+
+
+def test_visibility_follows_roles_of_current_user():
+    filters = DocumentListFiltersDto(latest=False)
+    admin = _sql(_documents_page_stmt({"empresa_id": 3, "roles": frozenset({"Administrador"}), "user_id": "1"},
+                                      filters, None, 20))
+    assert "'Aprobado'" not in admin
+
+    for roles in (frozenset({"Alta Dirección"}), frozenset()):
+        sql = _sql(_documents_page_stmt({"empresa_id": 3, "roles": roles, "user_id": "7", "area_id": 11},
+                                        filters, None, 20))
+        assert "'Aprobado'" in sql
+        assert "revisado_por_id" not in sql and "area_responsable_item_id = 11" not in sql
+
+
+def test_all_versions_mode_and_page_cursor():
+    sql = _sql(_documents_page_stmt({"empresa_id": 3}, DocumentListFiltersDto(latest=False), None, 2))
+    assert "LATERAL" not in sql and "ORDER BY iso.documento.documento_id DESC" in sql
+
+    class Row:
+        def __init__(self, documento_id, numero_version):
+            self._mapping = {"documento_id": documento_id, "numero_version": numero_version}
+
+    page = _documents_page([Row(9, 2), Row(9, 1), Row(8, 1)], 2)
+    assert [i["numero_version"] for i in page["items"]] == [2, 1]
+    assert decode_cursor(page["next_cursor"], 2) == [9, 1]
+    assert _documents_page([Row(9, 2)], 2)["next_cursor"] is None
+    assert _like_pattern(" a_b ") == "% a\\_b %"
+
+
+def test_malformed_cursor_is_rejected():
+    for cursor in ("@@", encode_cursor(1), "bm8"):
+        with pytest.raises(HTTPException) as exc:
+            decode_cursor(cursor, 2)
+        assert exc.value.status_code == 400
+
+    # Dos valores que no son enteros no llegan a la comparación BIGINT
+    for key in (("a", "b"), (1, None), ([1], 2)):
+        with pytest.raises(HTTPException) as exc:
+            _documents_page_stmt({"empresa_id": 3}, DocumentListFiltersDto(), encode_cursor(*key), 20)
+        assert exc.value.status_code == 400
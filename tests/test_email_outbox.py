@@ -0,0 +1,68 @@
+# tests/test_email_outbox.py
+import smtplib
+from contextlib import contextmanager
+
+from app.infrastructure.email_outbox import LocalEmailOutbox
+from app.infrastructure.smtp_pool import LocalMailbox
+from app.workers.email_worker import run_pending
+
+
+class _FakeSession:
+    def rollback(self):
+        pass
+
+
+def _enqueue(outbox, to_email, version_id=1):
+    outbox.enqueue(None, to_email=to_email, subject="Revisión requerida", body_text="Revisar",
+                   body_html="<p>Revisar</p>", version_id=version_id)
+
+
+def test_batches_over_one_session_and_deduplicates():
+    outbox = LocalEmailOutbox()
+    _enqueue(outbox, "revisor@empresa.mx")
+    _enqueue(outbox, "Revisor@empresa.mx")  # misma versión y destinatario
+    _enqueue(outbox, "aprobador@empresa.mx")
+    _enqueue(outbox, "revisor@empresa.mx", version_id=2)
+    mailbox = LocalMailbox()
+
+    assert run_pending(_FakeSession(), outbox, mailbox) == 3
+    assert mailbox.sessions == 1
+    assert [m["To"] for m in mailbox.messages] == ["revisor@empresa.mx", "aprobador@empresa.mx", "revisor@empresa.mx"]
+    assert [e["state"] for e in outbox.emails()] == ["sent", "sent", "sent"]
+    assert outbox.depth(None) == 0
+
+
+class _FlakyMailer:
+    def __init__(self, refuse=(), disconnect_after=None):
+        self.refuse = set(refuse)
+        self.disconnect_after = disconnect_after
+        self.sent = []
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    def send_message(self, msg):
+        if msg["To"] in self.refuse:
+            raise smtplib.SMTPRecipientsRefused({msg["To"]: (550, b"No existe")})
+        if self.disconnect_after is not None and len(self.sent) >= self.disconnect_after:
+            raise smtplib.SMTPServerDisconnected("Conexión cerrada")
+        self.sent.append(msg["To"])
+
+
+def test_failures_are_rescheduled_with_backoff():
+    outbox = LocalEmailOutbox()
+    for to_email in ("a@empresa.mx", "b@empresa.mx", "c@empresa.mx", "d@empresa.mx"):
+        _enqueue(outbox, to_email)
+
+    mailer = _FlakyMailer(refuse={"a@empresa.mx"}, disconnect_after=1)
+    run_pending(_FakeSession(), outbox, mailer)
+
+    emails = {e["to_email"]: e for e in outbox.emails()}
+    assert mailer.sent == ["b@empresa.mx"]
+    assert emails["b@empresa.mx"]["state"] == "sent"
+    for to_email in ("a@empresa.mx", "c@empresa.mx", "d@empresa.mx"):
+        assert emails[to_email]["state"] == "pending"
+        assert emails[to_email]["attempts"] == 1
+        assert emails[to_email]["run_after"] > emails[to_email]["created_at"]
+    assert outbox.depth(None) == 3
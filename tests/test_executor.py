@@ -0,0 +1,27 @@
+import asyncio
+import threading
+
+from app.infrastructure import executor
+
+
+def test_jobs_cancelled_on_shutdown_do_not_stay_queued(monkeypatch):
+    monkeypatch.setattr(executor, "BLOCKING_POOL_SIZE", 1)
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.ensure_future(executor.run_blocking(release.wait))
+        queued = asyncio.ensure_future(executor.run_blocking(release.wait))
+        await asyncio.sleep(0.05)
+        executor.shutdown_blocking_executor()
+        release.set()
+        await running
+        assert queued.cancelled()
+        assert executor.blocking_pool_stats()["queued"] == 0
+        assert await executor.run_blocking(lambda: 1) == 1
+
+    executor.shutdown_blocking_executor()
+    try:
+        asyncio.run(main())
+    finally:
+        release.set()
+        executor.shutdown_blocking_executor()
@@ -0,0 +1,61 @@
+# tests/test_lease_queue.py
+import threading
+from datetime import datetime, timedelta, timezone
+
+from app.infrastructure.email_outbox import LocalEmailOutbox
+from app.infrastructure.stamp_queue import LocalStampQueue
+from app.workers.runner import run_loop
+
+
+def test_expired_lease_is_reclaimed_and_final_failure_closes_the_job():
+    queue = LocalStampQueue()
+    queue.enqueue(None, version_id=1, archivo_url="gs://bucket/DOC-1.pdf", status_item_id=10)
+    job = queue.claim(None)
+    assert queue.claim(None) is None
+
+    # Worker caído: el lease vence y el trabajo se vuelve a reclamar
+    queue._items[job["job_id"]]["locked_until"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+    job = queue.claim(None)
+    assert job["attempts"] == 2
+
+    job["attempts"] = job["max_attempts"]
+    queue.mark_failed(None, job, "sin remedio")
+    closed = queue.jobs_for_version(None, 1)[0]
+    assert closed["state"] == "failed" and closed["finished_at"] is not None
+    assert queue.depth(None) == 0
+
+
+def test_email_outbox_claims_in_batches_and_refreshes_failed_content():
+    outbox = LocalEmailOutbox()
+    for n in range(3):
+        outbox.enqueue(None, to_email=f"u{n}@empresa.mx", subject="s", body_text="b", version_id=1)
+    batch = outbox.claim_batch(None, 2)
+    assert [e["to_email"] for e in batch] == ["u0@empresa.mx", "u1@empresa.mx"]
+
+    batch[0]["attempts"] = batch[0]["max_attempts"]
+    outbox.mark_failed(None, batch[0], "550")
+    outbox.enqueue(None, to_email="u0@empresa.mx", subject="nuevo", body_text="b", version_id=1)
+    reactivated = outbox.emails()[0]
+    assert reactivated["state"] == "pending" and reactivated["subject"] == "nuevo" and reactivated["attempts"] == 0
+
+
+class _Session:
+    def close(self):
+        pass
+
+
+def test_run_loop_stops_and_makes_a_final_pass():
+    stop_event = threading.Event()
+    ticks = []
+
+    def tick(db):
+        ticks.append(stop_event.is_set())
+        stop_event.set()
+        return 0
+
+    run_loop("prueba", tick, 0.01, stop_event, final_pass=True, session_factory=_Session)
+    assert ticks == [False, True]
+
+    ticks.clear()
+    run_loop("prueba", tick, 0.01, stop_event, session_factory=_Session)
+    assert ticks == []
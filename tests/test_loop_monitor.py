@@ -0,0 +1,54 @@
+import asyncio
+import contextvars
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.infrastructure.executor import run_blocking
+from app.infrastructure.loop_monitor import LoopLagMiddleware, LoopLagMonitor
+
+actor = contextvars.ContextVar("actor", default=None)
+
+
+def _app(monitor: LoopLagMonitor) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(LoopLagMiddleware, monitor=monitor)
+
+    @app.get("/bloquea/{n}")
+    async def bloquea(n: int):
+        time.sleep(0.2)
+        return {"n": n}
+
+    @app.get("/libera/{n}")
+    async def libera(n: int):
+        actor.set("usuario-7")
+        await run_blocking(time.sleep, 0.2)
+        return {"actor": await run_blocking(actor.get)}
+
+    return app
+
+
+async def _call(path: str, monitor: LoopLagMonitor):
+    monitor.start()
+    await asyncio.sleep(0.05)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=_app(monitor)), base_url="http://test") as client:
+        response = await client.get(path)
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+    return response
+
+
+def test_blocking_endpoint_is_attributed_to_its_route():
+    monitor = LoopLagMonitor(interval=0.01, threshold_ms=100, warn_ms=10_000)
+    asyncio.run(_call("/bloquea/1", monitor))
+    routes = monitor.stats()["routes"]
+    assert "GET /bloquea/{n}" in routes
+    assert routes["GET /bloquea/{n}"]["max_ms"] >= 150
+
+
+def test_offloaded_endpoint_keeps_loop_free_and_context():
+    monitor = LoopLagMonitor(interval=0.01, threshold_ms=100, warn_ms=10_000)
+    response = asyncio.run(_call("/libera/1", monitor))
+    assert response.json() == {"actor": "usuario-7"}
+    assert monitor.stats()["routes"] == {}
@@ -0,0 +1,59 @@
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.infrastructure import metrics
+from app.infrastructure.metrics import MetricsMiddleware, module_of
+
+
+def _sample(name: str, **labels) -> float:
+    return metrics.registry.get_sample_value(name, labels) or 0
+
+
+def test_module_of_groups_iso_modules():
+    assert module_of("/documents/preview/3") == "documents"
+    assert module_of("/riesgos/generales") == "risks"
+    assert module_of("/tratamientos") == "treatments"
+    assert module_of("/desconocido") == "other"
+
+
+def test_middleware_labels_by_route_template_with_prefix():
+    router = APIRouter()
+
+    @router.get("/generales/{riesgo_id}")
+    def obtener(riesgo_id: int):
+        return {"id": riesgo_id}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/risks")
+    app.add_middleware(MetricsMiddleware)
+    client = TestClient(app)
+
+    ok = {"module": "risks", "method": "GET", "route": "/risks/generales/{riesgo_id}", "status": "200"}
+    before = _sample("iso_http_requests_total", **ok)
+    assert client.get("/risks/generales/7").status_code == 200
+    assert client.get("/risks/generales/8").status_code == 200
+    assert client.get("/risks/no-existe").status_code == 404
+
+    assert _sample("iso_http_requests_total", **ok) == before + 2
+    assert _sample("iso_http_requests_total", module="risks", method="GET", route="<sin ruta>", status="404") >= 1
+    assert _sample("iso_http_request_duration_seconds_count",
+                   module="risks", method="GET", route="/risks/generales/{riesgo_id}") >= 2
+    assert _sample("iso_http_requests_in_progress", module="risks", method="GET") == 0
+
+
+def test_scrape_adds_resource_collectors_and_caches_queue_depth(monkeypatch):
+    reads = []
+    monkeypatch.setattr(metrics, "_queue_depth_cache", None)
+    monkeypatch.setattr(metrics, "_read_queue_depths", lambda: reads.append(1) or {"stamp": 3, "email": 0})
+    def broken():
+        raise RuntimeError("sin BD")
+
+    monkeypatch.setattr(metrics.ResourceCollector, "sources", (broken, *metrics.ResourceCollector.sources[1:]))
+
+    first = metrics.render().decode()
+    second = metrics.render().decode()
+
+    assert 'iso_queue_depth{queue="stamp"} 3.0' in second
+    assert 'iso_blocking_pool{stat="max_workers"}' in first
+    assert "iso_db_pool_size" not in first  # la fuente que falla no tumba el scrape
+    assert len(reads) == 1
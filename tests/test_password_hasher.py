@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.infrastructure.password_hasher import PasswordHasher, PasswordPoolSaturated
+
+
+def test_rehash_when_rounds_change():
+    old = PasswordHasher(rounds=4, pool_size=1)
+    new = PasswordHasher(rounds=5, pool_size=1)
+    try:
+        stored = old.hash("secreta")
+        assert stored.startswith("$2b$04$")
+
+        assert old.verify_and_update("secreta", stored) == (True, None)
+        valid, rehashed = asyncio.run(new.averify_and_update("secreta", stored))
+        assert valid and rehashed.startswith("$2b$05$")
+        assert new.verify_and_update("otra", stored) == (False, None)
+        assert new.stats()["rehashed"] == 1
+    finally:
+        old.shutdown()
+        new.shutdown()
+
+
+def test_rejects_when_queue_is_full():
+    hasher = PasswordHasher(rounds=4, pool_size=1, max_queue=1)
+    release = threading.Event()
+    try:
+        running = hasher._submit(release.wait)
+        queued = hasher._submit(release.wait)
+        with pytest.raises(PasswordPoolSaturated):
+            hasher.hash("secreta")
+        assert hasher.stats()["rejected"] == 1
+
+        release.set()
+        running.result(timeout=5)
+        queued.result(timeout=5)
+        assert hasher.hash("secreta").startswith("$2b$04$")
+    finally:
+        release.set()
+        hasher.shutdown()
+
+
+def test_jobs_cancelled_on_shutdown_release_their_slot():
+    hasher = PasswordHasher(rounds=4, pool_size=1, max_queue=1)
+    release = threading.Event()
+    try:
+        running = hasher._submit(release.wait)
+        queued = hasher._submit(release.wait)
+        hasher.shutdown()
+        assert queued.cancelled()
+        release.set()
+        running.result(timeout=5)
+        assert hasher.stats()["queued"] == 0 and hasher.stats()["active"] == 0
+
+        assert hasher.hash("secreta").startswith("$2b$04$")
+    finally:
+        release.set()
+        hasher.shutdown()
@@ -0,0 +1,48 @@
+# tests/test_pdf_stamp.py
+from io import BytesIO
+
+from PyPDF2 import PdfReader
+from reportlab.pdfgen import canvas
+
+from app.services.pdf_stamp_service import StampablePdf
+
+
+def _pdf(pages: int, text: str = "Contenido") -> bytes:
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=(595, 842))
+    for i in range(pages):
+        c.drawString(100, 700, f"{text} {i}")
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def test_incremental_stamp_keeps_original_bytes_and_pages():
+    original = _pdf(3)
+    target = StampablePdf(original)
+    assert target.page_size == (595, 842)
+
+    result = target.stamp(_pdf(1, "FIRMADO"), mode="incremental")
+    output = result.open().read()
+
+    assert result.mode == "incremental"
+    assert output.startswith(original)
+    assert len(output) == result.size
+    reader = PdfReader(BytesIO(output))
+    assert len(reader.pages) == 3
+    assert "FIRMADO" in reader.pages[0].extract_text()
+    assert "FIRMADO" not in reader.pages[1].extract_text()
+
+
+def test_successive_stamps_stack_on_first_page():
+    output = _pdf(2)
+    for _ in range(3):
+        output = StampablePdf(output).stamp(_pdf(1, "FIRMADO"), mode="incremental").open().read()
+    assert PdfReader(BytesIO(output)).pages[0].extract_text().count("FIRMADO") == 3
+
+
+def test_rewrite_mode_produces_same_page_count():
+    result = StampablePdf(_pdf(4)).stamp(_pdf(1, "FIRMADO"), mode="rewrite")
+    reader = PdfReader(BytesIO(result.open().read()))
+    assert result.mode == "rewrite"
+    assert len(reader.pages) == 4
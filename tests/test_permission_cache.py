@@ -0,0 +1,59 @@
+from sqlalchemy.dialects import postgresql
+
+from app.services.auth_service import permisos_efectivos_stmt
+from app.services.permission_cache import PermissionCache, UserAccess
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_expires_and_invalidates_per_user_and_globally():
+    clock = _Clock()
+    cache = PermissionCache(ttl_seconds=60, clock=clock)
+    loads = []
+
+    def loader(usuario_id):
+        def load():
+            loads.append(usuario_id)
+            return UserAccess(roles=("Revisor",), permisos=(f"P{len(loads)}",))
+        return load
+
+    assert cache.get_or_load(1, loader(1)).permisos == ("P1",)
+    assert cache.get_or_load(1, loader(1)).permisos == ("P1",)
+    cache.get_or_load(2, loader(2))
+
+    cache.invalidate_user(1)
+    assert cache.get_or_load(1, loader(1)).permisos == ("P3",)
+    cache.get_or_load(2, loader(2))
+    assert loads == [1, 2, 1]
+
+    cache.invalidate_all()
+    cache.get_or_load(2, loader(2))
+    clock.now += 60
+    cache.get_or_load(2, loader(2))
+    assert loads == [1, 2, 1, 2, 2]
+    assert cache.stats()["expirations"] == 1
+
+
+def test_invalidation_during_load_is_not_cached():
+    cache = PermissionCache()
+
+    def stale_load():
+        # Un admin cambia los roles mientras esta carga consultaba
+        cache.invalidate_user(1)
+        return UserAccess(roles=("Viejo",), permisos=())
+
+    assert cache.get_or_load(1, stale_load).roles == ("Viejo",)
+    assert cache.get_or_load(1, lambda: UserAccess(roles=("Nuevo",), permisos=())).roles == ("Nuevo",)
+
+
+def test_effective_permissions_query_is_a_union_without_cross_join():
+    sql = str(permisos_efectivos_stmt(7).compile(dialect=postgresql.dialect()))
+    assert "UNION" in sql
+    assert "NOT IN" in sql
+    assert sql.count("JOIN") == 2
@@ -0,0 +1,40 @@
+import pytest
+
+from app.services.auth_service import ensure_user_roles
+from app.services.permission_registry import (PermissionRegistry, StaleTokenRegistry, decode_bits,
+                                              encode_bits)
+
+
+def _registry(permisos, roles):
+    return PermissionRegistry(1, permisos, roles)
+
+
+def test_bits_roundtrip():
+    assert encode_bits([]) == ""
+    assert decode_bits(encode_bits([0, 3, 17, 64])) == [0, 3, 17, 64]
+
+
+def test_old_tokens_decode_after_catalog_grows():
+    old = _registry([(10, "DOC_LEER"), (11, "DOC_APROBAR")], [(1, "Administrador"), (2, "Revisor")])
+    claims = old.encode(["Revisor"], ["DOC_APROBAR"])
+    assert claims["pv"] == "2.11.2.2"
+    assert len(claims["pb"]) + len(claims["rb"]) <= 4
+
+    grown = _registry([(10, "DOC_LEER"), (11, "DOC_APROBAR"), (15, "RIESGO_EDITAR")],
+                      [(1, "Administrador"), (2, "Revisor"), (5, "Supervisor")])
+    roles, permisos = grown.decode(claims)
+    assert roles == frozenset({"Revisor"}) and permisos == frozenset({"DOC_APROBAR"})
+
+    # Un token más nuevo que el registro en memoria pide recargarlo
+    assert old.compatibility(grown.encode([], [])["pv"]) == -1
+    # Si se borró físicamente un id ya usado, las posiciones cambiaron: se rechaza
+    shrunk = _registry([(11, "DOC_APROBAR"), (15, "RIESGO_EDITAR")], [(1, "Administrador"), (2, "Revisor")])
+    with pytest.raises(StaleTokenRegistry):
+        shrunk.decode(claims)
+
+
+def test_ensure_user_roles_with_sets():
+    ensure_user_roles({"roles": frozenset({"Revisor"})}, ["Administrador", "Revisor"])
+    with pytest.raises(Exception) as exc:
+        ensure_user_roles({"roles": frozenset({"Revisor"})}, ["Administrador"])
+    assert exc.value.status_code == 403
@@ -0,0 +1,47 @@
+import io
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.infrastructure.db import get_db
+from app.routers import documents
+from app.services import storage_service
+from app.utils.audit_context import audit_context
+
+CONTENT = b"%PDF-1.4\n" + bytes(range(256)) * 20
+
+
+@pytest.fixture
+def client(monkeypatch):
+    storage = storage_service.InMemoryStorage()
+    storage.write("DOC-001-v1.pdf", io.BytesIO(CONTENT))
+    storage_service.set_storage(storage)
+    monkeypatch.setattr(documents, "get_version_blob_name", lambda db, version_id: "DOC-001-v1.pdf")
+    app = FastAPI()
+    app.include_router(documents.router)
+    app.dependency_overrides[get_db] = lambda: None
+    app.dependency_overrides[audit_context] = lambda: None
+    yield TestClient(app)
+    storage_service.set_storage(None)
+
+
+def test_preview_serves_ranges_and_not_modified(client):
+    full = client.get("/documents/preview/1")
+    assert full.status_code == 200
+    assert full.content == CONTENT
+    etag = full.headers["etag"]
+
+    partial = client.get("/documents/preview/1", headers={"Range": "bytes=100-199"})
+    assert partial.status_code == 206
+    assert partial.content == CONTENT[100:200]
+    assert partial.headers["content-range"] == f"bytes 100-199/{len(CONTENT)}"
+
+    suffix = client.get("/documents/preview/1", headers={"Range": "bytes=-10"})
+    assert suffix.content == CONTENT[-10:]
+
+    assert client.get("/documents/preview/1", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/documents/preview/1", headers={"Range": f"bytes={len(CONTENT)}-"}).status_code == 416
+
+    stale = client.get("/documents/preview/1", headers={"Range": "bytes=0-9", "If-Range": '"otro"'})
+    assert stale.status_code == 200
@@ -0,0 +1,57 @@
+import json
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.infrastructure import query_stats
+from app.infrastructure.query_stats import DbTimingMiddleware, install_query_hooks, track_queries
+
+
+def _engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    install_query_hooks(engine)
+    return engine
+
+
+def test_track_queries_reports_repeated_statement(monkeypatch, caplog):
+    monkeypatch.setattr(query_stats, "DB_REQUEST_QUERY_WARN", 3)
+    engine = _engine()
+    with caplog.at_level(logging.WARNING, logger="app.db.requests"):
+        with track_queries("worker stamp_job", empresa_id=7) as stats:
+            with engine.connect() as conn:
+                for i in range(4):
+                    conn.execute(text("SELECT :i"), {"i": i})
+
+    assert stats.count == 4
+    assert stats.most_repeated()[0] == 4
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["event"] == "db_heavy_request"
+    assert record["route"] == "worker stamp_job"
+    assert record["empresa_id"] == 7
+    assert record["most_repeated"] == 4
+
+
+def test_middleware_adds_server_timing_and_logs_slow_queries(monkeypatch, caplog):
+    monkeypatch.setattr(query_stats, "DB_SLOW_QUERY_MS", 0)
+    engine = _engine()
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        return {"id": item_id}
+
+    app.add_middleware(DbTimingMiddleware)
+    with caplog.at_level(logging.WARNING, logger="app.db.slow"):
+        response = TestClient(app).get("/items/5", headers={"X-Company-Id": "3"})
+
+    assert response.status_code == 200
+    assert 'desc="2 queries"' in response.headers["server-timing"]
+    slow = [json.loads(r.getMessage()) for r in caplog.records if r.name == "app.db.slow"]
+    assert slow and slow[0]["route"] == "GET /items/{item_id}"
+    assert slow[0]["empresa_id"] == 3
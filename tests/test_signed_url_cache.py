@@ -0,0 +1,33 @@
+from app.services.signed_url_cache import SignedUrlCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_reuses_url_until_safety_margin_and_invalidates():
+    clock = _Clock()
+    cache = SignedUrlCache(ttl_seconds=3600, safety_margin_seconds=300, clock=clock)
+    signed = []
+
+    def sign(expiration):
+        signed.append(expiration.total_seconds())
+        return f"https://signed/{len(signed)}"
+
+    assert cache.get_or_sign("DOC-001-v1.pdf", sign) == "https://signed/1"
+    clock.now += 3299
+    assert cache.get_or_sign("DOC-001-v1.pdf", sign) == "https://signed/1"
+    clock.now += 1  # dentro del margen de seguridad: se firma otra
+    assert cache.get_or_sign("DOC-001-v1.pdf", sign) == "https://signed/2"
+
+    cache.invalidate("DOC-001-v1.pdf")
+    assert cache.get_or_sign("DOC-001-v1.pdf", sign) == "https://signed/3"
+
+    stats = cache.stats()
+    assert signed == [3600.0] * 3
+    assert (stats["hits"], stats["misses"], stats["expirations"], stats["invalidations"]) == (1, 3, 1, 1)
+    assert stats["hit_rate"] == 0.25
@@ -0,0 +1,55 @@
+import smtplib
+
+import pytest
+
+from app.infrastructure.smtp_pool import SmtpPool, SmtpSettings
+
+
+class _FakeSMTP:
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+
+    def send_message(self, msg):
+        if msg == "falla":
+            raise smtplib.SMTPServerDisconnected()
+        self.sent.append(msg)
+
+    def noop(self):
+        return (250, b"OK")
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+class _Pool(SmtpPool):
+    def _connect(self):
+        self.created += 1
+        return _FakeSMTP()
+
+
+def _pool(**kwargs):
+    return _Pool(SmtpSettings(None, 25, None, None, False, False), **kwargs)
+
+
+def test_reuses_connections_and_discards_broken_ones():
+    pool = _pool(max_size=2)
+    pool.send_message("uno")
+    pool.send_message("dos")
+    assert pool.stats()["created"] == 1
+    assert pool.stats()["reused"] == 1
+
+    with pytest.raises(smtplib.SMTPServerDisconnected):
+        pool.send_message("falla")
+    assert pool.stats()["idle"] == 0
+    assert pool.stats()["discarded"] == 1
+
+    pool.send_message("tres")
+    assert pool.stats()["created"] == 2
+    assert pool.stats()["in_use"] == 0
+
+    pool.close()
+    assert pool.stats()["idle"] == 0
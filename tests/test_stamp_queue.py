@@ -0,0 +1,61 @@
+# tests/test_stamp_queue.py
+from app.infrastructure.stamp_queue import LocalStampQueue
+from app.workers.stamp_worker import run_pending
+
+
+def _enqueue(queue, version_id=1, status_item_id=10, signer="7"):
+    queue.enqueue(None, version_id=version_id, archivo_url=f"gs://bucket/DOC-{version_id}.pdf",
+                  status_item_id=status_item_id, signer_name=signer)
+
+
+class _FakeSession:
+    def rollback(self):
+        pass
+
+
+def test_enqueue_is_idempotent_and_processes_in_order():
+    queue = LocalStampQueue()
+    _enqueue(queue)
+    _enqueue(queue)  # misma clave: no se duplica
+    _enqueue(queue, status_item_id=11)
+
+    seen = []
+    processed = run_pending(_FakeSession(), queue, handler=lambda db, q, job: seen.append(job["status_item_id"]))
+
+    assert processed == 2
+    assert seen == [10, 11]
+    assert [j["state"] for j in queue.jobs_for_version(None, 1)] == ["done", "done"]
+    assert queue.depth(None) == 0
+
+
+def test_failed_job_is_rescheduled_and_blocks_later_jobs_of_same_version():
+    queue = LocalStampQueue()
+    _enqueue(queue)
+    _enqueue(queue, status_item_id=11)
+
+    def fail(db, q, job):
+        raise RuntimeError("GCS no disponible")
+
+    assert run_pending(_FakeSession(), queue, handler=fail) == 1
+    jobs = queue.jobs_for_version(None, 1)
+    assert jobs[0]["state"] == "pending"
+    assert jobs[0]["attempts"] == 1
+    assert jobs[0]["last_error"] == "GCS no disponible"
+    # el segundo trabajo espera a que termine el primero
+    assert jobs[1]["state"] == "pending"
+    assert queue.claim(None) is None
+
+
+def test_reapplied_status_is_stamped_again_after_the_first_job_finished():
+    queue = LocalStampQueue()
+    queue.enqueue(None, version_id=1, archivo_url="gs://bucket/DOC-1.pdf", status_item_id=10,
+                  signer_name="7", change_id=100)
+    assert run_pending(_FakeSession(), queue, handler=lambda db, q, job: None) == 1
+
+    # Mismo estado y firmante en un cambio posterior (p. ej. tras revertirlo): otro trabajo
+    queue.enqueue(None, version_id=1, archivo_url="gs://bucket/DOC-1.pdf", status_item_id=10,
+                  signer_name="7", change_id=101)
+    # Reintento del encolado del mismo cambio: no se duplica
+    queue.enqueue(None, version_id=1, archivo_url="gs://bucket/DOC-1.pdf", status_item_id=10,
+                  signer_name="7", change_id=101)
+    assert [j["state"] for j in queue.jobs_for_version(None, 1)] == ["done", "pending"]
@@ -0,0 +1,68 @@
+# tests/test_stamp_template.py
+from io import BytesIO
+
+from PIL import Image
+from PyPDF2 import PdfReader
+from reportlab.pdfgen import canvas
+
+from app.services.pdf_stamp_service import StampablePdf
+from app.services.signature_cache import render_signature
+from app.services.stamp_template import get_overlay_template, render_status_overlay, signature_image
+
+
+def _pdf() -> bytes:
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=(595, 842))
+    c.drawCentredString(297, 501, "NombreDocumento")
+    c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def _signature() -> tuple[bytes, int, int]:
+    img = Image.new("RGBA", (300, 120), (0, 0, 0, 0))
+    img.paste((20, 20, 90, 255), (10, 50, 290, 70))
+    buffer = BytesIO()
+    img.save(buffer, "PNG")
+    return render_signature(buffer.getvalue())
+
+
+def _stamp(mode: str, display_name: str, nombre_documento: str = "Política de (acceso)"):
+    png, width, height = _signature()
+    template = get_overlay_template(595, 842, 1)
+    overlay = render_status_overlay(template, png, width, height, display_name, "05-03-2026 10:30",
+                                    nombre_documento)
+    result = StampablePdf(_pdf()).stamp(overlay, mode=mode)
+    return PdfReader(BytesIO(result.open().read())).pages[0]
+
+
+def _stamp_form(page):
+    xobjects = page["/Resources"]["/XObject"]
+    return next(xobjects[name].get_object() for name in xobjects if name.startswith("/IsoStamp"))
+
+
+def test_overlay_draws_title_signature_and_texts_on_the_first_page():
+    page = _stamp("incremental", "María Núñez")
+    text = page.extract_text()
+    for expected in ("María Núñez", "05-03-2026 10:30", "Política de (acceso)"):
+        assert expected in text
+
+    form = _stamp_form(page)
+    firma = form["/Resources"]["/XObject"]["/Firma"].get_object()
+    assert (firma["/Width"], firma["/Height"]) == (300, 120)
+    # La transparencia de la firma viaja como máscara
+    assert firma["/SMask"].get_object()["/ColorSpace"] == "/DeviceGray"
+    assert form["/Resources"]["/Font"]["/F2"]["/BaseFont"] == "/Helvetica-Bold"
+
+
+def test_signature_image_and_template_are_built_once_and_reused():
+    _stamp("incremental", "Primer firmante")
+    template = get_overlay_template(595, 842, 1)
+    hits = signature_image.cache_info().hits
+
+    page = _stamp("rewrite", "Segundo firmante", nombre_documento=None)
+
+    assert signature_image.cache_info().hits == hits + 1
+    assert get_overlay_template(595, 842, 1) is template
+    text = page.extract_text()
+    assert "Segundo firmante" in text and "NombreDocumento" in text
@@ -0,0 +1,52 @@
+import io
+
+import pytest
+
+from app.services.storage_service import (InMemoryStorage, LocalDiskStorage, ObjectNotFound, ObjectStorage,
+                                          PreconditionFailed)
+
+
+@pytest.fixture(params=["memory", "local"])
+def storage(request, tmp_path):
+    return InMemoryStorage() if request.param == "memory" else LocalDiskStorage(tmp_path)
+
+
+def test_write_read_and_ranges(storage):
+    content = b"%PDF-1.4\n" + b"x" * 5000
+    stat = storage.write("DOC-001-v1.pdf", io.BytesIO(content), content_type="application/pdf")
+
+    assert stat.size == len(content)
+    assert storage.read("DOC-001-v1.pdf") == content
+    assert storage.read_with_generation("DOC-001-v1.pdf") == (content, stat.generation)
+    assert b"".join(storage.iter_chunks("DOC-001-v1.pdf", chunk_size=1000)) == content
+    assert b"".join(storage.iter_chunks("DOC-001-v1.pdf", start=2, end=9, chunk_size=3)) == content[2:10]
+
+
+def test_generation_preconditions(storage):
+    first = storage.write("DOC-002-v1.pdf", io.BytesIO(b"uno"), if_generation_match=0)
+    with pytest.raises(PreconditionFailed):
+        storage.write("DOC-002-v1.pdf", io.BytesIO(b"dos"), if_generation_match=0)
+
+    storage.write("DOC-002-v1.pdf", io.BytesIO(b"dos"), if_generation_match=first.generation)
+    with pytest.raises(PreconditionFailed):
+        storage.read("DOC-002-v1.pdf", if_generation_match=first.generation)
+    assert storage.read("DOC-002-v1.pdf") == b"dos"
+
+    storage.delete("DOC-002-v1.pdf")
+    assert storage.stat("DOC-002-v1.pdf") is None
+    with pytest.raises(ObjectNotFound):
+        storage.read("DOC-002-v1.pdf")
+
+
+def test_local_rejects_keys_outside_root(tmp_path):
+    with pytest.raises(ValueError):
+        LocalDiskStorage(tmp_path / "root").read("../secreto.pdf")
+
+
+def test_backends_must_implement_the_whole_interface():
+    class ReadOnly(ObjectStorage):
+        def read(self, key, if_generation_match=None):
+            return b""
+
+    with pytest.raises(TypeError):
+        ReadOnly()
@@ -0,0 +1,76 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from jose import JWTError
+
+from app.services import auth_service
+from app.services.token_cache import TokenCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_caches_valid_tokens_until_exp_or_ttl():
+    clock = _Clock()
+    cache = TokenCache(ttl_seconds=300, clock=clock)
+    decoded = []
+
+    def decode(token):
+        decoded.append(token)
+        if token == "malo":
+            raise JWTError("firma inválida")
+        return {"sub": token, "exp": 1100} if token == "corto" else {"sub": token, "exp": 5000}
+
+    assert cache.get_or_decode("largo", decode)["sub"] == "largo"
+    assert cache.get_or_decode("corto", decode)["sub"] == "corto"
+    clock.now = 1099
+    cache.get_or_decode("largo", decode)
+    cache.get_or_decode("corto", decode)
+    assert decoded == ["largo", "corto"]
+
+    clock.now = 1100  # exp del token corto: se vuelve a verificar aunque el TTL no haya vencido
+    cache.get_or_decode("corto", decode)
+    clock.now = 1300  # TTL del token largo
+    cache.get_or_decode("largo", decode)
+    assert decoded == ["largo", "corto", "corto", "largo"]
+
+    for _ in range(2):
+        with pytest.raises(JWTError):
+            cache.get_or_decode("malo", decode)
+    assert decoded.count("malo") == 2
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"], stats["entries"]) == (2, 4, 2, 2)
+
+
+def test_get_current_user_uses_cache(monkeypatch):
+    monkeypatch.setattr(auth_service, "SECRET_KEY", "test-secret")
+    monkeypatch.setattr(auth_service, "ALGORITHM", "HS256")
+    cache = TokenCache()
+    monkeypatch.setattr(auth_service, "token_cache", cache)
+    token = auth_service.create_access_token(
+        payload={"sub": "7", "email": "ana@empresa.test", "activo": True, "empresa_id": 3, "roles": ["Revisor"]},
+        expires_delta=timedelta(minutes=5),
+    )
+
+    for _ in range(3):
+        user = asyncio.run(auth_service.get_current_user(token))
+        assert (user["user_id"], user["empresa_id"], user["roles"]) == ("7", 3, frozenset({"Revisor"}))
+    assert (cache.stats()["misses"], cache.stats()["hits"]) == (1, 2)
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(auth_service.get_current_user(token[:-2] + "xx"))
+    assert exc.value.status_code == 401
+
+    # Tras rotar SECRET_KEY el token ya cacheado se vuelve a verificar con la clave nueva
+    monkeypatch.setattr(auth_service, "SECRET_KEY", "otra-clave")
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(auth_service.get_current_user(token))
+    assert exc.value.status_code == 401
@@ -0,0 +1,38 @@
+import hashlib
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from app.services import google_cloud_aservice as gcs
+from app.services import storage_service
+
+
+@pytest.fixture
+def local_storage(tmp_path):
+    storage_service.set_storage(storage_service.LocalDiskStorage(tmp_path))
+    yield tmp_path
+    storage_service.set_storage(None)
+
+
+def test_local_upload_streams_in_chunks_and_hashes(local_storage, monkeypatch):
+    monkeypatch.setattr(storage_service, "UPLOAD_CHUNK_SIZE", 1024)
+    content = b"%PDF-1.4\n" + bytes(range(256)) * 40
+
+    result = gcs.upload_stream(UploadFile(io.BytesIO(content), filename="doc.pdf"), "docs/POL-001-v1.pdf")
+
+    assert result.size == len(content)
+    assert result.sha256 == hashlib.sha256(content).hexdigest()
+    assert (local_storage / "docs" / "POL-001-v1.pdf").read_bytes() == content
+    assert gcs.extract_blob_name(result.url) == "docs/POL-001-v1.pdf"
+
+
+def test_hashing_reader_does_not_count_retried_chunks_twice():
+    content = b"abcdefghij" * 100
+    reader = gcs.HashingReader(io.BytesIO(content))
+    reader.read(300)
+    reader.seek(100)  # la subida reanudable reintenta desde el último byte confirmado
+    while reader.read(128):
+        pass
+    assert reader.size == len(content)
+    assert reader.hexdigest() == hashlib.sha256(content).hexdigest()